@@ -2,11 +2,17 @@
 #
 # Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
 #
+import math
 from collections import Counter
-from typing import Dict, Union
+from contextlib import contextmanager
+from decimal import Decimal
+from threading import Lock
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
 
 import snowflake.snowpark
 from snowflake.snowpark._internal.analyzer.analyzer_utils import (
+    EMPTY_STRING,
     alias_expression,
     binary_arithmetic_expression,
     block_expression,
@@ -31,6 +37,7 @@ from snowflake.snowpark._internal.analyzer.analyzer_utils import (
     specified_window_frame_expression,
     subfield_expression,
     subquery_expression,
+    subquery_slot,
     table_function_partition_spec,
     unary_expression,
     update_merge_statement,
@@ -45,6 +52,7 @@ from snowflake.snowpark._internal.analyzer.binary_expression import (
     BinaryExpression,
 )
 from snowflake.snowpark._internal.analyzer.binary_plan_node import Join, SetOperation
+from snowflake.snowpark._internal.analyzer.constant_folding import fold_constants
 from snowflake.snowpark._internal.analyzer.datatype_mapper import (
     str_to_sql,
     to_sql,
@@ -75,6 +83,14 @@ from snowflake.snowpark._internal.analyzer.grouping_set import (
     GroupingSet,
     GroupingSetsExpression,
 )
+from snowflake.snowpark._internal.analyzer.plan_optimizer import (
+    optimize as optimize_plan,
+)
+from snowflake.snowpark._internal.analyzer.schema_inference import (
+    infer_attributes,
+    projected_columns,
+    referenced_columns,
+)
 from snowflake.snowpark._internal.analyzer.snowflake_plan import (
     SnowflakePlan,
     SnowflakePlanBuilder,
@@ -135,188 +151,416 @@ from snowflake.snowpark._internal.analyzer.window_expression import (
     WindowSpecDefinition,
 )
 from snowflake.snowpark._internal.error_message import SnowparkClientExceptionMessages
-from snowflake.snowpark.types import VariantType, _NumericType
+from snowflake.snowpark._internal.utils import deterministic_aliases, stable_hash
+from snowflake.snowpark.row import Row
+from snowflake.snowpark.types import (
+    BooleanType,
+    DataType,
+    DecimalType,
+    DoubleType,
+    FloatType,
+    LongType,
+    StringType,
+    VariantType,
+    _IntegralType,
+    _NumericType,
+)
 
 ARRAY_BIND_THRESHOLD = 512
+# the number of values of Column.in_() from which they are loaded into a table
+LARGE_IN_LIST_THRESHOLD = 5000
 
 
-class Analyzer:
-    def __init__(self, session: "snowflake.snowpark.session.Session"):
-        self.session = session
-        self.plan_builder = SnowflakePlanBuilder(self.session)
-        self.generated_alias_maps = {}
-        self.subquery_plans = []
-        self.alias_maps_to_use = None
+class _NodeRegistry:
+    """Maps classes of expressions or logical plans to the methods of
+    :class:`Analyzer` that handle them. A node is dispatched by its exact class,
+    and a class that isn't registered is handled by the method of its nearest
+    registered base class, which is cached for the next lookup."""
 
-    def analyze(self, expr: Union[Expression, NamedExpression]) -> str:
-        if isinstance(expr, GroupingSetsExpression):
-            return grouping_set_expression(
-                [[self.analyze(a) for a in arg] for arg in expr.args]
-            )
+    def __init__(self) -> None:
+        self._handlers: Dict[type, Callable] = {}
+        self._cache: Dict[type, Optional[Callable]] = {}
+
+    def register(self, *classes: type) -> Callable[[Callable], Callable]:
+        def decorator(handler: Callable) -> Callable:
+            for cls in classes:
+                self._handlers[cls] = handler
+            self._cache.clear()
+            return handler
 
-        if isinstance(expr, Like):
-            return like_expression(self.analyze(expr.expr), self.analyze(expr.pattern))
+        return decorator
 
-        if isinstance(expr, RegExp):
-            return regexp_expression(
-                self.analyze(expr.expr), self.analyze(expr.pattern)
+    def lookup(self, cls: type) -> Optional[Callable]:
+        try:
+            return self._cache[cls]
+        except KeyError:
+            handler = next(
+                (self._handlers[c] for c in cls.__mro__ if c in self._handlers), None
             )
+            self._cache[cls] = handler
+            return handler
 
-        if isinstance(expr, Collate):
-            return collate_expression(self.analyze(expr.expr), expr.collation_spec)
 
-        if isinstance(expr, (SubfieldString, SubfieldInt)):
-            return subfield_expression(self.analyze(expr.expr), expr.field)
+_EXPRESSION_ANALYZERS = _NodeRegistry()
+_PLAN_RESOLVERS = _NodeRegistry()
 
-        if isinstance(expr, CaseWhen):
-            return case_when_expression(
-                [
-                    (self.analyze(condition), self.analyze(value))
-                    for condition, value in expr.branches
-                ],
-                self.analyze(expr.else_value) if expr.else_value else "NULL",
-            )
+# the SQL of these expressions depends on the plan being resolved
+_CONTEXT_DEPENDENT_EXPRESSIONS = (Attribute, ScalarSubquery)
 
-        if isinstance(expr, MultipleExpression):
-            return block_expression(
-                [self.analyze(expression) for expression in expr.expressions]
-            )
+# stands for the SQL of an operand in the SQL of an operator
+_OPERAND_PLACEHOLDER = "\x00"
 
-        if isinstance(expr, InExpression):
-            return in_expression(
-                self.analyze(expr.columns),
-                [self.analyze(expression) for expression in expr.values],
-            )
 
-        if isinstance(expr, GroupingSet):
-            return self.grouping_extractor(expr)
-
-        if isinstance(expr, WindowExpression):
-            return window_expression(
-                self.analyze(expr.window_function), self.analyze(expr.window_spec)
-            )
-        if isinstance(expr, WindowSpecDefinition):
-            return window_spec_expression(
-                list(map(self.analyze, expr.partition_spec)),
-                list(map(self.analyze, expr.order_spec)),
-                self.analyze(expr.frame_spec),
-            )
-        if isinstance(expr, SpecifiedWindowFrame):
-            return specified_window_frame_expression(
-                expr.frame_type.sql,
-                self.window_frame_boundary(self.to_sql_avoid_offset(expr.lower)),
-                self.window_frame_boundary(self.to_sql_avoid_offset(expr.upper)),
-            )
-        if isinstance(expr, UnspecifiedFrame):
-            return ""
-        if isinstance(expr, SpecialFrameBoundary):
-            return expr.sql
+def _alias_seed(
+    logical_plan: LogicalPlan, resolved_children: Dict[LogicalPlan, SnowflakePlan]
+) -> str:
+    # The aliases in the SQL of a plan only need to be unique in its query, so
+    # they are derived from the shape of the plan and its leaves, rather than
+    # from its SQL, which would be hashed again at every level of a deep plan.
+    if isinstance(logical_plan, SnowflakePlan):
+        return logical_plan.alias_seed
+    if isinstance(logical_plan, SnowflakeValues):
+        leaf = repr(
+            ([(a.name, a.datatype) for a in logical_plan.output], logical_plan.data)
+        )
+    elif isinstance(logical_plan, UnresolvedRelation):
+        leaf = logical_plan.name
+    else:
+        leaf = ""
+    return stable_hash(
+        type(logical_plan).__name__,
+        leaf,
+        *(resolved_children[c].alias_seed for c in logical_plan.children),
+    )
+
+
+def _in_list_table(
+    values: List[Expression],
+) -> Optional[Tuple[List[Attribute], List[Row]]]:
+    """Returns the columns and rows of a table of the values of an IN expression,
+    or ``None`` if the values can't be bound as the values of a typed column
+    without changing how they compare, e.g., a mix of integers and floats."""
+    rows = []
+    for value in values:
+        literals = (
+            value.expressions if isinstance(value, MultipleExpression) else [value]
+        )
+        if not all(isinstance(literal, Literal) for literal in literals):
+            return None
+        rows.append(literals)
+
+    datatypes = []
+    for i in range(len(rows[0])):
+        column_types = {
+            _in_list_type(row[i]) for row in rows if row[i].value is not None
+        }
+        if len(column_types) != 1 or None in column_types:
+            return None
+        datatypes.append(column_types.pop())
+    output = [Attribute(f'"C{i}"', t) for i, t in enumerate(datatypes, start=1)]
+    return output, [Row(*[literal.value for literal in row]) for row in rows]
+
+
+def _in_list_type(literal: Literal) -> Optional[DataType]:
+    value, datatype = literal.value, literal.datatype
+    if isinstance(datatype, _IntegralType) and type(value) is int:
+        return LongType()
+    if isinstance(datatype, (FloatType, DoubleType)) and (
+        type(value) is float and math.isfinite(value)
+    ):
+        return DoubleType()
+    if isinstance(datatype, DecimalType) and isinstance(value, Decimal):
+        return datatype
+    if isinstance(datatype, (StringType, BooleanType)):
+        return datatype
+    return None
+
+
+class ExpressionSqlMemo:
+    """The SQL of analyzed expressions, which are weakly referenced. It can be used
+    by the analyzers of several threads at once."""
+
+    def __init__(self) -> None:
+        self._memo: "WeakKeyDictionary[Expression, str]" = WeakKeyDictionary()
+        self._lock = Lock()
+
+    def get(self, expr: Expression) -> Optional[str]:
+        with self._lock:
+            return self._memo.get(expr)
+
+    def __getitem__(self, expr: Expression) -> str:
+        with self._lock:
+            return self._memo[expr]
+
+    def __setitem__(self, expr: Expression, sql: str) -> None:
+        with self._lock:
+            self._memo[expr] = sql
+
+    def __contains__(self, expr: Expression) -> bool:
+        with self._lock:
+            return expr in self._memo
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memo)
 
-        if isinstance(expr, Literal):
-            return to_sql(expr.value, expr.datatype)
 
-        if isinstance(expr, Attribute):
-            name = self.alias_maps_to_use.get(expr.expr_id, expr.name)
-            return quote_name(name)
+class Analyzer:
+    def __init__(self, session: "snowflake.snowpark.session.Session"):
+        self.session = session
+        self.plan_builder = SnowflakePlanBuilder(self.session)
+        self.generated_alias_maps = {}
+        self.subquery_plans = []
+        self.alias_maps_to_use = None
+        # the SQL of the expressions analyzed before whose subtrees don't depend
+        # on the plan being resolved, such as a Column used in several DataFrames.
+        # The memos are shared by the analyzers of all threads of the session.
+        self.expression_sql_memo = session._expression_sql_memo
+        # the SQL of the expressions analyzed where constants aren't folded
+        self.unfolded_expression_sql_memo = session._unfolded_expression_sql_memo
+        self._is_context_free = True
+        self._constant_folding_allowed = True
+
+    def _folds_constants(self) -> bool:
+        return self.session._constant_folding_enabled and self._constant_folding_allowed
+
+    def _sql_memo(self) -> Optional["ExpressionSqlMemo"]:
+        if not self.session._expression_sql_memo_enabled:
+            return None
+        return (
+            self.expression_sql_memo
+            if self._folds_constants()
+            else self.unfolded_expression_sql_memo
+        )
 
-        if isinstance(expr, UnresolvedAttribute):
-            return expr.name
+    @contextmanager
+    def _without_constant_folding(self) -> Iterator[None]:
+        # Snowflake names an unaliased column after the SQL of its expression,
+        # and matches the SQL of the expressions of an aggregation to the SQL of
+        # its grouping expressions, so that SQL is generated as it is written
+        allowed = self._constant_folding_allowed
+        self._constant_folding_allowed = False
+        try:
+            yield
+        finally:
+            self._constant_folding_allowed = allowed
 
-        if isinstance(expr, Alias):
-            quoted_name = quote_name(expr.name)
-            if isinstance(expr.child, Attribute):
-                self.generated_alias_maps[expr.child.expr_id] = quoted_name
-                for k, v in self.alias_maps_to_use.items():
-                    if v == expr.child.name:
-                        self.generated_alias_maps[k] = quoted_name
-            return alias_expression(self.analyze(expr.child), quoted_name)
+    def analyze(self, expr: Union[Expression, NamedExpression]) -> str:
+        memo = self._sql_memo()
+        if memo is not None:
+            sql = memo.get(expr)
+            if sql is not None:
+                return sql
+
+        analyze_expression = _EXPRESSION_ANALYZERS.lookup(type(expr))
+        if analyze_expression is None:
+            raise SnowparkClientExceptionMessages.PLAN_INVALID_TYPE(str(expr))
+
+        # the SQL of an expression is memoized only if its subtree doesn't depend
+        # on the alias maps of the plan being resolved, or add subquery plans to it
+        parent_is_context_free = self._is_context_free
+        self._is_context_free = True
+        sql = analyze_expression(self, expr)
+        if isinstance(expr, _CONTEXT_DEPENDENT_EXPRESSIONS):
+            self._is_context_free = False
+        elif memo is not None and self._is_context_free:
+            memo[expr] = sql
+        self._is_context_free = parent_is_context_free and self._is_context_free
+        return sql
+
+    @_EXPRESSION_ANALYZERS.register(GroupingSetsExpression)
+    def _analyze_grouping_sets(self, expr: GroupingSetsExpression) -> str:
+        return grouping_set_expression(
+            [[self.analyze(a) for a in arg] for arg in expr.args]
+        )
 
-        if isinstance(expr, FunctionExpression):
-            return function_expression(
-                expr.name,
-                [self.to_sql_avoid_offset(c) for c in expr.children],
-                expr.is_distinct,
-            )
+    @_EXPRESSION_ANALYZERS.register(Like)
+    def _analyze_like(self, expr: Like) -> str:
+        return like_expression(self.analyze(expr.expr), self.analyze(expr.pattern))
+
+    @_EXPRESSION_ANALYZERS.register(RegExp)
+    def _analyze_regexp(self, expr: RegExp) -> str:
+        return regexp_expression(self.analyze(expr.expr), self.analyze(expr.pattern))
+
+    @_EXPRESSION_ANALYZERS.register(Collate)
+    def _analyze_collate(self, expr: Collate) -> str:
+        return collate_expression(self.analyze(expr.expr), expr.collation_spec)
+
+    @_EXPRESSION_ANALYZERS.register(SubfieldString, SubfieldInt)
+    def _analyze_subfield(self, expr: Union[SubfieldString, SubfieldInt]) -> str:
+        return subfield_expression(self.analyze(expr.expr), expr.field)
+
+    @_EXPRESSION_ANALYZERS.register(CaseWhen)
+    def _analyze_case_when(self, expr: CaseWhen) -> str:
+        return case_when_expression(
+            [
+                (self.analyze(condition), self.analyze(value))
+                for condition, value in expr.branches
+            ],
+            self.analyze(expr.else_value) if expr.else_value else "NULL",
+        )
 
-        if isinstance(expr, Star):
-            if not expr.expressions:
-                return "*"
-            else:
-                return ",".join(list(map(self.analyze, expr.expressions)))
+    @_EXPRESSION_ANALYZERS.register(MultipleExpression)
+    def _analyze_multiple(self, expr: MultipleExpression) -> str:
+        return block_expression(
+            [self.analyze(expression) for expression in expr.expressions]
+        )
 
-        if isinstance(expr, SnowflakeUDF):
-            return function_expression(
-                expr.udf_name, list(map(self.analyze, expr.children)), False
+    @_EXPRESSION_ANALYZERS.register(InExpression)
+    def _analyze_in(self, expr: InExpression) -> str:
+        # a long list of values is loaded into a temporary table, which the
+        # expression selects from, so that the SQL doesn't have every value
+        table = (
+            _in_list_table(expr.values)
+            if len(expr.values) >= self.session._large_in_list_threshold
+            else None
+        )
+        if table is not None:
+            values_plan = self.plan_builder.large_local_relation_plan(*table, None)
+            return in_expression(
+                self.analyze(expr.columns),
+                [self.analyze(ScalarSubquery(values_plan))],
             )
+        return in_expression(
+            self.analyze(expr.columns),
+            [self.analyze(expression) for expression in expr.values],
+        )
 
-        if isinstance(expr, TableFunctionExpression):
-            return self.table_function_expression_extractor(expr)
+    @_EXPRESSION_ANALYZERS.register(WindowExpression)
+    def _analyze_window(self, expr: WindowExpression) -> str:
+        return window_expression(
+            self.analyze(expr.window_function), self.analyze(expr.window_spec)
+        )
 
-        if isinstance(expr, TableFunctionPartitionSpecDefinition):
-            return table_function_partition_spec(
-                expr.over,
-                list(map(self.analyze, expr.partition_spec))
-                if expr.partition_spec
-                else [],
-                list(map(self.analyze, expr.order_spec)) if expr.order_spec else [],
-            )
+    @_EXPRESSION_ANALYZERS.register(WindowSpecDefinition)
+    def _analyze_window_spec(self, expr: WindowSpecDefinition) -> str:
+        return window_spec_expression(
+            list(map(self.analyze, expr.partition_spec)),
+            list(map(self.analyze, expr.order_spec)),
+            self.analyze(expr.frame_spec),
+        )
 
-        if isinstance(expr, UnaryExpression):
-            return self.unary_expression_extractor(expr)
+    @_EXPRESSION_ANALYZERS.register(SpecifiedWindowFrame)
+    def _analyze_specified_window_frame(self, expr: SpecifiedWindowFrame) -> str:
+        return specified_window_frame_expression(
+            expr.frame_type.sql,
+            self.window_frame_boundary(self.to_sql_avoid_offset(expr.lower)),
+            self.window_frame_boundary(self.to_sql_avoid_offset(expr.upper)),
+        )
 
-        if isinstance(expr, SortOrder):
-            return order_expression(
-                self.analyze(expr.child), expr.direction.sql, expr.null_ordering.sql
-            )
+    @_EXPRESSION_ANALYZERS.register(UnspecifiedFrame)
+    def _analyze_unspecified_frame(self, expr: UnspecifiedFrame) -> str:
+        return ""
+
+    @_EXPRESSION_ANALYZERS.register(SpecialFrameBoundary)
+    def _analyze_special_frame_boundary(self, expr: SpecialFrameBoundary) -> str:
+        return expr.sql
+
+    @_EXPRESSION_ANALYZERS.register(Literal)
+    def _analyze_literal(self, expr: Literal) -> str:
+        return to_sql(expr.value, expr.datatype)
+
+    @_EXPRESSION_ANALYZERS.register(Attribute)
+    def _analyze_attribute(self, expr: Attribute) -> str:
+        name = self.alias_maps_to_use.get(expr.expr_id, expr.name)
+        return quote_name(name)
+
+    @_EXPRESSION_ANALYZERS.register(UnresolvedAttribute)
+    def _analyze_unresolved_attribute(self, expr: UnresolvedAttribute) -> str:
+        return expr.name
+
+    @_EXPRESSION_ANALYZERS.register(FunctionExpression)
+    def _analyze_function(self, expr: FunctionExpression) -> str:
+        return function_expression(
+            expr.name,
+            [self.to_sql_avoid_offset(c) for c in expr.children],
+            expr.is_distinct,
+        )
 
-        if isinstance(expr, ScalarSubquery):
-            self.subquery_plans.append(expr.plan)
-            return subquery_expression(expr.plan.queries[-1].sql)
+    @_EXPRESSION_ANALYZERS.register(Star)
+    def _analyze_star(self, expr: Star) -> str:
+        if not expr.expressions:
+            return "*"
+        else:
+            return ",".join(list(map(self.analyze, expr.expressions)))
 
-        if isinstance(expr, WithinGroup):
-            return within_group_expression(
-                self.analyze(expr.expr), [self.analyze(e) for e in expr.order_by_cols]
-            )
+    @_EXPRESSION_ANALYZERS.register(SnowflakeUDF)
+    def _analyze_udf(self, expr: SnowflakeUDF) -> str:
+        return function_expression(
+            expr.udf_name, list(map(self.analyze, expr.children)), False
+        )
 
-        if isinstance(expr, BinaryExpression):
-            return self.binary_operator_extractor(expr)
+    @_EXPRESSION_ANALYZERS.register(TableFunctionPartitionSpecDefinition)
+    def _analyze_table_function_partition_spec(
+        self, expr: TableFunctionPartitionSpecDefinition
+    ) -> str:
+        return table_function_partition_spec(
+            expr.over,
+            list(map(self.analyze, expr.partition_spec)) if expr.partition_spec else [],
+            list(map(self.analyze, expr.order_spec)) if expr.order_spec else [],
+        )
 
-        if isinstance(expr, InsertMergeExpression):
-            return insert_merge_statement(
-                self.analyze(expr.condition) if expr.condition else None,
-                [self.analyze(k) for k in expr.keys],
-                [self.analyze(v) for v in expr.values],
-            )
+    @_EXPRESSION_ANALYZERS.register(SortOrder)
+    def _analyze_sort_order(self, expr: SortOrder) -> str:
+        return order_expression(
+            self.analyze(expr.child), expr.direction.sql, expr.null_ordering.sql
+        )
 
-        if isinstance(expr, UpdateMergeExpression):
-            return update_merge_statement(
-                self.analyze(expr.condition) if expr.condition else None,
-                {self.analyze(k): self.analyze(v) for k, v in expr.assignments.items()},
-            )
+    @_EXPRESSION_ANALYZERS.register(ScalarSubquery)
+    def _analyze_scalar_subquery(self, expr: ScalarSubquery) -> str:
+        # the SQL of the subquery plan is filled in when the plan is resolved,
+        # because it is different in the schema query of the plan
+        self.subquery_plans.append(expr.plan)
+        return subquery_expression(subquery_slot(len(self.subquery_plans) - 1))
+
+    @_EXPRESSION_ANALYZERS.register(WithinGroup)
+    def _analyze_within_group(self, expr: WithinGroup) -> str:
+        return within_group_expression(
+            self.analyze(expr.expr), [self.analyze(e) for e in expr.order_by_cols]
+        )
 
-        if isinstance(expr, DeleteMergeExpression):
-            return delete_merge_statement(
-                self.analyze(expr.condition) if expr.condition else None
-            )
+    @_EXPRESSION_ANALYZERS.register(InsertMergeExpression)
+    def _analyze_insert_merge(self, expr: InsertMergeExpression) -> str:
+        return insert_merge_statement(
+            self.analyze(expr.condition) if expr.condition else None,
+            [self.analyze(k) for k in expr.keys],
+            [self.analyze(v) for v in expr.values],
+        )
 
-        if isinstance(expr, ListAgg):
-            return list_agg(
-                self.analyze(expr.col),
-                str_to_sql(expr.delimiter),
-                expr.is_distinct,
-            )
+    @_EXPRESSION_ANALYZERS.register(UpdateMergeExpression)
+    def _analyze_update_merge(self, expr: UpdateMergeExpression) -> str:
+        return update_merge_statement(
+            self.analyze(expr.condition) if expr.condition else None,
+            {self.analyze(k): self.analyze(v) for k, v in expr.assignments.items()},
+        )
 
-        if isinstance(expr, RankRelatedFunctionExpression):
-            return rank_related_function_expression(
-                expr.sql,
-                self.analyze(expr.expr),
-                expr.offset,
-                self.analyze(expr.default),
-                expr.ignore_nulls,
-            )
+    @_EXPRESSION_ANALYZERS.register(DeleteMergeExpression)
+    def _analyze_delete_merge(self, expr: DeleteMergeExpression) -> str:
+        return delete_merge_statement(
+            self.analyze(expr.condition) if expr.condition else None
+        )
+
+    @_EXPRESSION_ANALYZERS.register(ListAgg)
+    def _analyze_list_agg(self, expr: ListAgg) -> str:
+        return list_agg(
+            self.analyze(expr.col),
+            str_to_sql(expr.delimiter),
+            expr.is_distinct,
+        )
 
-        raise SnowparkClientExceptionMessages.PLAN_INVALID_TYPE(str(expr))
+    @_EXPRESSION_ANALYZERS.register(RankRelatedFunctionExpression)
+    def _analyze_rank_related_function(
+        self, expr: RankRelatedFunctionExpression
+    ) -> str:
+        return rank_related_function_expression(
+            expr.sql,
+            self.analyze(expr.expr),
+            expr.offset,
+            self.analyze(expr.default),
+            expr.ignore_nulls,
+        )
 
+    @_EXPRESSION_ANALYZERS.register(TableFunctionExpression)
     def table_function_expression_extractor(self, expr: TableFunctionExpression) -> str:
         if isinstance(expr, FlattenFunction):
             return flatten_expression(
@@ -344,7 +588,64 @@ class Analyzer:
         )
         return f"{sql} {partition_spec_sql}"
 
-    def unary_expression_extractor(self, expr: UnaryExpression) -> str:
+    @_EXPRESSION_ANALYZERS.register(UnaryExpression, BinaryExpression)
+    def operator_extractor(self, expr: Union[UnaryExpression, BinaryExpression]) -> str:
+        # Programmatically built predicates, e.g., reduce(operator.or_, conditions),
+        # are long chains of operators, so a chain is analyzed with an explicit
+        # stack rather than by recursion. The SQL of the operators in the chain is
+        # written in order into a list of fragments, because concatenating the SQL
+        # of every operator would be quadratic in the length of the chain.
+        if isinstance(expr, UnresolvedAlias) and self._constant_folding_allowed:
+            with self._without_constant_folding():
+                return self.operator_extractor(expr)
+        if self._folds_constants():
+            folded = fold_constants(expr)
+            if folded is not expr:
+                return self.analyze(folded)
+
+        memo = self._sql_memo()
+        fragments = []
+        is_context_free = True
+        stack = [expr]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                fragments.append(item)
+                continue
+            sql = memo.get(item) if memo is not None and item is not expr else None
+            if sql is not None:
+                fragments.append(sql)
+            elif item is expr or isinstance(item, (UnaryExpression, BinaryExpression)):
+                # the SQL of the operator around its operands
+                parts = self.operator_expression(
+                    item, [_OPERAND_PLACEHOLDER] * len(item.children)
+                ).split(_OPERAND_PLACEHOLDER)
+                stack.append(parts[-1])
+                for child, part in zip(reversed(item.children), reversed(parts[:-1])):
+                    stack.append(child)
+                    stack.append(part)
+            else:
+                parent_is_context_free = self._is_context_free
+                self._is_context_free = True
+                fragments.append(self.analyze(item))
+                is_context_free = is_context_free and self._is_context_free
+                self._is_context_free = parent_is_context_free
+
+        self._is_context_free = is_context_free
+        return EMPTY_STRING.join(fragments)
+
+    def operator_expression(
+        self, expr: Union[UnaryExpression, BinaryExpression], children: List[str]
+    ) -> str:
+        """Returns the SQL of a unary or binary operator from the SQL of its
+        operands."""
+        if isinstance(expr, BinaryExpression):
+            left, right = children
+            if isinstance(expr, BinaryArithmeticExpression):
+                return binary_arithmetic_expression(expr.sql_operator, left, right)
+            return function_expression(expr.sql_operator, [left, right], False)
+
+        (child,) = children
         if isinstance(expr, Alias):
             quoted_name = quote_name(expr.name)
             if isinstance(expr.child, Attribute):
@@ -352,28 +653,15 @@ class Analyzer:
                 for k, v in self.alias_maps_to_use.items():
                     if v == expr.child.name:
                         self.generated_alias_maps[k] = quoted_name
-            return alias_expression(self.analyze(expr.child), quoted_name)
+            return alias_expression(child, quoted_name)
         if isinstance(expr, UnresolvedAlias):
-            return self.analyze(expr.child)
+            return child
         elif isinstance(expr, Cast):
-            return cast_expression(self.analyze(expr.child), expr.to, expr.try_)
+            return cast_expression(child, expr.to, expr.try_)
         else:
-            return unary_expression(
-                self.analyze(expr.child), expr.sql_operator, expr.operator_first
-            )
-
-    def binary_operator_extractor(self, expr: BinaryExpression) -> str:
-        if isinstance(expr, BinaryArithmeticExpression):
-            return binary_arithmetic_expression(
-                expr.sql_operator, self.analyze(expr.left), self.analyze(expr.right)
-            )
-        else:
-            return function_expression(
-                expr.sql_operator,
-                [self.analyze(expr.left), self.analyze(expr.right)],
-                False,
-            )
+            return unary_expression(child, expr.sql_operator, expr.operator_first)
 
+    @_EXPRESSION_ANALYZERS.register(GroupingSet)
     def grouping_extractor(self, expr: GroupingSet) -> str:
         return self.analyze(
             FunctionExpression(
@@ -399,22 +687,99 @@ class Analyzer:
             return self.analyze(expr)
 
     def resolve(self, logical_plan: LogicalPlan) -> SnowflakePlan:
+        # Resolve the children bottom-up with an explicit stack rather than by
+        # recursion, because a lazily analyzed DataFrame can have a deep tree of
+        # unresolved plans. Plans resolved before are reused, and plans referenced
+        # more than once are cached, so that they can be found as common subplans.
+        resolved_plans = {}
+        references = Counter()
+        self._resolve_bottom_up(
+            logical_plan,
+            resolved_plans,
+            references,
+            self.session._plan_optimization_enabled,
+        )
+        for plan, count in references.items():
+            if count > 1 and plan.resolved_plan is None:
+                plan.resolved_plan = resolved_plans[plan]
+        return resolved_plans[logical_plan]
+
+    def _resolve_bottom_up(
+        self,
+        logical_plan: LogicalPlan,
+        resolved_plans: Dict[LogicalPlan, SnowflakePlan],
+        references: Counter,
+        optimize: bool,
+    ) -> None:
+        stack = [(logical_plan, False)]
+        while stack:
+            plan, children_visited = stack.pop()
+            if not children_visited:
+                references[plan] += 1
+            if plan in resolved_plans:
+                continue
+            if plan.resolved_plan is not None:
+                resolved_plans[plan] = plan.resolved_plan
+            elif children_visited:
+                resolved_children = {c: resolved_plans[c] for c in plan.children}
+                optimized = (
+                    optimize_plan(
+                        plan, lambda p: resolved_plans.get(p) or p.resolved_plan
+                    )
+                    if optimize
+                    else plan
+                )
+                if optimized is plan:
+                    resolved_plans[plan] = self.resolve_with_resolved_children(
+                        plan, resolved_children
+                    )
+                else:
+                    # the plans created by the optimizer are resolved as they are,
+                    # and the result keeps the aliases the original plan would
+                    # inherit from its children
+                    self._resolve_bottom_up(optimized, resolved_plans, Counter(), False)
+                    result = resolved_plans[optimized]
+                    inherited_aliases = {}
+                    for child in resolved_children.values():
+                        inherited_aliases.update(child.expr_to_alias)
+                    result.expr_to_alias = {
+                        **inherited_aliases,
+                        **result.expr_to_alias,
+                    }
+                    resolved_plans[plan] = result
+            else:
+                stack.append((plan, True))
+                stack.extend((c, False) for c in plan.children)
+
+    def resolve_with_resolved_children(
+        self,
+        logical_plan: LogicalPlan,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
         self.subquery_plans = []
         self.generated_alias_maps = {}
-        result = self.do_resolve(logical_plan)
+        if self.session._deterministic_sql_enabled:
+            alias_seed = _alias_seed(logical_plan, resolved_children)
+            with deterministic_aliases(alias_seed):
+                result = self.do_resolve(logical_plan, resolved_children)
+        else:
+            alias_seed = None
+            result = self.do_resolve(logical_plan, resolved_children)
 
         result.add_aliases(self.generated_alias_maps)
 
         if self.subquery_plans:
             result = result.with_subqueries(self.subquery_plans)
+        if alias_seed is not None and result is not logical_plan:
+            result.alias_seed = alias_seed
 
         return result
 
-    def do_resolve(self, logical_plan: LogicalPlan) -> SnowflakePlan:
-        resolved_children = {}
-        for c in logical_plan.children:
-            resolved_children[c] = self.resolve(c)
-
+    def do_resolve(
+        self,
+        logical_plan: LogicalPlan,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
         use_maps = {}
         # get counts of expr_to_alias keys
         counts = Counter()
@@ -431,270 +796,410 @@ class Analyzer:
                 )
 
         self.alias_maps_to_use = use_maps
-        return self.do_resolve_with_resolved_children(logical_plan, resolved_children)
+        result = self.do_resolve_with_resolved_children(logical_plan, resolved_children)
+        if result.source_plan is logical_plan:
+            result.inferred_attributes = infer_attributes(
+                logical_plan,
+                {c: p.known_attributes for c, p in resolved_children.items()},
+                use_maps,
+            )
+        return result
 
     def do_resolve_with_resolved_children(
         self,
         logical_plan: LogicalPlan,
         resolved_children: Dict[LogicalPlan, SnowflakePlan],
     ) -> SnowflakePlan:
-        if isinstance(logical_plan, SnowflakePlan):
-            return logical_plan
+        resolve_plan = _PLAN_RESOLVERS.lookup(type(logical_plan))
+        if resolve_plan is None:
+            return None
+        return resolve_plan(self, logical_plan, resolved_children)
 
-        if isinstance(logical_plan, TableFunctionJoin):
-            return self.plan_builder.join_table_function(
-                self.analyze(logical_plan.table_function),
-                resolved_children[logical_plan.children[0]],
-                logical_plan,
-            )
+    @_PLAN_RESOLVERS.register(SnowflakePlan)
+    def _resolve_snowflake_plan(
+        self,
+        logical_plan: SnowflakePlan,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return logical_plan
 
-        if isinstance(logical_plan, TableFunctionRelation):
-            return self.plan_builder.from_table_function(
-                self.analyze(logical_plan.table_function)
-            )
+    @_PLAN_RESOLVERS.register(TableFunctionJoin)
+    def _resolve_table_function_join(
+        self,
+        logical_plan: TableFunctionJoin,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.join_table_function(
+            self.analyze(logical_plan.table_function),
+            resolved_children[logical_plan.children[0]],
+            logical_plan,
+        )
 
-        if isinstance(logical_plan, Lateral):
-            return self.plan_builder.lateral(
-                self.analyze(logical_plan.table_function),
-                resolved_children[logical_plan.children[0]],
-                logical_plan,
-            )
+    @_PLAN_RESOLVERS.register(TableFunctionRelation)
+    def _resolve_table_function_relation(
+        self,
+        logical_plan: TableFunctionRelation,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.from_table_function(
+            self.analyze(logical_plan.table_function)
+        )
 
-        if isinstance(logical_plan, Aggregate):
-            return self.plan_builder.aggregate(
-                list(map(self.to_sql_avoid_offset, logical_plan.grouping_expressions)),
-                list(map(self.analyze, logical_plan.aggregate_expressions)),
-                resolved_children[logical_plan.child],
-                logical_plan,
-            )
+    @_PLAN_RESOLVERS.register(Lateral)
+    def _resolve_lateral(
+        self,
+        logical_plan: Lateral,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.lateral(
+            self.analyze(logical_plan.table_function),
+            resolved_children[logical_plan.children[0]],
+            logical_plan,
+        )
 
-        if isinstance(logical_plan, Project):
-            return self.plan_builder.project(
-                list(map(self.analyze, logical_plan.project_list)),
-                resolved_children[logical_plan.child],
-                logical_plan,
+    @_PLAN_RESOLVERS.register(Aggregate)
+    def _resolve_aggregate(
+        self,
+        logical_plan: Aggregate,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        with self._without_constant_folding():
+            grouping_expressions = list(
+                map(self.to_sql_avoid_offset, logical_plan.grouping_expressions)
             )
-
-        if isinstance(logical_plan, Filter):
-            return self.plan_builder.filter(
-                self.analyze(logical_plan.condition),
-                resolved_children[logical_plan.child],
-                logical_plan,
+            aggregate_expressions = list(
+                map(self.analyze, logical_plan.aggregate_expressions)
             )
+        return self.plan_builder.aggregate(
+            grouping_expressions,
+            aggregate_expressions,
+            resolved_children[logical_plan.child],
+            logical_plan,
+        )
 
+    @_PLAN_RESOLVERS.register(Project)
+    def _resolve_project(
+        self,
+        logical_plan: Project,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.project(
+            list(map(self.analyze, logical_plan.project_list)),
+            resolved_children[logical_plan.child],
+            logical_plan,
+            project_columns=projected_columns(
+                logical_plan.project_list, self.alias_maps_to_use
+            ),
+        )
+
+    @_PLAN_RESOLVERS.register(Filter)
+    def _resolve_filter(
+        self,
+        logical_plan: Filter,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.filter(
+            self.analyze(logical_plan.condition),
+            resolved_children[logical_plan.child],
+            logical_plan,
+            referenced=referenced_columns(
+                [logical_plan.condition], self.alias_maps_to_use
+            ),
+        )
+
+    @_PLAN_RESOLVERS.register(Sample)
+    def _resolve_sample(
+        self,
+        logical_plan: Sample,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
         # Add a sample stop to the plan being built
-        if isinstance(logical_plan, Sample):
-            return self.plan_builder.sample(
-                resolved_children[logical_plan.child],
-                logical_plan,
-                logical_plan.probability_fraction,
-                logical_plan.row_count,
-            )
+        return self.plan_builder.sample(
+            resolved_children[logical_plan.child],
+            logical_plan,
+            logical_plan.probability_fraction,
+            logical_plan.row_count,
+        )
 
-        if isinstance(logical_plan, Join):
-            return self.plan_builder.join(
-                resolved_children[logical_plan.left],
-                resolved_children[logical_plan.right],
-                logical_plan.join_type,
-                self.analyze(logical_plan.condition) if logical_plan.condition else "",
-                logical_plan,
-            )
+    @_PLAN_RESOLVERS.register(Join)
+    def _resolve_join(
+        self,
+        logical_plan: Join,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.join(
+            resolved_children[logical_plan.left],
+            resolved_children[logical_plan.right],
+            logical_plan.join_type,
+            self.analyze(logical_plan.condition) if logical_plan.condition else "",
+            logical_plan,
+        )
 
-        if isinstance(logical_plan, Sort):
-            return self.plan_builder.sort(
-                list(map(self.analyze, logical_plan.order)),
-                resolved_children[logical_plan.child],
-                logical_plan,
-            )
+    @_PLAN_RESOLVERS.register(Sort)
+    def _resolve_sort(
+        self,
+        logical_plan: Sort,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.sort(
+            list(map(self.analyze, logical_plan.order)),
+            resolved_children[logical_plan.child],
+            logical_plan,
+            referenced=referenced_columns(logical_plan.order, self.alias_maps_to_use),
+        )
 
-        if isinstance(logical_plan, SetOperation):
-            return self.plan_builder.set_operator(
-                resolved_children[logical_plan.left],
-                resolved_children[logical_plan.right],
-                logical_plan.sql,
-                logical_plan,
-            )
+    @_PLAN_RESOLVERS.register(SetOperation)
+    def _resolve_set_operation(
+        self,
+        logical_plan: SetOperation,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.set_operator(
+            [resolved_children[c] for c in logical_plan.children],
+            logical_plan.sql,
+            logical_plan,
+        )
 
-        if isinstance(logical_plan, Range):
-            # schema of Range. Since this corresponds to the Snowflake column "id"
-            # (quoted lower-case) it's a little hard for users. So we switch it to
-            # the column name "ID" == id == Id
-            return self.plan_builder.query(
-                range_statement(
-                    logical_plan.start, logical_plan.end, logical_plan.step, "id"
-                ),
-                logical_plan,
-            )
+    @_PLAN_RESOLVERS.register(Range)
+    def _resolve_range(
+        self,
+        logical_plan: Range,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        # schema of Range. Since this corresponds to the Snowflake column "id"
+        # (quoted lower-case) it's a little hard for users. So we switch it to
+        # the column name "ID" == id == Id
+        return self.plan_builder.query(
+            range_statement(
+                logical_plan.start, logical_plan.end, logical_plan.step, "id"
+            ),
+            logical_plan,
+        )
 
-        if isinstance(logical_plan, SnowflakeValues):
-            if logical_plan.data:
-                if (
-                    len(logical_plan.output) * len(logical_plan.data)
-                    < ARRAY_BIND_THRESHOLD
-                ):
-                    return self.plan_builder.query(
-                        values_statement(logical_plan.output, logical_plan.data),
-                        logical_plan,
-                    )
-                else:
-                    return self.plan_builder.large_local_relation_plan(
-                        logical_plan.output, logical_plan.data, logical_plan
-                    )
-            else:
+    @_PLAN_RESOLVERS.register(SnowflakeValues)
+    def _resolve_snowflake_values(
+        self,
+        logical_plan: SnowflakeValues,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        if logical_plan.data:
+            if len(logical_plan.output) * len(logical_plan.data) < ARRAY_BIND_THRESHOLD:
                 return self.plan_builder.query(
-                    empty_values_statement(logical_plan.output),
+                    values_statement(logical_plan.output, logical_plan.data),
                     logical_plan,
                 )
+            else:
+                return self.plan_builder.large_local_relation_plan(
+                    logical_plan.output, logical_plan.data, logical_plan
+                )
+        else:
+            return self.plan_builder.query(
+                empty_values_statement(logical_plan.output),
+                logical_plan,
+            )
 
-        if isinstance(logical_plan, UnresolvedRelation):
-            return self.plan_builder.table(logical_plan.name)
+    @_PLAN_RESOLVERS.register(UnresolvedRelation)
+    def _resolve_unresolved_relation(
+        self,
+        logical_plan: UnresolvedRelation,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.table(logical_plan.name)
 
-        if isinstance(logical_plan, SnowflakeCreateTable):
-            return self.plan_builder.save_as_table(
-                logical_plan.table_name,
-                logical_plan.mode,
-                logical_plan.create_temp_table,
-                resolved_children[logical_plan.children[0]],
-            )
+    @_PLAN_RESOLVERS.register(SnowflakeCreateTable)
+    def _resolve_snowflake_create_table(
+        self,
+        logical_plan: SnowflakeCreateTable,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.save_as_table(
+            logical_plan.table_name,
+            logical_plan.mode,
+            logical_plan.create_temp_table,
+            resolved_children[logical_plan.children[0]],
+        )
 
-        if isinstance(logical_plan, Limit):
-            if isinstance(logical_plan.child, Sort):
-                on_top_of_order_by = True
-            elif (
-                isinstance(logical_plan.child, SnowflakePlan)
-                and logical_plan.child.source_plan
-            ):
-                on_top_of_order_by = isinstance(logical_plan.child.source_plan, Sort)
-            else:
-                on_top_of_order_by = False
+    @_PLAN_RESOLVERS.register(Limit)
+    def _resolve_limit(
+        self,
+        logical_plan: Limit,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        if isinstance(logical_plan.child, Sort):
+            on_top_of_order_by = True
+        elif (
+            isinstance(logical_plan.child, SnowflakePlan)
+            and logical_plan.child.source_plan
+        ):
+            on_top_of_order_by = isinstance(logical_plan.child.source_plan, Sort)
+        else:
+            on_top_of_order_by = False
 
-            return self.plan_builder.limit(
-                self.to_sql_avoid_offset(logical_plan.limit_expr),
-                resolved_children[logical_plan.child],
-                on_top_of_order_by,
-                logical_plan,
-            )
+        return self.plan_builder.limit(
+            self.to_sql_avoid_offset(logical_plan.limit_expr),
+            resolved_children[logical_plan.child],
+            on_top_of_order_by,
+            logical_plan,
+        )
 
-        if isinstance(logical_plan, Pivot):
-            if len(logical_plan.aggregates) != 1:
-                raise ValueError("Only one aggregate is supported with pivot")
+    @_PLAN_RESOLVERS.register(Pivot)
+    def _resolve_pivot(
+        self,
+        logical_plan: Pivot,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        if len(logical_plan.aggregates) != 1:
+            raise ValueError("Only one aggregate is supported with pivot")
+
+        with self._without_constant_folding():
+            pivot_column = self.analyze(logical_plan.pivot_column)
+            pivot_values = [self.analyze(pv) for pv in logical_plan.pivot_values]
+            aggregate = self.analyze(logical_plan.aggregates[0])
+        return self.plan_builder.pivot(
+            pivot_column,
+            pivot_values,
+            aggregate,
+            resolved_children[logical_plan.child],
+            logical_plan,
+        )
 
-            return self.plan_builder.pivot(
-                self.analyze(logical_plan.pivot_column),
-                [self.analyze(pv) for pv in logical_plan.pivot_values],
-                self.analyze(logical_plan.aggregates[0]),
-                resolved_children[logical_plan.child],
-                logical_plan,
-            )
+    @_PLAN_RESOLVERS.register(Unpivot)
+    def _resolve_unpivot(
+        self,
+        logical_plan: Unpivot,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.unpivot(
+            logical_plan.value_column,
+            logical_plan.name_column,
+            [self.analyze(c) for c in logical_plan.column_list],
+            resolved_children[logical_plan.child],
+            logical_plan,
+        )
 
-        if isinstance(logical_plan, Unpivot):
-            return self.plan_builder.unpivot(
-                logical_plan.value_column,
-                logical_plan.name_column,
-                [self.analyze(c) for c in logical_plan.column_list],
-                resolved_children[logical_plan.child],
-                logical_plan,
+    @_PLAN_RESOLVERS.register(CreateViewCommand)
+    def _resolve_create_view_command(
+        self,
+        logical_plan: CreateViewCommand,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        if isinstance(logical_plan.view_type, PersistedView):
+            is_temp = False
+        elif isinstance(logical_plan.view_type, LocalTempView):
+            is_temp = True
+        else:
+            raise SnowparkClientExceptionMessages.PLAN_ANALYZER_UNSUPPORTED_VIEW_TYPE(
+                str(logical_plan.view_type)
             )
 
-        if isinstance(logical_plan, CreateViewCommand):
-            if isinstance(logical_plan.view_type, PersistedView):
-                is_temp = False
-            elif isinstance(logical_plan.view_type, LocalTempView):
-                is_temp = True
-            else:
-                raise SnowparkClientExceptionMessages.PLAN_ANALYZER_UNSUPPORTED_VIEW_TYPE(
-                    str(logical_plan.view_type)
-                )
+        return self.plan_builder.create_or_replace_view(
+            logical_plan.name, resolved_children[logical_plan.child], is_temp
+        )
 
-            return self.plan_builder.create_or_replace_view(
-                logical_plan.name, resolved_children[logical_plan.child], is_temp
+    @_PLAN_RESOLVERS.register(CopyIntoTableNode)
+    def _resolve_copy_into_table_node(
+        self,
+        logical_plan: CopyIntoTableNode,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        if logical_plan.table_name:
+            return self.plan_builder.copy_into_table(
+                path=logical_plan.file_path,
+                table_name=logical_plan.table_name,
+                files=logical_plan.files,
+                pattern=logical_plan.pattern,
+                file_format=logical_plan.file_format,
+                format_type_options=logical_plan.format_type_options,
+                copy_options=logical_plan.copy_options,
+                validation_mode=logical_plan.validation_mode,
+                column_names=logical_plan.column_names,
+                transformations=[self.analyze(x) for x in logical_plan.transformations]
+                if logical_plan.transformations
+                else None,
+                user_schema=logical_plan.user_schema,
+                create_table_from_infer_schema=logical_plan.create_table_from_infer_schema,
             )
-
-        if isinstance(logical_plan, CopyIntoTableNode):
-            if logical_plan.table_name:
-                return self.plan_builder.copy_into_table(
-                    path=logical_plan.file_path,
-                    table_name=logical_plan.table_name,
-                    files=logical_plan.files,
-                    pattern=logical_plan.pattern,
-                    file_format=logical_plan.file_format,
-                    format_type_options=logical_plan.format_type_options,
-                    copy_options=logical_plan.copy_options,
-                    validation_mode=logical_plan.validation_mode,
-                    column_names=logical_plan.column_names,
-                    transformations=[
-                        self.analyze(x) for x in logical_plan.transformations
-                    ]
-                    if logical_plan.transformations
-                    else None,
-                    user_schema=logical_plan.user_schema,
-                    create_table_from_infer_schema=logical_plan.create_table_from_infer_schema,
-                )
-            elif logical_plan.file_format and logical_plan.file_format.upper() == "CSV":
-                if not logical_plan.user_schema:
-                    raise SnowparkClientExceptionMessages.DF_MUST_PROVIDE_SCHEMA_FOR_READING_FILE()
-                else:
-                    return self.plan_builder.read_file(
-                        logical_plan.files,
-                        logical_plan.file_format,
-                        logical_plan.cur_options,
-                        self.session.get_fully_qualified_current_schema(),
-                        logical_plan.user_schema._to_attributes(),
-                    )
+        elif logical_plan.file_format and logical_plan.file_format.upper() == "CSV":
+            if not logical_plan.user_schema:
+                raise SnowparkClientExceptionMessages.DF_MUST_PROVIDE_SCHEMA_FOR_READING_FILE()
             else:
-                schema = (
-                    logical_plan.user_schema._to_attributes()
-                    if logical_plan.user_schema
-                    else [Attribute('"$1"', VariantType())]
-                )
                 return self.plan_builder.read_file(
                     logical_plan.files,
                     logical_plan.file_format,
                     logical_plan.cur_options,
                     self.session.get_fully_qualified_current_schema(),
-                    schema,
+                    logical_plan.user_schema._to_attributes(),
                 )
-
-        if isinstance(logical_plan, CopyIntoLocationNode):
-            return self.plan_builder.copy_into_location(
-                query=resolved_children[logical_plan.child],
-                stage_location=logical_plan.stage_location,
-                partition_by=self.analyze(logical_plan.partition_by)
-                if logical_plan.partition_by
-                else None,
-                file_format_name=logical_plan.file_format_name,
-                file_format_type=logical_plan.file_format_type,
-                format_type_options=logical_plan.format_type_options,
-                header=logical_plan.header,
-                **logical_plan.copy_options,
+        else:
+            schema = (
+                logical_plan.user_schema._to_attributes()
+                if logical_plan.user_schema
+                else [Attribute('"$1"', VariantType())]
             )
-
-        if isinstance(logical_plan, TableUpdate):
-            return self.plan_builder.update(
-                logical_plan.table_name,
-                {
-                    self.analyze(k): self.analyze(v)
-                    for k, v in logical_plan.assignments.items()
-                },
-                self.analyze(logical_plan.condition)
-                if logical_plan.condition
-                else None,
-                resolved_children.get(logical_plan.source_data, None),
+            return self.plan_builder.read_file(
+                logical_plan.files,
+                logical_plan.file_format,
+                logical_plan.cur_options,
+                self.session.get_fully_qualified_current_schema(),
+                schema,
             )
 
-        if isinstance(logical_plan, TableDelete):
-            return self.plan_builder.delete(
-                logical_plan.table_name,
-                self.analyze(logical_plan.condition)
-                if logical_plan.condition
-                else None,
-                resolved_children.get(logical_plan.source_data, None),
-            )
+    @_PLAN_RESOLVERS.register(CopyIntoLocationNode)
+    def _resolve_copy_into_location_node(
+        self,
+        logical_plan: CopyIntoLocationNode,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.copy_into_location(
+            query=resolved_children[logical_plan.child],
+            stage_location=logical_plan.stage_location,
+            partition_by=self.analyze(logical_plan.partition_by)
+            if logical_plan.partition_by
+            else None,
+            file_format_name=logical_plan.file_format_name,
+            file_format_type=logical_plan.file_format_type,
+            format_type_options=logical_plan.format_type_options,
+            header=logical_plan.header,
+            **logical_plan.copy_options,
+        )
 
-        if isinstance(logical_plan, TableMerge):
-            return self.plan_builder.merge(
-                logical_plan.table_name,
-                resolved_children.get(logical_plan.source),
-                self.analyze(logical_plan.join_expr),
-                [self.analyze(c) for c in logical_plan.clauses],
-            )
+    @_PLAN_RESOLVERS.register(TableUpdate)
+    def _resolve_table_update(
+        self,
+        logical_plan: TableUpdate,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.update(
+            logical_plan.table_name,
+            {
+                self.analyze(k): self.analyze(v)
+                for k, v in logical_plan.assignments.items()
+            },
+            self.analyze(logical_plan.condition) if logical_plan.condition else None,
+            resolved_children.get(logical_plan.source_data, None),
+        )
+
+    @_PLAN_RESOLVERS.register(TableDelete)
+    def _resolve_table_delete(
+        self,
+        logical_plan: TableDelete,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.delete(
+            logical_plan.table_name,
+            self.analyze(logical_plan.condition) if logical_plan.condition else None,
+            resolved_children.get(logical_plan.source_data, None),
+        )
+
+    @_PLAN_RESOLVERS.register(TableMerge)
+    def _resolve_table_merge(
+        self,
+        logical_plan: TableMerge,
+        resolved_children: Dict[LogicalPlan, SnowflakePlan],
+    ) -> SnowflakePlan:
+        return self.plan_builder.merge(
+            logical_plan.table_name,
+            resolved_children.get(logical_plan.source),
+            self.analyze(logical_plan.join_expr),
+            [self.analyze(c) for c in logical_plan.clauses],
+        )
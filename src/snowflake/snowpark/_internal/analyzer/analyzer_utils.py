@@ -17,12 +17,13 @@ from snowflake.snowpark._internal.analyzer.datatype_mapper import (
     to_sql,
 )
 from snowflake.snowpark._internal.analyzer.expression import Attribute
+from snowflake.snowpark._internal.analyzer.sql_rope import join_fragments
 from snowflake.snowpark._internal.error_message import SnowparkClientExceptionMessages
 from snowflake.snowpark._internal.type_utils import convert_sp_to_sf_type
 from snowflake.snowpark._internal.utils import (
     TempObjectType,
     is_single_quoted,
-    random_name_for_temp_object,
+    random_alias_for_temp_object,
 )
 from snowflake.snowpark.row import Row
 from snowflake.snowpark.types import DataType
@@ -129,6 +130,18 @@ MATCHED = " MATCHED "
 LISTAGG = " LISTAGG "
 HEADER = " HEADER "
 IGNORE_NULLS = " IGNORE NULLS "
+WITH = " WITH "
+
+# Parts of a query that are only known after it is generated are referred to by
+# slots: the ID of a query that runs before it, and the SQL of a subquery plan,
+# which is different in the query and in its schema query. All the slots of a
+# query are filled in a single pass over its SQL.
+QUERY_ID_PLACE_HOLDER_PREFIX = "query_id_place_holder_"
+SUBQUERY_SLOT_MARKER = "\x01"
+SLOT_PATTERN = re.compile(
+    f"{QUERY_ID_PLACE_HOLDER_PREFIX}[0-9A-Za-z]+|"
+    f"{SUBQUERY_SLOT_MARKER}[0-9]+{SUBQUERY_SLOT_MARKER}"
+)
 
 
 def result_scan_statement(uuid_place_holder: str) -> str:
@@ -346,6 +359,37 @@ def filter_statement(condition: str, child: str) -> str:
     return project_statement([], child) + WHERE + condition
 
 
+def select_statement(
+    project: List[str],
+    child: str,
+    is_distinct: bool = False,
+    condition: Optional[str] = None,
+    order: Optional[List[str]] = None,
+    limit: Optional[str] = None,
+) -> str:
+    """Generates a single SELECT with the given optional WHERE, ORDER BY and LIMIT
+    clauses, which is the merged form of stacked project, filter, sort and limit
+    statements."""
+    return (
+        project_statement(project, child, is_distinct=is_distinct)
+        + (WHERE + condition if condition is not None else EMPTY_STRING)
+        + (ORDER_BY + COMMA.join(order) if order else EMPTY_STRING)
+        + (LIMIT + limit if limit is not None else EMPTY_STRING)
+    )
+
+
+def and_condition(left: str, right: str) -> str:
+    return (
+        LEFT_PARENTHESIS
+        + left
+        + RIGHT_PARENTHESIS
+        + AND
+        + LEFT_PARENTHESIS
+        + right
+        + RIGHT_PARENTHESIS
+    )
+
+
 def sample_statement(
     child: str,
     probability_fraction: Optional[float] = None,
@@ -427,7 +471,7 @@ def range_statement(start: int, end: int, step: int, column_name: str) -> str:
 
 
 def values_statement(output: List[Attribute], data: List[Row]) -> str:
-    table_name = random_name_for_temp_object(TempObjectType.TABLE)
+    table_name = random_alias_for_temp_object(TempObjectType.TABLE)
     data_types = [attr.datatype for attr in output]
     names = [quote_name(attr.name) for attr in output]
     rows = []
@@ -451,25 +495,40 @@ def empty_values_statement(output: List[Attribute]) -> str:
     return filter_statement(UNSAT_FILTER, values_statement(output, data))
 
 
-def set_operator_statement(left: str, right: str, operator: str) -> str:
+def cte_statement(ctes: List[Tuple[str, str]], child: str) -> str:
     return (
-        LEFT_PARENTHESIS
-        + left
-        + RIGHT_PARENTHESIS
-        + SPACE
-        + operator
-        + SPACE
-        + LEFT_PARENTHESIS
-        + right
-        + RIGHT_PARENTHESIS
+        WITH
+        + COMMA.join(
+            name + AS + LEFT_PARENTHESIS + query + RIGHT_PARENTHESIS
+            for name, query in ctes
+        )
+        + project_statement([], child)
+    )
+
+
+def subquery_slot(index: int) -> str:
+    return SUBQUERY_SLOT_MARKER + str(index) + SUBQUERY_SLOT_MARKER
+
+
+def fill_slots(sql: str, values: Dict[str, str]) -> str:
+    """Returns ``sql`` with the slots in ``values`` replaced by their values."""
+    if not values:
+        return sql
+    return SLOT_PATTERN.sub(lambda m: values.get(m.group(), m.group()), sql)
+
+
+def set_operator_statement(children: List[str], operator: str) -> str:
+    return join_fragments(
+        SPACE + operator + SPACE,
+        (LEFT_PARENTHESIS + child + RIGHT_PARENTHESIS for child in children),
     )
 
 
 def left_semi_or_anti_join_statement(
     left: str, right: str, join_type: JoinType, condition: str
 ) -> str:
-    left_alias = random_name_for_temp_object(TempObjectType.TABLE)
-    right_alias = random_name_for_temp_object(TempObjectType.TABLE)
+    left_alias = random_alias_for_temp_object(TempObjectType.TABLE)
+    right_alias = random_alias_for_temp_object(TempObjectType.TABLE)
 
     if isinstance(join_type, LeftSemi):
         where_condition = WHERE + EXISTS
@@ -506,8 +565,8 @@ def left_semi_or_anti_join_statement(
 def snowflake_supported_join_statement(
     left: str, right: str, join_type: JoinType, condition: str
 ) -> str:
-    left_alias = random_name_for_temp_object(TempObjectType.TABLE)
-    right_alias = random_name_for_temp_object(TempObjectType.TABLE)
+    left_alias = random_alias_for_temp_object(TempObjectType.TABLE)
+    right_alias = random_alias_for_temp_object(TempObjectType.TABLE)
 
     if isinstance(join_type, UsingJoin):
         join_sql = join_type.tpe.sql
@@ -611,7 +670,7 @@ def create_table_as_select_statement(
 
 def limit_statement(row_count: str, child: str, on_top_of_order_by: bool) -> str:
     return (
-        f"{child if on_top_of_order_by else project_statement([], child)}"
+        (child if on_top_of_order_by else project_statement([], child))
         + LIMIT
         + row_count
     )
@@ -63,21 +63,40 @@ class BinaryNode(LogicalPlan):
         self.children = [self.left, self.right]
 
 
-class SetOperation(BinaryNode):
-    pass
+class SetOperation(LogicalPlan):
+    sql: str
+
+    def __init__(self, children: List[LogicalPlan]):
+        super().__init__()
+        self.children = children
 
 
 class Except(SetOperation):
     sql = "EXCEPT"
 
+    def __init__(self, left: LogicalPlan, right: LogicalPlan):
+        super().__init__([left, right])
+
 
 class Intersect(SetOperation):
     sql = "INTERSECT"
 
+    def __init__(self, left: LogicalPlan, right: LogicalPlan):
+        super().__init__([left, right])
+
 
 class Union(SetOperation):
-    def __init__(self, left: LogicalPlan, right: LogicalPlan, is_all: bool):
-        super().__init__(left, right)
+    def __init__(self, children: List[LogicalPlan], is_all: bool):
+        # A chain of unions of the same kind is associative, so the children of a
+        # child union are spliced in and the chain is generated as a single set
+        # operation, instead of nesting a subquery for every union.
+        flattened = []
+        for child in children:
+            if isinstance(child, Union) and child.is_all == is_all:
+                flattened.extend(child.children)
+            else:
+                flattened.append(child)
+        super().__init__(flattened)
         self.is_all = is_all
 
     @property
@@ -0,0 +1,201 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import copy
+import hashlib
+import re
+from collections import Counter
+from logging import getLogger
+from typing import Dict, Iterable, List, Optional, Set
+
+from snowflake.snowpark._internal.analyzer.analyzer_utils import (
+    AS,
+    COMMA,
+    LEFT_PARENTHESIS,
+    RIGHT_PARENTHESIS,
+    cte_statement,
+    project_statement,
+)
+from snowflake.snowpark._internal.analyzer.sql_rope import SqlRope
+from snowflake.snowpark._internal.analyzer.snowflake_plan import SnowflakePlan
+from snowflake.snowpark._internal.utils import TEMP_OBJECT_NAME_PREFIX, TempObjectType
+
+logger = getLogger(__name__)
+
+# When a DataFrame is used more than once in a plan, e.g., in a self-join or in
+# the branches of a union, the SQL of its plan is repeated in the SQL of the plan.
+# Each repeated subplan is defined once in a WITH clause instead, and every copy
+# of it is replaced by a reference to the CTE. The SQL of a plan is a rope that
+# refers to the ropes of its children, so the copies of a subplan are found by
+# the identity of its rope rather than by searching the SQL for its text, which
+# could also match a correlated subquery that can't be defined outside of its
+# query.
+
+_QUERY_PATTERN = re.compile(r"[\s(]*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def with_common_subplans(plan: SnowflakePlan) -> SnowflakePlan:
+    """Returns a copy of ``plan`` whose last query defines its repeated subplans
+    in a WITH clause, or ``plan`` itself if no subplan is repeated. The copy is
+    cached on ``plan``, so the SQL of a plan is only rewritten once."""
+    if plan._with_common_subplans is None:
+        plan._with_common_subplans = _with_common_subplans(plan)
+    return plan._with_common_subplans
+
+
+def _with_common_subplans(plan: SnowflakePlan) -> SnowflakePlan:
+    # the bound values of every copy of a subplan are bound by position, and
+    # only a query can be wrapped in a WITH clause
+    if plan.queries[-1].params or not _is_query(plan.queries[-1].sql):
+        return plan
+    rope = plan.queries[-1].sql_rope
+    new_sql = eliminate_common_subplans(rope, _subplan_ropes(plan))
+    if new_sql is None:
+        return plan
+
+    eliminated_bytes = len(rope) - len(new_sql)
+    with plan.session._counter_lock:
+        plan.session._eliminated_sql_bytes += eliminated_bytes
+    logger.debug(f"Eliminated {eliminated_bytes} bytes of repeated subplans")
+
+    last_query = copy.copy(plan.queries[-1])
+    last_query.sql = new_sql
+    new_plan = copy.copy(plan)
+    new_plan.queries = [*plan.queries[:-1], last_query]
+    # the rewritten query can't be merged into by the plans built on it
+    new_plan.select_parts = None
+    return new_plan
+
+
+def _is_query(sql: str) -> bool:
+    # a SELECT statement, which may be parenthesized, e.g., in a set operation,
+    # or have a WITH clause
+    return _QUERY_PATTERN.match(sql) is not None
+
+
+def eliminate_common_subplans(
+    rope: SqlRope, subplans: Iterable[SqlRope]
+) -> Optional[str]:
+    """Returns the SQL of ``rope`` with the ``subplans`` that are repeated in it
+    defined in a WITH clause, or ``None`` if no subplan is worth extracting."""
+    candidates = {id(s): s for s in subplans}
+    counts = _count_subplans(rope, candidates, set())
+    # a longer subplan can contain a shorter one, but not the other way around,
+    # so the copies of the longer subplan are counted once after it's extracted
+    names: Dict[int, str] = {}
+    ctes: List[SqlRope] = []
+    for subplan in sorted(
+        (s for i, s in candidates.items() if counts[i] > 1), key=len, reverse=True
+    ):
+        extracted = {id(s) for s in ctes}
+        occurrences = sum(
+            _count_subplans(r, candidates, extracted)[id(subplan)]
+            for r in [rope, *ctes]
+        )
+        name = _cte_name(subplan)
+        saved_length = occurrences * (len(subplan) - len(project_statement([], name)))
+        definition_length = (
+            len(name)
+            + len(AS)
+            + len(LEFT_PARENTHESIS)
+            + len(subplan)
+            + len(RIGHT_PARENTHESIS)
+            + len(COMMA)
+        )
+        if saved_length <= definition_length:
+            continue
+        names[id(subplan)] = name
+        ctes.append(subplan)
+
+    if not ctes:
+        return None
+    references = {i: project_statement([], name) for i, name in names.items()}
+    # a CTE can only refer to the CTEs defined before it
+    return cte_statement(
+        [(names[id(s)], _render(s, references)) for s in ctes[::-1]],
+        _render(rope, references),
+    )
+
+
+def _subplan_ropes(plan: SnowflakePlan) -> List[SqlRope]:
+    # the resolved subplans are cached on the logical plans, and a DataFrame
+    # whose plan is used as a child has the same resolved plan every time
+    ropes = []
+    visited = set()
+    stack = [plan]
+    while stack:
+        current = stack.pop()
+        for subquery_plan in current.subquery_plans:
+            ropes.append(subquery_plan.queries[-1].sql_rope)
+            stack.append(subquery_plan)
+        if current.source_plan is None:
+            continue
+        nodes = [*current.source_plan.children]
+        while nodes:
+            node = nodes.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+            resolved = node if isinstance(node, SnowflakePlan) else node.resolved_plan
+            if resolved is not None:
+                ropes.append(resolved.queries[-1].sql_rope)
+                stack.append(resolved)
+            else:
+                nodes.extend(node.children)
+    return ropes
+
+
+def _count_subplans(
+    rope: SqlRope, subplans: Dict[int, SqlRope], extracted: Set[int]
+) -> Counter:
+    """Returns the number of copies of each of ``subplans`` in ``rope``, keyed by
+    the identity of their ropes. An ``extracted`` subplan is a reference to its
+    CTE, so the subplans in it aren't counted."""
+    # the same rope is a part of a rope many times in a self-join, so the copies
+    # in a rope are only counted once, and the rope of a deep plan is deeper than
+    # the recursion limit
+    counts: Dict[int, Counter] = {}
+    stack = [(rope, False)]
+    while stack:
+        current, parts_counted = stack.pop()
+        if id(current) in counts:
+            continue
+        nested = [
+            p
+            for p in current.parts
+            if isinstance(p, SqlRope) and id(p) not in extracted
+        ]
+        if not parts_counted:
+            stack.append((current, True))
+            stack.extend((p, False) for p in nested if id(p) not in counts)
+            continue
+        current_counts = Counter()
+        for part in current.parts:
+            if isinstance(part, SqlRope) and id(part) in subplans:
+                current_counts[id(part)] += 1
+        for part in nested:
+            current_counts.update(counts[id(part)])
+        counts[id(current)] = current_counts
+    return counts[id(rope)]
+
+
+def _render(rope: SqlRope, references: Dict[int, str]) -> str:
+    # the nested ropes in ``references`` are replaced by their references
+    leaves = []
+    stack = [rope]
+    while stack:
+        part = stack.pop()
+        if isinstance(part, str):
+            leaves.append(part)
+        elif part is not rope and id(part) in references:
+            leaves.append(references[id(part)])
+        else:
+            stack.extend(reversed(part.parts))
+    return "".join(leaves)
+
+
+def _cte_name(subplan: SqlRope) -> str:
+    # the name is a fingerprint of the SQL of the subplan, so the same SQL is
+    # generated every time
+    fingerprint = hashlib.sha256(str(subplan).encode("utf-8")).hexdigest()[:10].upper()
+    return f"{TEMP_OBJECT_NAME_PREFIX}{TempObjectType.CTE.value}_{fingerprint}"
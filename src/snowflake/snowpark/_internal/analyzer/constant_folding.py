@@ -0,0 +1,268 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import copy
+import math
+import operator
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from snowflake.snowpark._internal.analyzer.binary_expression import (
+    Add,
+    And,
+    BinaryExpression,
+    Divide,
+    EqualNullSafe,
+    EqualTo,
+    GreaterThan,
+    GreaterThanOrEqual,
+    LessThan,
+    LessThanOrEqual,
+    Multiply,
+    NotEqualTo,
+    Or,
+    Remainder,
+    Subtract,
+)
+from snowflake.snowpark._internal.analyzer.expression import Expression, Literal
+from snowflake.snowpark._internal.analyzer.unary_expression import (
+    Cast,
+    IsNotNull,
+    IsNull,
+    Not,
+    UnaryExpression,
+    UnaryMinus,
+    UnresolvedAlias,
+)
+from snowflake.snowpark.types import (
+    BooleanType,
+    ByteType,
+    DecimalType,
+    DoubleType,
+    FloatType,
+    IntegerType,
+    LongType,
+    ShortType,
+    StringType,
+)
+
+# Operators whose operands are literals are evaluated locally, so that the SQL of
+# an expression like lit(1) + lit(2) * col("a") has one literal instead of the
+# casts of both, e.g., (3 :: bigint * "A"). The result must be the same as the
+# result Snowflake computes, including its type, so only the operators whose
+# semantics are known are folded:
+# - integers, which are NUMBER(38, 0) in Snowflake, with +, - and * as long as
+#   the result fits in NUMBER(38, 0), and % with the sign of the dividend;
+# - floats, which are doubles in Snowflake and in Python, and integers mixed with
+#   floats, as long as the operands and the result are finite;
+# - comparisons of numbers, of strings, which are compared by code points, and of
+#   booleans, and the boolean operators, with three-valued logic;
+# - IS [NOT] NULL of any literal.
+# A cast is removed if its operand is a literal of the same type whose SQL
+# already casts it, or if it casts the result of a cast to the same type again.
+
+_INTEGRAL_TYPES = (ByteType, ShortType, IntegerType, LongType)
+_FLOATING_TYPES = (FloatType, DoubleType)
+_MAX_NUMBER = 10**38
+
+
+def _remainder(left: Any, right: Any) -> Any:
+    # the remainder has the sign of the dividend, as in C
+    if isinstance(left, float) or isinstance(right, float):
+        return math.fmod(left, right)
+    remainder = abs(left) % abs(right)
+    return -remainder if left < 0 else remainder
+
+
+_ARITHMETIC_OPERATORS: Dict[Type[BinaryExpression], Callable[[Any, Any], Any]] = {
+    Add: operator.add,
+    Subtract: operator.sub,
+    Multiply: operator.mul,
+    Divide: operator.truediv,
+    Remainder: _remainder,
+}
+
+_COMPARISON_OPERATORS: Dict[Type[BinaryExpression], Callable[[Any, Any], bool]] = {
+    EqualTo: operator.eq,
+    NotEqualTo: operator.ne,
+    GreaterThan: operator.gt,
+    LessThan: operator.lt,
+    GreaterThanOrEqual: operator.ge,
+    LessThanOrEqual: operator.le,
+}
+
+
+def fold_constants(expr: Expression) -> Expression:
+    """Returns ``expr`` with its operators whose operands are literals replaced by
+    their results, or ``expr`` itself if none of them can be folded. The operands
+    of other expressions, e.g., the arguments of a function, are folded when they
+    are analyzed."""
+    # a chain of operators can be deeper than the recursion limit
+    folded: Dict[int, Expression] = {}
+    stack = [(expr, False)]
+    while stack:
+        current, children_visited = stack.pop()
+        # the SQL of an unaliased expression is the name of its column
+        if not isinstance(current, (UnaryExpression, BinaryExpression)) or isinstance(
+            current, UnresolvedAlias
+        ):
+            folded[id(current)] = current
+        elif not children_visited:
+            stack.append((current, True))
+            stack.extend((c, False) for c in current.children)
+        else:
+            children = [folded[id(c)] for c in current.children]
+            folded[id(current)] = _fold(current, children)
+    return folded[id(expr)]
+
+
+def _fold(expr: Expression, children: List[Expression]) -> Expression:
+    if isinstance(expr, BinaryExpression):
+        left, right = children
+        result = None
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            result = _fold_binary(expr, left, right)
+        if result is not None:
+            return result
+        if left is expr.left and right is expr.right:
+            return expr
+        return type(expr)(left, right)
+
+    (child,) = children
+    if isinstance(expr, Cast):
+        if (
+            isinstance(child, Literal)
+            and child.datatype == expr.to
+            and _is_cast_in_sql(child)
+        ) or (isinstance(child, Cast) and child.to == expr.to):
+            return child
+    elif isinstance(child, Literal):
+        result = _fold_unary(expr, child)
+        if result is not None:
+            return result
+    if child is expr.child:
+        return expr
+    new_expr = copy.copy(expr)
+    new_expr.child = child
+    new_expr.children = [child]
+    return new_expr
+
+
+def _is_cast_in_sql(literal: Literal) -> bool:
+    # whether the SQL of the literal is cast to the type of the literal
+    value, datatype = literal.value, literal.datatype
+    if isinstance(datatype, DecimalType):
+        return isinstance(value, Decimal)
+    if isinstance(datatype, FloatType):
+        return value is None or isinstance(value, float)
+    if isinstance(datatype, BooleanType):
+        return value is None or isinstance(value, bool)
+    return _numeric_kind(literal) is not None
+
+
+def _fold_unary(expr: Expression, child: Literal) -> Optional[Literal]:
+    if isinstance(expr, IsNull):
+        return Literal(child.value is None, BooleanType())
+    if isinstance(expr, IsNotNull):
+        return Literal(child.value is not None, BooleanType())
+    if isinstance(expr, Not) and isinstance(child.datatype, BooleanType):
+        return Literal(None if child.value is None else not child.value, BooleanType())
+    if isinstance(expr, UnaryMinus):
+        kind = _numeric_kind(child)
+        if kind is not None:
+            return _number(None if child.value is None else -child.value, kind)
+    return None
+
+
+def _fold_binary(
+    expr: BinaryExpression, left: Literal, right: Literal
+) -> Optional[Literal]:
+    if isinstance(expr, (And, Or)):
+        if not isinstance(left.datatype, BooleanType) or not isinstance(
+            right.datatype, BooleanType
+        ):
+            return None
+        return Literal(_logical(expr, left.value, right.value), BooleanType())
+
+    if isinstance(expr, EqualNullSafe):
+        if _comparable(left, right):
+            left_value, right_value = _comparison_operands(left, right)
+            return Literal(left_value == right_value, BooleanType())
+        return None
+
+    compare = _COMPARISON_OPERATORS.get(type(expr))
+    if compare is not None:
+        if not _comparable(left, right):
+            return None
+        if left.value is None or right.value is None:
+            return Literal(None, BooleanType())
+        return Literal(compare(*_comparison_operands(left, right)), BooleanType())
+
+    evaluate = _ARITHMETIC_OPERATORS.get(type(expr))
+    left_kind, right_kind = _numeric_kind(left), _numeric_kind(right)
+    if evaluate is None or left_kind is None or right_kind is None:
+        return None
+    kind = float if float in (left_kind, right_kind) else int
+    # the quotient of integers is a decimal whose scale depends on the operands
+    if isinstance(expr, Divide) and kind is int:
+        return None
+    if left.value is None or right.value is None:
+        return _number(None, kind)
+    if isinstance(expr, (Divide, Remainder)) and right.value == 0:
+        # Snowflake raises an error, which is kept
+        return None
+    return _number(evaluate(left.value, right.value), kind)
+
+
+def _logical(expr: BinaryExpression, left: Optional[bool], right: Optional[bool]):
+    if isinstance(expr, And):
+        if left is False or right is False:
+            return False
+        return None if left is None or right is None else True
+    if left is True or right is True:
+        return True
+    return None if left is None or right is None else False
+
+
+def _comparable(left: Literal, right: Literal) -> bool:
+    left_kind, right_kind = _numeric_kind(left), _numeric_kind(right)
+    if left_kind is not None and right_kind is not None:
+        return True
+    return any(
+        isinstance(left.datatype, t) and isinstance(right.datatype, t)
+        for t in (StringType, BooleanType)
+    )
+
+
+def _comparison_operands(left: Literal, right: Literal) -> Tuple[Any, Any]:
+    # an integer is compared with a float as a float
+    if float in (_numeric_kind(left), _numeric_kind(right)):
+        return (
+            None if left.value is None else float(left.value),
+            None if right.value is None else float(right.value),
+        )
+    return left.value, right.value
+
+
+def _numeric_kind(literal: Literal) -> Optional[type]:
+    # NaN is equal to itself and greater than any other number in Snowflake
+    value = literal.value
+    if isinstance(literal.datatype, _INTEGRAL_TYPES) and (
+        value is None or (isinstance(value, int) and not isinstance(value, bool))
+    ):
+        return int
+    if isinstance(literal.datatype, _FLOATING_TYPES) and (
+        value is None or (isinstance(value, (int, float)) and math.isfinite(value))
+    ):
+        return float
+    return None
+
+
+def _number(value: Any, kind: type) -> Optional[Literal]:
+    if kind is int:
+        if value is not None and abs(value) >= _MAX_NUMBER:
+            return None
+        return Literal(value, LongType())
+    if value is not None and not math.isfinite(value):
+        return None
+    return Literal(None if value is None else float(value), DoubleType())
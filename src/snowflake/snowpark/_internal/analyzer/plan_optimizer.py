@@ -0,0 +1,380 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from snowflake.snowpark._internal.analyzer.analyzer_utils import quote_name
+from snowflake.snowpark._internal.analyzer.binary_expression import (
+    And,
+    BinaryExpression,
+)
+from snowflake.snowpark._internal.analyzer.binary_plan_node import (
+    InnerLike,
+    Join,
+    LeftAnti,
+    LeftOuter,
+    LeftSemi,
+    RightOuter,
+)
+from snowflake.snowpark._internal.analyzer.expression import (
+    Attribute,
+    CaseWhen,
+    Collate,
+    Expression,
+    FunctionExpression,
+    InExpression,
+    Like,
+    Literal,
+    MultipleExpression,
+    RegExp,
+    SnowflakeUDF,
+    Star,
+    SubfieldInt,
+    SubfieldString,
+    UnresolvedAttribute,
+)
+from snowflake.snowpark._internal.analyzer.snowflake_plan import SnowflakePlan
+from snowflake.snowpark._internal.analyzer.snowflake_plan_node import LogicalPlan
+from snowflake.snowpark._internal.analyzer.unary_expression import (
+    Alias,
+    UnaryExpression,
+    UnresolvedAlias,
+)
+from snowflake.snowpark._internal.analyzer.unary_plan_node import Filter, Project
+
+# Rules that rewrite a logical plan into an equivalent plan whose SQL is smaller:
+# a filter is pushed below the projections and into the sides of a join that it
+# only refers to the columns of, where it can be merged into the SELECT that
+# reads the data, and the columns of a projection that the projection on top of
+# it doesn't use are pruned.
+#
+# Whether two references name the same column depends on the alias maps of the
+# resolved children of a plan, so the rules are applied while a plan is being
+# resolved, when its children are resolved. A rule is only applied when every
+# column a moved expression refers to is known to be the same column at its new
+# position, and every expression it is moved past is known to be evaluated per
+# row; otherwise the plan is left unchanged.
+
+ResolvedPlanLookup = Callable[[LogicalPlan], Optional[SnowflakePlan]]
+
+# sql text, e.g., from functions.sql_expr(), can refer to any column
+_COLUMN_NAME_PATTERN = re.compile(r'^"(?:[^"]|"")+"$')
+
+# functions whose result depends on the other rows in the query
+_ROW_DEPENDENT_FUNCTIONS = {"seq1", "seq2", "seq4", "seq8"}
+
+
+def optimize(plan: LogicalPlan, resolved: ResolvedPlanLookup) -> LogicalPlan:
+    """Returns an optimized plan that is equivalent to ``plan``, or ``plan`` itself
+    if no rule applies to it. The children of ``plan`` must be resolved, and the
+    new plans in the returned plan are unresolved."""
+    if isinstance(plan, Filter):
+        return _push_down_filter(plan, resolved) or plan
+    if isinstance(plan, Project) and isinstance(plan.child, Project):
+        return _prune_projection(plan, resolved) or plan
+    return plan
+
+
+def _push_down_filter(
+    plan: Filter, resolved: ResolvedPlanLookup
+) -> Optional[LogicalPlan]:
+    projects = []
+    child = plan.child
+    while isinstance(child, Project) and _can_push_below_project(
+        plan.condition, child, resolved
+    ):
+        projects.append(child)
+        child = child.child
+
+    new_child = (
+        _push_into_join(plan.condition, child, resolved)
+        if isinstance(child, Join)
+        else None
+    )
+    if new_child is None:
+        if not projects:
+            return None
+        new_child = Filter(plan.condition, child)
+    for project in reversed(projects):
+        new_child = Project(project.project_list, new_child)
+    return new_child
+
+
+def _can_push_below_project(
+    condition: Expression, project: Project, resolved: ResolvedPlanLookup
+) -> bool:
+    project_plan, child_plan = resolved(project), resolved(project.child)
+    references = _column_references(condition)
+    # a filter that refers to no column, e.g., lit(False), would filter the rows
+    # of an aggregation instead of its result
+    if not references or project_plan is None or child_plan is None:
+        return False
+    outputs = _project_outputs(project, child_plan)
+    if outputs is None:
+        return False
+    for reference in references:
+        sources = outputs.get(_column_name(reference, project_plan.expr_to_alias))
+        if (
+            sources is None
+            or len(sources) != 1
+            or sources[0] != _column_name(reference, child_plan.expr_to_alias)
+        ):
+            return False
+    return True
+
+
+def _push_into_join(
+    condition: Expression, join: Join, resolved: ResolvedPlanLookup
+) -> Optional[LogicalPlan]:
+    join_plan, left_plan, right_plan = (
+        resolved(join),
+        resolved(join.left),
+        resolved(join.right),
+    )
+    if join_plan is None or left_plan is None or right_plan is None:
+        return None
+    left_attributes = left_plan.known_attributes
+    right_attributes = right_plan.known_attributes
+    if left_attributes is None or right_attributes is None:
+        return None
+    left_names = {a.name for a in left_attributes}
+    right_names = {a.name for a in right_attributes}
+
+    # the rows of the side that a join keeps unmatched rows of can't be filtered
+    # before the join. Using and natural joins merge the join columns, so a
+    # filter isn't pushed into them.
+    join_type = join.join_type
+    if isinstance(join_type, InnerLike):
+        sides = (True, True)
+    elif isinstance(join_type, (LeftOuter, LeftSemi, LeftAnti)):
+        sides = (True, False)
+    elif isinstance(join_type, RightOuter):
+        sides = (False, True)
+    else:
+        return None
+
+    left_conditions, right_conditions, remaining = [], [], []
+    for conjunct in _conjuncts(condition):
+        references = _column_references(conjunct)
+        if (
+            references
+            and sides[0]
+            and _refers_to_side(
+                references, join_plan, left_plan, left_names, right_names
+            )
+        ):
+            left_conditions.append(conjunct)
+        elif (
+            references
+            and sides[1]
+            and _refers_to_side(
+                references, join_plan, right_plan, right_names, left_names
+            )
+        ):
+            right_conditions.append(conjunct)
+        else:
+            remaining.append(conjunct)
+    if not left_conditions and not right_conditions:
+        return None
+
+    new_left, new_right = join.left, join.right
+    if left_conditions:
+        new_left = optimize(Filter(_conjunction(left_conditions), join.left), resolved)
+    if right_conditions:
+        new_right = optimize(
+            Filter(_conjunction(right_conditions), join.right), resolved
+        )
+    new_join = Join(new_left, new_right, join.join_type, join.condition)
+    return Filter(_conjunction(remaining), new_join) if remaining else new_join
+
+
+def _refers_to_side(
+    references: List[Expression],
+    join_plan: SnowflakePlan,
+    side_plan: SnowflakePlan,
+    side_names: Set[str],
+    other_names: Set[str],
+) -> bool:
+    for reference in references:
+        name = _column_name(reference, join_plan.expr_to_alias)
+        if (
+            name not in side_names
+            or name in other_names
+            or name != _column_name(reference, side_plan.expr_to_alias)
+        ):
+            return False
+    return True
+
+
+def _prune_projection(
+    plan: Project, resolved: ResolvedPlanLookup
+) -> Optional[LogicalPlan]:
+    child = plan.child
+    child_plan, grandchild_plan = resolved(child), resolved(child.child)
+    if child_plan is None or grandchild_plan is None:
+        return None
+    used_names = set()
+    for expr in plan.project_list:
+        references = _column_references(expr)
+        if references is None:
+            return None
+        used_names.update(_column_name(r, child_plan.expr_to_alias) for r in references)
+
+    if any(isinstance(e, Star) for e in child.project_list):
+        return None
+    kept, unused = [], []
+    for expr in child.project_list:
+        name = _output_name(expr, grandchild_plan.expr_to_alias)
+        # a column that is named by Snowflake can't be known to be unused
+        if name is None or name in used_names:
+            kept.append(expr)
+        else:
+            unused.append(expr)
+    # a projection that passes a column through can't be an aggregation, so any
+    # other column can be removed from it. Otherwise, only the columns without
+    # function calls are removed, because removing the aggregate functions of a
+    # projection would change its number of rows.
+    if not any(_is_passthrough(e) for e in kept):
+        kept.extend(e for e in unused if _calls_function(e))
+    project_list = [e for e in child.project_list if any(e is k for k in kept)]
+    if len(project_list) == len(child.project_list):
+        return None
+    if not project_list:
+        project_list = child.project_list[:1]
+    return Project(plan.project_list, Project(project_list, child.child))
+
+
+def _project_outputs(
+    project: Project, child_plan: SnowflakePlan
+) -> Optional[Dict[str, List[Optional[str]]]]:
+    """Returns the names of the output columns of ``project``, mapped to the names
+    of the columns of its child that they pass through, or to ``None`` for a
+    computed column. Returns ``None`` if a column isn't known to be computed per
+    row, or if its name is generated by Snowflake."""
+    alias_map = child_plan.expr_to_alias
+    outputs: Dict[str, List[Optional[str]]] = {}
+    for expr in project.project_list:
+        columns: List[Tuple[str, Optional[str]]] = []
+        if isinstance(expr, Star):
+            if expr.expressions:
+                names = [_column_name(e, alias_map) for e in expr.expressions]
+            elif child_plan.known_attributes is not None:
+                names = [a.name for a in child_plan.known_attributes]
+            else:
+                return None
+            columns = [(n, n) for n in names]
+        else:
+            name = _output_name(expr, alias_map)
+            if name is None or _column_references(expr) is None:
+                return None
+            child = expr.child if isinstance(expr, (Alias, UnresolvedAlias)) else expr
+            source = (
+                _column_name(child, alias_map)
+                if isinstance(child, (Attribute, UnresolvedAttribute))
+                else None
+            )
+            columns = [(name, source)]
+        for name, source in columns:
+            outputs.setdefault(name, []).append(source)
+    return outputs
+
+
+def _is_passthrough(expr: Expression) -> bool:
+    if isinstance(expr, (Alias, UnresolvedAlias)):
+        expr = expr.child
+    return isinstance(expr, (Attribute, UnresolvedAttribute))
+
+
+def _output_name(expr: Expression, alias_map: Dict) -> Optional[str]:
+    if isinstance(expr, Alias):
+        return quote_name(expr.name)
+    if isinstance(expr, UnresolvedAlias):
+        expr = expr.child
+    if isinstance(expr, (Attribute, UnresolvedAttribute)):
+        return _column_name(expr, alias_map)
+    return None
+
+
+def _column_name(expr: Expression, alias_map: Dict) -> str:
+    # the same as the SQL of the reference generated by the analyzer
+    if isinstance(expr, Attribute):
+        return quote_name(alias_map.get(expr.expr_id, expr.name))
+    return expr.name
+
+
+def _column_references(expr: Expression) -> Optional[List[Expression]]:
+    """Returns the column references in ``expr``, or ``None`` if it contains an
+    expression whose references aren't known or that isn't computed per row."""
+    references = []
+    stack = [expr]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, (Attribute, UnresolvedAttribute)):
+            if isinstance(
+                current, UnresolvedAttribute
+            ) and not _COLUMN_NAME_PATTERN.match(current.name):
+                return None
+            references.append(current)
+            continue
+        operands = _operands(current)
+        if operands is None:
+            return None
+        stack.extend(operands)
+    return references
+
+
+def _calls_function(expr: Expression) -> bool:
+    stack = [expr]
+    while stack:
+        current = stack.pop()
+        operands = _operands(current)
+        if operands is None or isinstance(current, (FunctionExpression, SnowflakeUDF)):
+            return True
+        stack.extend(operands)
+    return False
+
+
+def _operands(expr: Expression) -> Optional[List[Expression]]:
+    # returns None for an expression that isn't known to be computed per row
+    if isinstance(expr, (Attribute, UnresolvedAttribute, Literal)):
+        return []
+    if isinstance(expr, FunctionExpression):
+        if expr.name.lower() in _ROW_DEPENDENT_FUNCTIONS:
+            return None
+        return list(expr.children)
+    if isinstance(expr, (BinaryExpression, UnaryExpression, SnowflakeUDF)):
+        return list(expr.children)
+    if isinstance(expr, InExpression):
+        return [expr.columns, *expr.values]
+    if isinstance(expr, MultipleExpression):
+        return list(expr.expressions)
+    if isinstance(expr, CaseWhen):
+        operands = [e for branch in expr.branches for e in branch]
+        if expr.else_value is not None:
+            operands.append(expr.else_value)
+        return operands
+    if isinstance(expr, (Like, RegExp)):
+        return [expr.expr, expr.pattern]
+    if isinstance(expr, (Collate, SubfieldString, SubfieldInt)):
+        return [expr.expr]
+    return None
+
+
+def _conjuncts(condition: Expression) -> List[Expression]:
+    conjuncts = []
+    stack = [condition]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, And):
+            stack.extend((current.right, current.left))
+        else:
+            conjuncts.append(current)
+    return conjuncts
+
+
+def _conjunction(conditions: List[Expression]) -> Expression:
+    result = conditions[0]
+    for condition in conditions[1:]:
+        result = And(result, condition)
+    return result
@@ -0,0 +1,404 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from snowflake.snowpark._internal.analyzer.analyzer_utils import quote_name
+from snowflake.snowpark._internal.analyzer.binary_expression import (
+    And,
+    BinaryExpression,
+    EqualNullSafe,
+    EqualTo,
+    GreaterThan,
+    GreaterThanOrEqual,
+    LessThan,
+    LessThanOrEqual,
+    NotEqualTo,
+    Or,
+)
+from snowflake.snowpark._internal.analyzer.binary_plan_node import (
+    Except,
+    FullOuter,
+    InnerLike,
+    Intersect,
+    Join,
+    JoinType,
+    LeftAnti,
+    LeftOuter,
+    LeftSemi,
+    NaturalJoin,
+    RightOuter,
+    SetOperation,
+    Union,
+    UsingJoin,
+)
+from snowflake.snowpark._internal.analyzer.expression import (
+    Attribute,
+    CaseWhen,
+    Expression,
+    FunctionExpression,
+    Literal,
+    SnowflakeUDF,
+    Star,
+    UnresolvedAttribute,
+)
+from snowflake.snowpark._internal.analyzer.snowflake_plan import ProjectedColumn
+from snowflake.snowpark._internal.analyzer.snowflake_plan_node import (
+    Limit,
+    LogicalPlan,
+)
+from snowflake.snowpark._internal.analyzer.sort_expression import SortOrder
+from snowflake.snowpark._internal.analyzer.unary_expression import (
+    Alias,
+    Cast,
+    IsNotNull,
+    IsNull,
+    Not,
+    UnaryExpression,
+    UnresolvedAlias,
+)
+from snowflake.snowpark._internal.analyzer.unary_plan_node import (
+    Aggregate,
+    Filter,
+    Project,
+    Sample,
+    Sort,
+)
+from snowflake.snowpark.types import (
+    ArrayType,
+    BinaryType,
+    BooleanType,
+    ByteType,
+    DataType,
+    DateType,
+    DecimalType,
+    DoubleType,
+    FloatType,
+    IntegerType,
+    LongType,
+    MapType,
+    ShortType,
+    StringType,
+    TimestampType,
+    TimeType,
+    VariantType,
+)
+
+# The output attributes of a plan are derived from the attributes of its children
+# when every expression in it can be typed locally, so the schema query of the plan
+# doesn't need to be described. The derived attributes must be the same as the ones
+# a describe call would return, so only the expressions whose result type is fixed
+# in Snowflake are typed. Columns that are passed through keep their nullability,
+# non-null literals and counts are not nullable, and any other expression is
+# regarded as nullable.
+
+_PREDICATES = (
+    EqualTo,
+    NotEqualTo,
+    GreaterThan,
+    LessThan,
+    GreaterThanOrEqual,
+    LessThanOrEqual,
+    EqualNullSafe,
+    And,
+    Or,
+)
+# the functions whose result depends on the rows that are read before the row
+# they're evaluated on
+_ROW_DEPENDENT_FUNCTIONS = {"seq1", "seq2", "seq4", "seq8"}
+
+
+def infer_attributes(
+    plan: LogicalPlan,
+    children_attributes: Dict[LogicalPlan, Optional[List[Attribute]]],
+    alias_map: Dict[uuid.UUID, str],
+) -> Optional[List[Attribute]]:
+    """Returns the output attributes of ``plan``, or ``None`` if they can't be
+    derived from ``children_attributes``, which are the known attributes of the
+    children of ``plan``."""
+    if any(attributes is None for attributes in children_attributes.values()):
+        return None
+
+    if isinstance(plan, (Filter, Sort, Limit, Sample)):
+        return children_attributes[plan.child]
+
+    if isinstance(plan, Project):
+        return _infer_projection(
+            plan.project_list, children_attributes[plan.child], alias_map
+        )
+
+    if isinstance(plan, Aggregate):
+        columns = _columns_by_name(children_attributes[plan.child])
+        if not all(
+            _infer_column(e, columns, alias_map) for e in plan.grouping_expressions
+        ):
+            return None
+        return _infer_projection(
+            plan.aggregate_expressions, children_attributes[plan.child], alias_map
+        )
+
+    if isinstance(plan, Join):
+        return _infer_join(
+            plan.join_type,
+            children_attributes[plan.left],
+            children_attributes[plan.right],
+        )
+
+    if isinstance(plan, SetOperation):
+        children = [children_attributes[c] for c in plan.children]
+        first = children[0]
+        if any(
+            len(c) != len(first)
+            or any(a.datatype != f.datatype for a, f in zip(c, first))
+            for c in children[1:]
+        ):
+            return None
+        if isinstance(plan, Union):
+            nullable = [any(a.nullable for a in column) for column in zip(*children)]
+        elif isinstance(plan, Intersect):
+            nullable = [all(a.nullable for a in column) for column in zip(*children)]
+        elif isinstance(plan, Except):
+            nullable = [a.nullable for a in first]
+        else:
+            return None
+        return [Attribute(a.name, a.datatype, n) for a, n in zip(first, nullable)]
+
+    return None
+
+
+def referenced_columns(
+    exprs: Iterable[Expression], alias_map: Dict[uuid.UUID, str]
+) -> Optional[Set[str]]:
+    """Returns the names of the columns that ``exprs`` refer to, or ``None`` if
+    they can't be determined locally. Window functions and sequences, e.g.,
+    ``seq8()``, are regarded as unknown, because their values depend on the other
+    rows that are read."""
+    columns = set()
+    # the expressions of a long chain of predicates are walked without recursion
+    stack = list(exprs)
+    while stack:
+        expr = stack.pop()
+        if isinstance(expr, (Attribute, UnresolvedAttribute)):
+            columns.add(_column_name(expr, alias_map))
+        elif isinstance(expr, CaseWhen):
+            stack.extend(e for branch in expr.branches for e in branch)
+            if expr.else_value is not None:
+                stack.append(expr.else_value)
+        elif isinstance(expr, FunctionExpression):
+            if expr.name.lower() in _ROW_DEPENDENT_FUNCTIONS:
+                return None
+            stack.extend(expr.children)
+        elif isinstance(
+            expr, (UnaryExpression, BinaryExpression, SortOrder, SnowflakeUDF)
+        ):
+            stack.extend(expr.children)
+        elif not isinstance(expr, Literal):
+            return None
+    return columns
+
+
+def projected_columns(
+    project_list: List[Expression], alias_map: Dict[uuid.UUID, str]
+) -> List[ProjectedColumn]:
+    """Describes the expressions of ``project_list``, so the projection can be
+    merged with the clauses on top of it."""
+    columns = []
+    for e in project_list:
+        child = e.child if isinstance(e, (Alias, UnresolvedAlias)) else e
+        references = referenced_columns([child], alias_map)
+        name = quote_name(e.name) if isinstance(e, Alias) else None
+        if isinstance(child, (Attribute, UnresolvedAttribute)):
+            column = _column_name(child, alias_map)
+            if name is None or name == column:
+                columns.append(ProjectedColumn(column, column, references))
+                continue
+        columns.append(ProjectedColumn(name, None, references))
+    return columns
+
+
+def _infer_join(
+    join_type: JoinType, left: List[Attribute], right: List[Attribute]
+) -> Optional[List[Attribute]]:
+    join_columns = []
+    if isinstance(join_type, (UsingJoin, NaturalJoin)):
+        # the output has one copy of each join column, followed by the other
+        # columns of the left side and then the right side
+        left_columns = _columns_by_name(left)
+        right_columns = _columns_by_name(right)
+        if isinstance(join_type, UsingJoin):
+            join_names = [quote_name(c) for c in join_type.using_columns]
+        else:
+            join_names = [a.name for a in left if a.name in right_columns]
+        for name in join_names:
+            l, r = left_columns.get(name), right_columns.get(name)
+            if l is None or r is None or l.datatype != r.datatype:
+                return None
+            if isinstance(join_type.tpe, RightOuter):
+                join_columns.append(Attribute(name, r.datatype, r.nullable))
+            elif isinstance(join_type.tpe, FullOuter):
+                join_columns.append(Attribute(name, l.datatype, True))
+            else:
+                join_columns.append(l)
+        left = [a for a in left if a.name not in join_names]
+        right = [a for a in right if a.name not in join_names]
+        join_type = join_type.tpe
+
+    if isinstance(join_type, (LeftSemi, LeftAnti)):
+        return left
+    if isinstance(join_type, InnerLike):
+        output = join_columns + left + right
+    elif isinstance(join_type, LeftOuter):
+        output = join_columns + left + _to_nullable(right)
+    elif isinstance(join_type, RightOuter):
+        output = join_columns + _to_nullable(left) + right
+    elif isinstance(join_type, FullOuter):
+        output = join_columns + _to_nullable(left) + _to_nullable(right)
+    else:
+        return None
+    if len({a.name for a in output}) != len(output):
+        return None
+    return output
+
+
+def _infer_projection(
+    project_list: List[Expression],
+    child_attributes: List[Attribute],
+    alias_map: Dict[uuid.UUID, str],
+) -> Optional[List[Attribute]]:
+    columns = _columns_by_name(child_attributes)
+    output = []
+    for e in project_list:
+        if isinstance(e, Star):
+            if not e.expressions:
+                output.extend(child_attributes)
+                continue
+            attributes = [_infer_column(c, columns, alias_map) for c in e.expressions]
+        elif isinstance(e, Alias):
+            inferred = _infer_expression(e.child, columns, alias_map)
+            attributes = [
+                Attribute(quote_name(e.name), *inferred) if inferred else None
+            ]
+        elif isinstance(e, UnresolvedAlias):
+            # the name of an unaliased expression is generated by Snowflake,
+            # so only a column reference can be named locally
+            attributes = [_infer_column(e.child, columns, alias_map)]
+        else:
+            attributes = [_infer_column(e, columns, alias_map)]
+        if any(a is None for a in attributes):
+            return None
+        output.extend(attributes)
+    return output
+
+
+def _columns_by_name(
+    attributes: List[Attribute],
+) -> Dict[str, Optional[Attribute]]:
+    # an ambiguous name is mapped to None
+    columns = {}
+    for a in attributes:
+        columns[a.name] = None if a.name in columns else a
+    return columns
+
+
+def _infer_column(
+    expr: Expression,
+    columns: Dict[str, Optional[Attribute]],
+    alias_map: Dict[uuid.UUID, str],
+) -> Optional[Attribute]:
+    if isinstance(expr, (Attribute, UnresolvedAttribute)):
+        return columns.get(_column_name(expr, alias_map))
+    return None
+
+
+def _column_name(expr: Expression, alias_map: Dict[uuid.UUID, str]) -> str:
+    # expr is an Attribute or an UnresolvedAttribute
+    if isinstance(expr, Attribute):
+        return quote_name(alias_map.get(expr.expr_id, expr.name))
+    return expr.name
+
+
+def _infer_expression(
+    expr: Expression,
+    columns: Dict[str, Optional[Attribute]],
+    alias_map: Dict[uuid.UUID, str],
+) -> Optional[Tuple[DataType, bool]]:
+    """Returns the data type and nullability of ``expr``."""
+    if isinstance(expr, (Attribute, UnresolvedAttribute)):
+        column = _infer_column(expr, columns, alias_map)
+        return (column.datatype, column.nullable) if column else None
+
+    if isinstance(expr, Literal):
+        datatype = _to_described_type(expr.datatype)
+        if expr.value is None or datatype is None:
+            return None
+        # describe reports a non-null literal as NOT NULL
+        return datatype, False
+
+    if isinstance(expr, FunctionExpression):
+        name = expr.name.lower()
+        # count() is never null, and describe reports it as NOT NULL
+        if name == "count" and all(isinstance(c, Star) for c in expr.children):
+            return LongType(), False
+        children = [_infer_expression(c, columns, alias_map) for c in expr.children]
+        if any(c is None for c in children):
+            return None
+        if name == "count":
+            return LongType(), False
+        if name in ("min", "max") and len(children) == 1:
+            return children[0][0], True
+        return None
+
+    if isinstance(expr, (Cast, Not, IsNull, IsNotNull, *_PREDICATES)):
+        # the operands are typed too, so that a reference to an unknown column
+        # is still reported by describing the plan. A chain of predicates can be
+        # very deep, so it is walked with an explicit stack.
+        operands = list(expr.children)
+        while operands:
+            operand = operands.pop()
+            if isinstance(operand, (Not, IsNull, IsNotNull, *_PREDICATES)):
+                operands.extend(operand.children)
+            elif _infer_expression(operand, columns, alias_map) is None:
+                return None
+        if isinstance(expr, Cast):
+            datatype = _to_described_type(expr.to)
+            return (datatype, True) if datatype else None
+        return BooleanType(), True
+
+    return None
+
+
+def _to_described_type(datatype: DataType) -> Optional[DataType]:
+    """Returns the data type that describing a column of ``datatype`` returns."""
+    if isinstance(datatype, (ByteType, ShortType, IntegerType, LongType)):
+        return LongType()
+    if isinstance(datatype, DecimalType):
+        return (
+            LongType()
+            if datatype.scale == 0
+            else DecimalType(datatype.precision, datatype.scale)
+        )
+    if isinstance(datatype, (FloatType, DoubleType)):
+        return DoubleType()
+    if isinstance(datatype, ArrayType):
+        return ArrayType(StringType())
+    if isinstance(datatype, MapType):
+        return MapType(StringType(), StringType())
+    if isinstance(
+        datatype,
+        (
+            StringType,
+            BooleanType,
+            BinaryType,
+            DateType,
+            TimeType,
+            TimestampType,
+            VariantType,
+        ),
+    ):
+        return type(datatype)()
+    return None
+
+
+def _to_nullable(attributes: List[Attribute]) -> List[Attribute]:
+    return [Attribute(a.name, a.datatype, True) for a in attributes]
@@ -1,7 +1,7 @@
 #
 # Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
 #
-from typing import List
+from typing import Any, List, Optional, Sequence
 
 import snowflake.snowpark
 from snowflake.connector.constants import FIELD_ID_TO_NAME
@@ -56,7 +56,9 @@ def get_attributes() -> List[Attribute]:
 
 
 def analyze_attributes(
-    sql: str, session: "snowflake.snowpark.session.Session"
+    sql: str,
+    session: "snowflake.snowpark.session.Session",
+    params: Optional[Sequence[Any]] = None,
 ) -> List[Attribute]:
     lowercase = sql.strip().lower()
 
@@ -75,10 +77,10 @@ def analyze_attributes(
     if lowercase.startswith("get"):
         return get_attributes()
     if lowercase.startswith("describe"):
-        session._run_query(sql)
-        return convert_result_meta_to_attribute(session._conn._cursor.description)
+        result = session._conn.run_query(sql, params=params)
+        return convert_result_meta_to_attribute(result["description"])
 
-    return session._get_result_attributes(sql)
+    return session._get_result_attributes(sql, params)
 
 
 def convert_result_meta_to_attribute(meta: List[ResultMetadata]) -> List[Attribute]:
@@ -2,16 +2,31 @@
 #
 # Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
 #
+import copy
 import re
 import sys
 import uuid
-from functools import cached_property, reduce
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import Counter
+from functools import cached_property
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 import snowflake.connector
 import snowflake.snowpark
 from snowflake.snowpark._internal.analyzer.analyzer_utils import (
+    QUERY_ID_PLACE_HOLDER_PREFIX,
     aggregate_statement,
+    and_condition,
     attribute_to_schema_string,
     batch_insert_into_statement,
     copy_into_location,
@@ -25,7 +40,7 @@ from snowflake.snowpark._internal.analyzer.analyzer_utils import (
     drop_file_format_if_exists_statement,
     drop_table_if_exists_statement,
     file_operation_statement,
-    filter_statement,
+    fill_slots,
     insert_into_statement,
     join_statement,
     join_table_function_statement,
@@ -40,8 +55,9 @@ from snowflake.snowpark._internal.analyzer.analyzer_utils import (
     schema_cast_seq,
     schema_value_statement,
     select_from_path_with_format_statement,
+    select_statement,
     set_operator_statement,
-    sort_statement,
+    subquery_slot,
     table_function_statement,
     unpivot_statement,
     update_statement,
@@ -56,6 +72,7 @@ from snowflake.snowpark._internal.analyzer.snowflake_plan_node import (
     LogicalPlan,
     SaveMode,
 )
+from snowflake.snowpark._internal.analyzer.sql_rope import SqlRope
 from snowflake.snowpark._internal.error_message import SnowparkClientExceptionMessages
 from snowflake.snowpark._internal.utils import (
     COPY_OPTIONS,
@@ -63,6 +80,7 @@ from snowflake.snowpark._internal.utils import (
     TempObjectType,
     generate_random_alphanumeric,
     random_name_for_temp_object,
+    stable_hash,
 )
 from snowflake.snowpark.row import Row
 from snowflake.snowpark.types import StructType
@@ -153,53 +171,145 @@ class SnowflakePlan(LogicalPlan):
     def __init__(
         self,
         queries: List["Query"],
-        schema_query: str,
+        schema_query: Union[str, SqlRope],
         post_actions: Optional[List["Query"]] = None,
         expr_to_alias: Optional[Dict[uuid.UUID, str]] = None,
         session: Optional["snowflake.snowpark.session.Session"] = None,
         source_plan: Optional[LogicalPlan] = None,
         is_ddl_on_temp_object: bool = False,
+        select_parts: Optional["SelectStatementParts"] = None,
+        inferred_attributes: Optional[List[Attribute]] = None,
+        subquery_plans: Optional[List["SnowflakePlan"]] = None,
+        schema_query_params: Optional[Sequence[Any]] = None,
     ):
         super().__init__()
         self.queries = queries
         self.schema_query = schema_query
+        # the values bound to the ? placeholders in the schema query, which is
+        # described before the plans built on this plan use it
+        self.schema_query_params = (
+            list(schema_query_params) if schema_query_params else None
+        )
         self.post_actions = post_actions if post_actions else []
         self.expr_to_alias = expr_to_alias if expr_to_alias else {}
         self.session = session
         self.source_plan = source_plan
         self.is_ddl_on_temp_object = is_ddl_on_temp_object
+        # the clauses of the last query, if it is a plain SELECT that later
+        # projections, filters, sorts and limits can be merged into
+        self.select_parts = select_parts
+        # the output attributes derived from the children of source_plan, which
+        # are used instead of describing the schema query
+        self.inferred_attributes = inferred_attributes
+        # the plans of the scalar subqueries in the last query
+        self.subquery_plans = subquery_plans if subquery_plans else []
+        self._alias_seed: Optional[str] = None
+        # the plan that is executed, with the repeated subplans of this plan
+        # extracted into CTEs, which is created by with_common_subplans()
+        self._with_common_subplans: Optional["SnowflakePlan"] = None
 
     def with_subqueries(self, subquery_plans: List["SnowflakePlan"]) -> "SnowflakePlan":
-        pre_queries = self.queries[:-1]
-        new_schema_query = self.schema_query
+        """Returns this plan with the slots of ``subquery_plans`` in its SQL filled
+        in: the last query of a subquery plan in the queries of this plan, and its
+        schema query in the schema query of this plan."""
+        query_slots = {}
+        schema_slots = {}
+        for i, plan in enumerate(subquery_plans):
+            # the position of the bound values of a subquery among the bound
+            # values of this plan isn't known
+            if plan.queries[-1].params:
+                raise SnowparkClientExceptionMessages.PLAN_BIND_PARAMETERS_IN_SUBQUERY()
+            query_slots[subquery_slot(i)] = plan.queries[-1].sql
+            schema_slots[subquery_slot(i)] = plan.schema_query
+
+        queries = [self._fill_slots(q, query_slots) for q in self.queries]
+        pre_queries = queries[:-1]
         new_post_actions = [*self.post_actions]
-
         for plan in subquery_plans:
             for query in plan.queries[:-1]:
                 if query not in pre_queries:
                     pre_queries.append(query)
-            new_schema_query = new_schema_query.replace(
-                plan.queries[-1].sql, plan.schema_query
-            )
             for action in plan.post_actions:
                 if action not in new_post_actions:
                     new_post_actions.append(action)
 
         return SnowflakePlan(
-            pre_queries + [self.queries[-1]],
-            new_schema_query,
+            pre_queries + [queries[-1]],
+            fill_slots(self.schema_query, schema_slots),
             post_actions=new_post_actions,
             expr_to_alias=self.expr_to_alias,
             session=self.session,
             source_plan=self.source_plan,
+            inferred_attributes=self.inferred_attributes,
+            subquery_plans=[*self.subquery_plans, *subquery_plans],
         )
 
+    @staticmethod
+    def _fill_slots(query: "Query", values: Dict[str, str]) -> "Query":
+        sql = fill_slots(query.sql, values)
+        if sql == query.sql:
+            return query
+        new_query = copy.copy(query)
+        new_query.sql = sql
+        return new_query
+
+    @property
+    def alias_seed(self) -> str:
+        """The seed of the aliases generated in the SQL of the plans built on this
+        plan when the SQL is deterministic. The analyzer derives it from the
+        seeds of the children of a plan, and otherwise it's a hash of the SQL."""
+        if self._alias_seed is None:
+            self._alias_seed = stable_hash(*(q.sql for q in self.queries))
+        return self._alias_seed
+
+    @alias_seed.setter
+    def alias_seed(self, value: str) -> None:
+        self._alias_seed = value
+
+    @property
+    def schema_query(self) -> str:
+        if self.schema_query_params:
+            # the attributes replace the schema query with one without bound values
+            _ = self.attributes
+        if isinstance(self._schema_query, SqlRope):
+            self._schema_query = str(self._schema_query)
+        return self._schema_query
+
+    @schema_query.setter
+    def schema_query(self, schema_query: Union[str, SqlRope]) -> None:
+        self._schema_query = schema_query
+
+    @property
+    def schema_query_rope(self) -> SqlRope:
+        if self.schema_query_params:
+            _ = self.attributes
+        return SqlRope.of(self._schema_query)
+
     @cached_property
     def attributes(self) -> List[Attribute]:
-        output = analyze_attributes(self.schema_query, self.session)
+        if self.inferred_attributes is not None:
+            output = self.inferred_attributes
+            with self.session._counter_lock:
+                self.session._avoided_describe_query_count += 1
+        else:
+            output = analyze_attributes(
+                str(self._schema_query), self.session, self.schema_query_params
+            )
         self.schema_query = schema_value_statement(output)
+        self.schema_query_params = None
+        if self.select_parts:
+            # the schema query is replaced, so it can't be merged with anymore
+            self.select_parts.schema_child = None
         return output
 
+    @property
+    def known_attributes(self) -> Optional[List[Attribute]]:
+        """The output attributes if they are known without describing the
+        schema query, otherwise ``None``."""
+        if "attributes" in self.__dict__:
+            return self.attributes
+        return self.inferred_attributes
+
     @cached_property
     def output(self) -> List[Attribute]:
         return [Attribute(a.name, a.datatype, a.nullable) for a in self.attributes]
@@ -207,11 +317,15 @@ class SnowflakePlan(LogicalPlan):
     def __copy__(self) -> "SnowflakePlan":
         return SnowflakePlan(
             self.queries.copy() if self.queries else [],
-            self.schema_query,
+            self._schema_query,
             self.post_actions.copy() if self.post_actions else None,
             dict(self.expr_to_alias) if self.expr_to_alias else None,
             self.session,
             self.source_plan,
+            select_parts=copy.copy(self.select_parts),
+            inferred_attributes=self.inferred_attributes,
+            subquery_plans=self.subquery_plans.copy(),
+            schema_query_params=self.schema_query_params,
         )
 
     def add_aliases(self, to_add: Dict) -> None:
@@ -234,13 +348,14 @@ class SnowflakePlanBuilder:
         select_child = self.add_result_scan_if_not_select(child)
         queries = select_child.queries[:-1] + [
             Query(
-                sql_generator(select_child.queries[-1].sql),
+                sql_generator(select_child.queries[-1].sql_rope),
                 query_id_place_holder="",
                 is_ddl_on_temp_object=is_ddl_on_temp_object,
+                params=select_child.queries[-1].params,
             )
         ]
         new_schema_query = (
-            schema_query if schema_query else sql_generator(child.schema_query)
+            schema_query if schema_query else sql_generator(child.schema_query_rope)
         )
 
         return SnowflakePlan(
@@ -253,6 +368,50 @@ class SnowflakePlanBuilder:
             is_ddl_on_temp_object,
         )
 
+    @SnowflakePlan.Decorator.wrap_exception
+    def build_select(
+        self,
+        merge: Callable[["SelectStatementParts"], Optional["SelectStatementParts"]],
+        child: SnowflakePlan,
+        source_plan: Optional[LogicalPlan],
+    ) -> SnowflakePlan:
+        """Builds a plan whose last query is a single SELECT. ``merge`` adds the
+        new clause to the given SELECT parts, or returns ``None`` if the clause
+        can't be merged into them. When the last query of ``child`` is a SELECT
+        the new clause can be merged into, no extra subquery layer is generated."""
+        select_child = self.add_result_scan_if_not_select(child)
+        parts = merge(
+            SelectStatementParts(
+                select_child.queries[-1].sql_rope, child.schema_query_rope
+            )
+        )
+        schema_query = parts.schema_sql
+        if self.session._sql_fusion_enabled and select_child.select_parts:
+            merged_parts = merge(select_child.select_parts)
+            if merged_parts:
+                parts = merged_parts
+                # if the schema query of child has already been replaced by
+                # its attributes, describing the new query on top of it is cheaper
+                if parts.schema_child is not None:
+                    schema_query = parts.schema_sql
+
+        return SnowflakePlan(
+            select_child.queries[:-1]
+            + [
+                Query(
+                    parts.sql,
+                    query_id_place_holder="",
+                    params=select_child.queries[-1].params,
+                )
+            ],
+            schema_query,
+            select_child.post_actions,
+            select_child.expr_to_alias,
+            self.session,
+            source_plan,
+            select_parts=parts,
+        )
+
     @SnowflakePlan.Decorator.wrap_exception
     def build_from_multiple_queries(
         self,
@@ -265,12 +424,14 @@ class SnowflakePlanBuilder:
         select_child = self.add_result_scan_if_not_select(child)
         queries = select_child.queries[0:-1] + [
             Query(msg, is_ddl_on_temp_object=is_ddl_on_temp_object)
-            for msg in multi_sql_generator(select_child.queries[-1].sql)
+            for msg in multi_sql_generator(select_child.queries[-1].sql_rope)
         ]
+        # the SQL of child is in the last of the generated queries
+        queries[-1].params = select_child.queries[-1].params
         new_schema_query = (
             schema_query
             if schema_query is not None
-            else multi_sql_generator(child.schema_query)[-1]
+            else multi_sql_generator(child.schema_query_rope)[-1]
         )
 
         return SnowflakePlan(
@@ -290,52 +451,62 @@ class SnowflakePlanBuilder:
         right: SnowflakePlan,
         source_plan: Optional[LogicalPlan],
     ) -> SnowflakePlan:
-        select_left = self.add_result_scan_if_not_select(left)
-        select_right = self.add_result_scan_if_not_select(right)
-        queries = (
-            select_left.queries[:-1]
-            + select_right.queries[:-1]
-            + [
-                Query(
-                    sql_generator(
-                        select_left.queries[-1].sql, select_right.queries[-1].sql
-                    ),
-                    None,
-                )
-            ]
+        return self.build_from_children(
+            lambda sqls: sql_generator(*sqls), [left, right], source_plan
         )
 
-        left_schema_query = schema_value_statement(select_left.attributes)
-        right_schema_query = schema_value_statement(select_right.attributes)
-        schema_query = sql_generator(left_schema_query, right_schema_query)
+    def build_from_children(
+        self,
+        sql_generator: Callable[[List[str]], str],
+        children: List[SnowflakePlan],
+        source_plan: Optional[LogicalPlan],
+    ) -> SnowflakePlan:
+        select_children = [self.add_result_scan_if_not_select(c) for c in children]
+        queries = [q for c in select_children for q in c.queries[:-1]] + [
+            Query(
+                sql_generator([c.queries[-1].sql_rope for c in select_children]),
+                None,
+                # the SQL of the children is generated in their order
+                params=[p for c in select_children for p in c.queries[-1].params or []],
+            )
+        ]
 
-        common_columns = set(select_left.expr_to_alias.keys()).intersection(
-            select_right.expr_to_alias.keys()
+        # describing the children here would cost a round trip for each of them,
+        # so their schema queries are combined instead if their attributes
+        # aren't known yet, and the result is only described when it's needed
+        schema_query = sql_generator(
+            [self._known_schema_query(c) for c in select_children]
         )
+
+        alias_counts = Counter(k for c in select_children for k in c.expr_to_alias)
         new_expr_to_alias = {
             k: v
-            for k, v in {
-                **select_left.expr_to_alias,
-                **select_right.expr_to_alias,
-            }.items()
-            if k not in common_columns
+            for c in select_children
+            for k, v in c.expr_to_alias.items()
+            if alias_counts[k] == 1
         }
 
         return SnowflakePlan(
             queries,
             schema_query,
-            select_left.post_actions + select_right.post_actions,
+            [a for c in select_children for a in c.post_actions],
             new_expr_to_alias,
             self.session,
             source_plan,
         )
 
-    def query(self, sql: str, source_plan: Optional[LogicalPlan]) -> SnowflakePlan:
+    def query(
+        self,
+        sql: str,
+        source_plan: Optional[LogicalPlan],
+        params: Optional[Sequence[Any]] = None,
+    ) -> SnowflakePlan:
         return SnowflakePlan(
-            queries=[Query(sql)],
+            queries=[Query(sql, params=params)],
             schema_query=sql,
             session=self.session,
             source_plan=source_plan,
+            schema_query_params=params,
         )
 
     def large_local_relation_plan(
@@ -357,9 +528,14 @@ class SnowflakePlanBuilder:
         select_stmt = project_statement([], temp_table_name)
         drop_table_stmt = drop_table_if_exists_statement(temp_table_name)
         schema_query = schema_value_statement(attributes)
+        # the temporary table doesn't depend on the queries of other plans, so it
+        # can be created and filled concurrently with them
+        create_table_query = Query(
+            create_table_stmt, is_ddl_on_temp_object=True, depends_on=[]
+        )
         queries = [
-            Query(create_table_stmt, is_ddl_on_temp_object=True),
-            BatchInsertQuery(insert_stmt, data),
+            create_table_query,
+            BatchInsertQuery(insert_stmt, data, depends_on=[create_table_query]),
             Query(select_stmt),
         ]
         return SnowflakePlan(
@@ -371,7 +547,13 @@ class SnowflakePlanBuilder:
         )
 
     def table(self, table_name: str) -> SnowflakePlan:
-        return self.query(project_statement([], table_name), None)
+        sql = project_statement([], table_name)
+        return SnowflakePlan(
+            queries=[Query(sql)],
+            schema_query=sql,
+            session=self.session,
+            select_parts=SelectStatementParts(table_name, table_name),
+        )
 
     def file_operation_plan(
         self, command: str, file_name: str, stage_location: str, options: Dict[str, str]
@@ -387,9 +569,12 @@ class SnowflakePlanBuilder:
         child: SnowflakePlan,
         source_plan: Optional[LogicalPlan],
         is_distinct: bool = False,
+        project_columns: Optional[List["ProjectedColumn"]] = None,
     ) -> SnowflakePlan:
-        return self.build(
-            lambda x: project_statement(project_list, x, is_distinct=is_distinct),
+        return self.build_select(
+            lambda parts: parts.with_project(
+                project_list, is_distinct, project_columns
+            ),
             child,
             source_plan,
         )
@@ -408,9 +593,15 @@ class SnowflakePlanBuilder:
         )
 
     def filter(
-        self, condition: str, child: SnowflakePlan, source_plan: Optional[LogicalPlan]
+        self,
+        condition: str,
+        child: SnowflakePlan,
+        source_plan: Optional[LogicalPlan],
+        referenced: Optional[Set[str]] = None,
     ) -> SnowflakePlan:
-        return self.build(lambda x: filter_statement(condition, x), child, source_plan)
+        return self.build_select(
+            lambda parts: parts.with_filter(condition, referenced), child, source_plan
+        )
 
     def sample(
         self,
@@ -429,29 +620,24 @@ class SnowflakePlanBuilder:
         )
 
     def sort(
-        self, order: List[str], child: SnowflakePlan, source_plan: Optional[LogicalPlan]
+        self,
+        order: List[str],
+        child: SnowflakePlan,
+        source_plan: Optional[LogicalPlan],
+        referenced: Optional[Set[str]] = None,
     ) -> SnowflakePlan:
-        return self.build(lambda x: sort_statement(order, x), child, source_plan)
+        return self.build_select(
+            lambda parts: parts.with_sort(order, referenced), child, source_plan
+        )
 
     def set_operator(
         self,
-        left: SnowflakePlan,
-        right: SnowflakePlan,
+        children: List[SnowflakePlan],
         op: str,
         source_plan: Optional[LogicalPlan],
     ) -> SnowflakePlan:
-        return self.build_binary(
-            lambda x, y: set_operator_statement(x, y, op),
-            left,
-            right,
-            source_plan,
-        )
-
-    def union(
-        self, children: List[SnowflakePlan], source_plan: Optional[LogicalPlan]
-    ) -> SnowflakePlan:
-        return reduce(
-            lambda x, y: self.set_operator(x, y, "UNION ALL ", source_plan), children
+        return self.build_from_children(
+            lambda x: set_operator_statement(x, op), children, source_plan
         )
 
     def join(
@@ -487,7 +673,10 @@ class SnowflakePlanBuilder:
                 [
                     *child.queries[0:-1],
                     Query(create_table),
-                    Query(insert_into_statement(table_name, child.queries[-1].sql)),
+                    Query(
+                        insert_into_statement(table_name, child.queries[-1].sql),
+                        params=child.queries[-1].params,
+                    ),
                 ],
                 create_table,
                 child.post_actions,
@@ -527,10 +716,16 @@ class SnowflakePlanBuilder:
         on_top_of_oder_by: bool,
         source_plan: Optional[LogicalPlan],
     ) -> SnowflakePlan:
-        return self.build(
-            lambda x: limit_statement(limit_expr, x, on_top_of_oder_by),
-            child,
-            source_plan,
+        if on_top_of_oder_by and not (
+            self.session._sql_fusion_enabled and child.select_parts
+        ):
+            return self.build(
+                lambda x: limit_statement(limit_expr, x, on_top_of_oder_by),
+                child,
+                source_plan,
+            )
+        return self.build_select(
+            lambda parts: parts.with_limit(limit_expr), child, source_plan
         )
 
     def pivot(
@@ -567,7 +762,8 @@ class SnowflakePlanBuilder:
         if len(child.queries) != 1:
             raise SnowparkClientExceptionMessages.PLAN_CREATE_VIEW_FROM_DDL_DML_OPERATIONS()
 
-        if not child.queries[0].sql.lower().strip().startswith("select"):
+        # the repeated subplans of the child can be defined in a WITH clause
+        if not child.queries[0].sql.lower().strip().startswith(("select", "with")):
             raise SnowparkClientExceptionMessages.PLAN_CREATE_VIEWS_FROM_SELECT_ONLY()
 
         return self.build(
@@ -644,6 +840,7 @@ class SnowflakePlanBuilder:
                         if_not_exist=True,
                     ),
                     is_ddl_on_temp_object=True,
+                    depends_on=[],
                 ),
                 Query(
                     select_from_path_with_format_statement(
@@ -696,14 +893,16 @@ class SnowflakePlanBuilder:
                 + "."
                 + random_name_for_temp_object(TempObjectType.TABLE)
             )
-            queries = [
-                Query(
-                    create_temp_table_statement(
-                        temp_table_name,
-                        attribute_to_schema_string(temp_table_schema),
-                    ),
-                    is_ddl_on_temp_object=True,
+            create_table_query = Query(
+                create_temp_table_statement(
+                    temp_table_name,
+                    attribute_to_schema_string(temp_table_schema),
                 ),
+                is_ddl_on_temp_object=True,
+                depends_on=[],
+            )
+            queries = [
+                create_table_query,
                 Query(
                     copy_into_table(
                         temp_table_name,
@@ -713,7 +912,8 @@ class SnowflakePlanBuilder:
                         copy_options_with_force,
                         pattern,
                         transformations=transformations,
-                    )
+                    ),
+                    depends_on=[create_table_query],
                 ),
                 Query(
                     project_statement(
@@ -898,10 +1098,19 @@ class SnowflakePlanBuilder:
             source_plan,
         )
 
+    @staticmethod
+    def _known_schema_query(plan: SnowflakePlan) -> Union[str, SqlRope]:
+        attributes = plan.known_attributes
+        return (
+            schema_value_statement(attributes)
+            if attributes is not None
+            else plan.schema_query_rope
+        )
+
     def add_result_scan_if_not_select(self, plan: SnowflakePlan) -> SnowflakePlan:
         if isinstance(plan.source_plan, SetOperation):
             return plan
-        elif plan.queries[-1].sql.strip().lower().startswith("select"):
+        elif plan.queries[-1].sql_rope.head(len("select")).lower() == "select":
             return plan
         else:
             new_queries = plan.queries + [
@@ -923,17 +1132,47 @@ class SnowflakePlanBuilder:
 class Query:
     def __init__(
         self,
-        sql: str,
+        sql: Union[str, SqlRope],
         query_id_place_holder: Optional[str] = None,
         is_ddl_on_temp_object: bool = False,
+        params: Optional[Sequence[Any]] = None,
+        depends_on: Optional[Sequence["Query"]] = None,
     ):
         self.sql = sql
         self.query_id_place_holder = (
             query_id_place_holder
             if query_id_place_holder
-            else f"query_id_place_holder_{generate_random_alphanumeric()}"
+            else f"{QUERY_ID_PLACE_HOLDER_PREFIX}{generate_random_alphanumeric()}"
         )
         self.is_ddl_on_temp_object = is_ddl_on_temp_object
+        # the values bound to the ? placeholders in the SQL, in their order
+        self.params = list(params) if params else None
+        # the query ID placeholders of the queries that must be executed before
+        # this query, or None if it depends on all the queries before it in a plan
+        self.depends_on = (
+            [q.query_id_place_holder for q in depends_on]
+            if depends_on is not None
+            else None
+        )
+
+    @property
+    def sql(self) -> str:
+        # a rope is only converted to a string once, when the SQL is needed
+        if self._sql is None:
+            self._sql = str(self._rope)
+        return self._sql
+
+    @sql.setter
+    def sql(self, sql: Union[str, SqlRope]) -> None:
+        self._sql = sql if isinstance(sql, str) else None
+        self._rope = SqlRope.of(sql)
+
+    @property
+    def sql_rope(self) -> SqlRope:
+        """The SQL of this query as a rope, which a statement that contains it is
+        built from without copying it. It is the same rope every time, so the
+        copies of this query in the SQL of other plans can be found by identity."""
+        return self._rope
 
 
 class BatchInsertQuery(Query):
@@ -941,6 +1180,183 @@ class BatchInsertQuery(Query):
         self,
         sql: str,
         rows: Optional[List[Row]] = None,
+        depends_on: Optional[Sequence[Query]] = None,
     ):
-        super().__init__(sql)
+        super().__init__(sql, depends_on=depends_on)
         self.rows = rows
+
+
+class ProjectedColumn(NamedTuple):
+    """Describes an expression in the select list of a projection."""
+
+    #: The name of the output column, or ``None`` if it's named by Snowflake.
+    name: Optional[str]
+    #: The name of the column of the child that is output unchanged, if any.
+    source: Optional[str]
+    #: The names of the columns of the child that the expression refers to, or
+    #: ``None`` if they are unknown.
+    references: Optional[Set[str]]
+
+
+class SelectStatementParts:
+    """The clauses of a ``SELECT ... FROM (child)`` query generated by
+    :class:`SnowflakePlanBuilder`.
+
+    A project, filter, sort or limit applied on top of such a query can often be
+    merged into it instead of wrapping it in a new subquery, which keeps the
+    generated SQL flat for long chains of DataFrame transformations. The ``with_*``
+    methods return the merged parts, or ``None`` if merging would change the
+    semantics of the query.
+    """
+
+    def __init__(
+        self,
+        child: str,
+        schema_child: Optional[str],
+        project: Optional[List[str]] = None,
+        is_distinct: bool = False,
+        condition: Optional[str] = None,
+        order: Optional[List[str]] = None,
+        limit: Optional[str] = None,
+        project_columns: Optional[List[ProjectedColumn]] = None,
+    ):
+        self.child = child
+        # the schema query of the child, or None if it is not available
+        self.schema_child = schema_child
+        self.project = project or []
+        self.is_distinct = is_distinct
+        self.condition = condition
+        self.order = order or []
+        self.limit = limit
+        # the descriptions of the expressions of the projection, if they are known
+        self.project_columns = project_columns
+
+    def _copy(self, **kwargs) -> "SelectStatementParts":
+        new_parts = copy.copy(self)
+        for key, value in kwargs.items():
+            setattr(new_parts, key, value)
+        return new_parts
+
+    @property
+    def _passthrough(self) -> Set[str]:
+        """The names of the columns of the child that the projection outputs
+        unchanged, which a clause on top of this query can refer to as if it were
+        evaluated on the child."""
+        if not self.project or self.project_columns is None:
+            return set()
+        counts = Counter(c.name for c in self.project_columns)
+        return {
+            c.source
+            for c in self.project_columns
+            if c.source is not None and counts[c.source] == 1
+        }
+
+    def _passes_through(self, referenced: Optional[Set[str]]) -> bool:
+        # a query that outputs a column of the child unchanged can't be an
+        # aggregation, so a clause that only refers to such columns evaluates to
+        # the same value on the child
+        if not self.project:
+            return True
+        return bool(referenced) and referenced <= self._passthrough
+
+    def _merge_project(
+        self, project: List[str], project_columns: Optional[List[ProjectedColumn]]
+    ) -> Optional[Tuple[List[str], List[ProjectedColumn]]]:
+        """Merges a projection on top of the projection of this query. A column of
+        this query that is output unchanged by the new projection is copied into
+        it, and any other expression of it must only refer to the columns that are
+        passed through from the child."""
+        if self.project_columns is None or project_columns is None:
+            return None
+        passthrough = self._passthrough
+        if not passthrough:
+            return None
+        counts = Counter(c.name for c in self.project_columns)
+        own_columns = {
+            c.name: (sql, c)
+            for sql, c in zip(self.project, self.project_columns)
+            if c.name is not None and counts[c.name] == 1
+        }
+        merged_project = []
+        merged_columns = []
+        for sql, column in zip(project, project_columns):
+            if column.source in own_columns:
+                sql, column = own_columns[column.source]
+            elif column.references is None or not column.references <= passthrough:
+                return None
+            merged_project.append(sql)
+            merged_columns.append(column)
+        return merged_project, merged_columns
+
+    def with_project(
+        self,
+        project: List[str],
+        is_distinct: bool = False,
+        project_columns: Optional[List[ProjectedColumn]] = None,
+    ) -> Optional["SelectStatementParts"]:
+        # WHERE is evaluated before the select list, so a projection can be merged
+        # as long as this query doesn't depend on row order
+        if self.is_distinct or self.order or self.limit is not None:
+            return None
+        if self.project:
+            merged = self._merge_project(project, project_columns)
+            if merged is None:
+                return None
+            project, project_columns = merged
+        return self._copy(
+            project=project, is_distinct=is_distinct, project_columns=project_columns
+        )
+
+    def with_filter(
+        self, condition: str, referenced: Optional[Set[str]] = None
+    ) -> Optional["SelectStatementParts"]:
+        # the condition refers to the output columns of this query, so it can only
+        # be merged when they are passed through from the child unchanged, and the
+        # select list doesn't depend on the rows that are filtered out, e.g.,
+        # through a window function
+        if self.is_distinct or self.limit is not None:
+            return None
+        if not self._passes_through(referenced):
+            return None
+        if self.project and any(c.references is None for c in self.project_columns):
+            # passes_through() ensures that project_columns is known
+            return None
+        return self._copy(
+            condition=and_condition(self.condition, condition)
+            if self.condition is not None
+            else condition
+        )
+
+    def with_sort(
+        self, order: List[str], referenced: Optional[Set[str]] = None
+    ) -> Optional["SelectStatementParts"]:
+        if self.is_distinct or self.order or self.limit is not None:
+            return None
+        if not self._passes_through(referenced):
+            return None
+        return self._copy(order=order)
+
+    def with_limit(self, limit: str) -> Optional["SelectStatementParts"]:
+        if self.limit is not None:
+            return None
+        return self._copy(limit=limit)
+
+    def _to_sql(self, child: str) -> str:
+        return select_statement(
+            self.project,
+            child,
+            is_distinct=self.is_distinct,
+            condition=self.condition,
+            order=self.order,
+            limit=self.limit,
+        )
+
+    @property
+    def sql(self) -> str:
+        return self._to_sql(self.child)
+
+    @property
+    def schema_sql(self) -> Optional[str]:
+        return (
+            self._to_sql(self.schema_child) if self.schema_child is not None else None
+        )
@@ -14,6 +14,11 @@ from snowflake.snowpark.types import StructType
 class LogicalPlan:
     def __init__(self):
         self.children = []
+        # the result of resolving this plan, which is cached when a DataFrame
+        # is analyzed lazily so the plans built on top of it can reuse it
+        self.resolved_plan: Optional[
+            "snowflake.snowpark._internal.analyzer.snowflake_plan.SnowflakePlan"
+        ] = None
 
 
 class LeafNode(LogicalPlan):
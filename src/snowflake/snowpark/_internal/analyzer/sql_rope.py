@@ -0,0 +1,91 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import re
+from typing import Iterable, Iterator, List, Tuple, Union
+
+# The SQL of a plan is generated from the SQL of its children, e.g., a projection
+# is "SELECT ... FROM (<child>)", so concatenating strings copies the SQL of the
+# innermost plan once per level of the plan. Instead, the SQL of a child plan is
+# passed to the statement functions in analyzer_utils as a rope, and since they
+# build SQL with "+", the SQL they generate from it is a rope too, which refers
+# to the SQL of the child without copying it. A rope is converted to a string
+# once, when the SQL of the query is needed.
+
+_NON_WHITESPACE = re.compile(r"\S")
+
+
+class SqlRope:
+    """SQL text that is a concatenation of strings and other ropes."""
+
+    __slots__ = ("parts", "length")
+
+    def __init__(self, parts: Tuple[Union[str, "SqlRope"], ...]) -> None:
+        self.parts = parts
+        self.length = sum(len(p) for p in parts)
+
+    @staticmethod
+    def of(sql: Union[str, "SqlRope"]) -> "SqlRope":
+        return sql if isinstance(sql, SqlRope) else SqlRope((sql,))
+
+    def __add__(self, other: Union[str, "SqlRope"]) -> "SqlRope":
+        if not isinstance(other, (str, SqlRope)):
+            return NotImplemented
+        return SqlRope((self, other))
+
+    def __radd__(self, other: str) -> "SqlRope":
+        if not isinstance(other, str):
+            return NotImplemented
+        return SqlRope((other, self))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __str__(self) -> str:
+        return "".join(self._leaves())
+
+    def __repr__(self) -> str:
+        return f"SqlRope({str(self)!r})"
+
+    def head(self, length: int) -> str:
+        """Returns the first ``length`` characters after the leading whitespaces,
+        without converting the whole rope to a string."""
+        chars = []
+        remaining = length
+        for leaf in self._leaves():
+            start = 0
+            if not chars:
+                match = _NON_WHITESPACE.search(leaf)
+                if match is None:
+                    continue
+                start = match.start()
+            chars.append(leaf[start : start + remaining])
+            remaining -= len(chars[-1])
+            if remaining <= 0:
+                break
+        return "".join(chars)
+
+    def _leaves(self) -> Iterator[str]:
+        # a rope of a deep plan is deeper than the recursion limit
+        stack = [self]
+        while stack:
+            part = stack.pop()
+            if isinstance(part, SqlRope):
+                stack.extend(reversed(part.parts))
+            else:
+                yield part
+
+
+def join_fragments(
+    separator: str, parts: Iterable[Union[str, SqlRope]]
+) -> Union[str, SqlRope]:
+    """Joins SQL text like :meth:`str.join`, but also accepts ropes."""
+    parts = list(parts)
+    if all(isinstance(p, str) for p in parts):
+        return separator.join(parts)
+    joined: List[Union[str, SqlRope]] = []
+    for i, part in enumerate(parts):
+        if i:
+            joined.append(separator)
+        joined.append(part)
+    return SqlRope(tuple(joined))
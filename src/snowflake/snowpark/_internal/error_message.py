@@ -223,6 +223,14 @@ class SnowparkClientExceptionMessages:
     def PLAN_CANNOT_CREATE_LITERAL(type: str) -> SnowparkPlanException:
         return SnowparkPlanException(f"Cannot create a Literal for {type}", "1206")
 
+    @staticmethod
+    def PLAN_BIND_PARAMETERS_IN_SUBQUERY() -> SnowparkPlanException:
+        return SnowparkPlanException(
+            "A DataFrame created by Session.sql() with bind parameters can't be "
+            "used as a subquery of an expression.",
+            "1207",
+        )
+
     # SQL Execution error codes 03XX
 
     @staticmethod
@@ -364,6 +372,12 @@ class SnowparkClientExceptionMessages:
             "1411",
         )
 
+    @staticmethod
+    def SERVER_FAILED_FETCH_ARROW(message: str) -> SnowparkFetchDataException:
+        return SnowparkFetchDataException(
+            f"Failed to fetch an Arrow table. The error is: {message}", "1412"
+        )
+
     # General Error codes 15XX
 
     @staticmethod
@@ -4,20 +4,41 @@
 #
 import functools
 import os
+import re
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from logging import getLogger
-from typing import IO, Any, Dict, Iterator, List, Optional, Set, Union
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
 
 import snowflake.connector
 from snowflake.connector import SnowflakeConnection, connect
 from snowflake.connector.constants import FIELD_ID_TO_NAME
 from snowflake.connector.cursor import ResultMetadata, SnowflakeCursor
-from snowflake.connector.errors import NotSupportedError, ProgrammingError
+from snowflake.connector.errors import (
+    DatabaseError,
+    NotSupportedError,
+    ProgrammingError,
+)
 from snowflake.connector.network import ReauthenticationRequest
-from snowflake.connector.options import pandas
+from snowflake.connector.options import pandas, pyarrow
 from snowflake.snowpark._internal.analyzer.analyzer_utils import (
     escape_quotes,
+    fill_slots,
     quote_name,
     quote_name_without_upper_casing,
 )
@@ -27,6 +48,7 @@ from snowflake.snowpark._internal.analyzer.schema_utils import (
 )
 from snowflake.snowpark._internal.analyzer.snowflake_plan import (
     BatchInsertQuery,
+    Query,
     SnowflakePlan,
 )
 from snowflake.snowpark._internal.error_message import SnowparkClientExceptionMessages
@@ -37,12 +59,16 @@ from snowflake.snowpark._internal.utils import (
     is_in_stored_procedure,
     normalize_local_file,
     normalize_remote_file_or_dir,
+    prefetch_chunks,
+    prefetch_rows,
     result_set_to_iter,
     result_set_to_rows,
+    rows_to_arrow_table,
     unwrap_stage_location_single_quote,
 )
+from snowflake.snowpark.async_job import AsyncJob, _AsyncResultType
 from snowflake.snowpark.query_history import QueryHistory, QueryRecord
-from snowflake.snowpark.row import Row
+from snowflake.snowpark.row import ResultSet, Row
 
 logger = getLogger(__name__)
 
@@ -54,6 +80,56 @@ PARAM_APPLICATION = "application"
 PARAM_INTERNAL_APPLICATION_NAME = "internal_application_name"
 PARAM_INTERNAL_APPLICATION_VERSION = "internal_application_version"
 
+# the max number of describe results cached in a session
+DESCRIBE_CACHE_MAX_SIZE = 1024
+# the max number of independent queries of an action executed concurrently
+MAX_CONCURRENT_PRE_QUERIES = 8
+# the max number of idle cursors kept in a session for later actions. The
+# cursors of more concurrent actions are closed when the actions finish.
+MAX_IDLE_CURSORS = 8
+# statements that may change the result of describing a query
+DESCRIBE_CACHE_INVALIDATING_STATEMENTS = (
+    "alter",
+    "call",
+    "create",
+    "drop",
+    "execute",
+    "grant",
+    "revoke",
+    "undrop",
+    "use",
+)
+# the comments and parentheses that can precede the first keyword of a statement
+STATEMENT_PREFIX_PATTERN = re.compile(
+    r"(?:\s+|\(|--[^\n]*|//[^\n]*|/\*.*?\*/)*", re.DOTALL
+)
+# string literals and quoted identifiers, whose whitespaces are kept
+QUOTED_TEXT_PATTERN = re.compile(r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"]|"")*")""")
+
+
+def _normalize_query(query: str) -> str:
+    # collapse the whitespaces outside of string literals and quoted identifiers,
+    # so that the queries that only differ in formatting share the cache entry
+    parts = QUOTED_TEXT_PATTERN.split(query.strip())
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(parts)
+    )
+
+
+def _invalidates_describe_cache(query: str, is_ddl_on_temp_object: bool) -> bool:
+    # DDL on temp objects only creates or drops the objects created by Snowpark,
+    # which don't affect the describe results of other queries
+    if is_ddl_on_temp_object:
+        return False
+    start = STATEMENT_PREFIX_PATTERN.match(query).end()
+    return query[start:].lower().startswith(DESCRIBE_CACHE_INVALIDATING_STATEMENTS)
+
+
+def _copy_attributes(attributes: List[Attribute]) -> List[Attribute]:
+    # the cached attributes are shared by the plans that describe the same query,
+    # so every plan gets attributes of its own
+    return [Attribute(a.name, a.datatype, a.nullable) for a in attributes]
+
 
 def _build_target_path(stage_location: str, dest_prefix: str = "") -> str:
     qualified_stage_name = unwrap_stage_location_single_quote(stage_location)
@@ -137,8 +213,21 @@ class ServerConnection:
         if "password" in self._lower_case_parameters:
             self._lower_case_parameters["password"] = None
         self._cursor = self._conn.cursor()
+        # the cursors that no action is using. Each action executes its queries
+        # with a cursor of its own, so that the actions of different threads
+        # don't share the results and the metadata of a cursor.
+        self._idle_cursors: List[SnowflakeCursor] = [self._cursor]
+        self._cursor_lock = threading.Lock()
         self._telemetry_client = TelemetryClient(self._conn)
         self._query_listener: Set[QueryHistory] = set()
+        # the results of describing queries, keyed by the normalized query and
+        # the types of its bound values, and ordered from the least recently used
+        self._describe_cache: "OrderedDict[Hashable, List[Attribute]]" = OrderedDict()
+        self._describe_cache_lock = threading.Lock()
+        self._describe_cache_hits = 0
+        self._describe_cache_misses = 0
+        # the number of times the describe cache was cleared
+        self._describe_cache_generation = 0
         # The session in this case refers to a Snowflake session, not a
         # Snowpark session
         self._telemetry_client.send_session_created_telemetry(not bool(conn))
@@ -165,6 +254,44 @@ class ServerConnection:
         if self._conn:
             self._conn.close()
 
+    def _acquire_cursor(self) -> SnowflakeCursor:
+        with self._cursor_lock:
+            if self._idle_cursors:
+                return self._idle_cursors.pop()
+        return self._conn.cursor()
+
+    def _release_cursor(self, cursor: SnowflakeCursor) -> None:
+        with self._cursor_lock:
+            if len(self._idle_cursors) < MAX_IDLE_CURSORS:
+                self._idle_cursors.append(cursor)
+                return
+        cursor.close()
+
+    @contextmanager
+    def _pooled_cursor(
+        self, cursor: Optional[SnowflakeCursor] = None
+    ) -> Iterator[SnowflakeCursor]:
+        """Yields ``cursor`` if it is given, e.g., the cursor of the action a query
+        is executed for, and otherwise an idle cursor for the duration of the
+        context."""
+        if cursor is not None:
+            yield cursor
+            return
+        cursor = self._acquire_cursor()
+        try:
+            yield cursor
+        finally:
+            self._release_cursor(cursor)
+
+    def _release_after(
+        self, data: Iterator[Any], cursor: SnowflakeCursor
+    ) -> Iterator[Any]:
+        # the rows of an iterator are fetched from its cursor until it's exhausted
+        try:
+            yield from data
+        finally:
+            self._release_cursor(cursor)
+
     def is_closed(self) -> bool:
         return self._conn.is_closed()
 
@@ -202,8 +329,45 @@ class ServerConnection:
         return rows[0][0] if len(rows) > 0 else None
 
     @SnowflakePlan.Decorator.wrap_exception
-    def get_result_attributes(self, query: str) -> List[Attribute]:
-        return convert_result_meta_to_attribute(self._cursor.describe(query))
+    def get_result_attributes(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[Attribute]:
+        key = (
+            # the unqualified names in the query refer to the objects in the current
+            # database and schema, which the connection updates from the response
+            # to every query
+            self._conn.database,
+            self._conn.schema,
+            _normalize_query(query),
+            # the statement is compiled with the types of the bound values, so
+            # the values themselves don't change its result attributes
+            tuple(type(p).__name__ for p in params) if params else None,
+        )
+        with self._describe_cache_lock:
+            attributes = self._describe_cache.get(key)
+            if attributes is not None:
+                self._describe_cache_hits += 1
+                self._describe_cache.move_to_end(key)
+                return _copy_attributes(attributes)
+            self._describe_cache_misses += 1
+            generation = self._describe_cache_generation
+
+        with self._pooled_cursor() as cursor:
+            meta = cursor.describe(query, params) if params else cursor.describe(query)
+        attributes = convert_result_meta_to_attribute(meta)
+        with self._describe_cache_lock:
+            # the cache was cleared while the query was described, so the result
+            # may be from before the statement that cleared it
+            if generation == self._describe_cache_generation:
+                self._describe_cache[key] = attributes
+                if len(self._describe_cache) > DESCRIBE_CACHE_MAX_SIZE:
+                    self._describe_cache.popitem(last=False)
+        return _copy_attributes(attributes)
+
+    def clear_describe_cache(self) -> None:
+        with self._describe_cache_lock:
+            self._describe_cache.clear()
+            self._describe_cache_generation += 1
 
     @_Decorator.log_msg_and_perf_telemetry("Uploading file to stage")
     def upload_file(
@@ -221,9 +385,8 @@ class ServerConnection:
             target_path = _build_target_path(stage_location, dest_prefix)
             try:
                 # upload_stream directly consume stage path, so we don't need to normalize it
-                self._cursor.upload_stream(
-                    open(path, "rb"), f"{target_path}/{file_name}"
-                )
+                with self._pooled_cursor() as cursor:
+                    cursor.upload_stream(open(path, "rb"), f"{target_path}/{file_name}")
             except ProgrammingError as pe:
                 tb = sys.exc_info()[2]
                 ne = SnowparkClientExceptionMessages.SQL_EXCEPTION_FROM_PROGRAMMING_ERROR(
@@ -263,9 +426,10 @@ class ServerConnection:
                 target_path = _build_target_path(stage_location, dest_prefix)
                 try:
                     # upload_stream directly consume stage path, so we don't need to normalize it
-                    self._cursor.upload_stream(
-                        input_stream, f"{target_path}/{dest_filename}"
-                    )
+                    with self._pooled_cursor() as cursor:
+                        cursor.upload_stream(
+                            input_stream, f"{target_path}/{dest_filename}"
+                        )
                 except ProgrammingError as pe:
                     tb = sys.exc_info()[2]
                     ne = SnowparkClientExceptionMessages.SQL_EXCEPTION_FROM_PROGRAMMING_ERROR(
@@ -296,9 +460,27 @@ class ServerConnection:
                 raise ex
 
     def notify_query_listeners(self, query_record: QueryRecord) -> None:
-        for listener in self._query_listener:
+        # the listeners can be added and removed by other threads
+        for listener in list(self._query_listener):
             listener._add_query(query_record)
 
+    def _before_query(
+        self, query: str, is_ddl_on_temp_object: bool, kwargs: Dict[str, Any]
+    ) -> None:
+        # Set SNOWPARK_SKIP_TXN_COMMIT_IN_DDL to True to avoid DDL commands to commit the open transaction
+        if is_ddl_on_temp_object:
+            if not kwargs.get("_statement_params"):
+                kwargs["_statement_params"] = {}
+            kwargs["_statement_params"]["SNOWPARK_SKIP_TXN_COMMIT_IN_DDL"] = True
+        if _invalidates_describe_cache(query, is_ddl_on_temp_object):
+            self.clear_describe_cache()
+
+    def _after_query(self, query: str, is_ddl_on_temp_object: bool) -> None:
+        # the cache is cleared again after the statement is executed, so the
+        # results of describing queries while it was executed aren't kept
+        if _invalidates_describe_cache(query, is_ddl_on_temp_object):
+            self.clear_describe_cache()
+
     @_Decorator.wrap_exception
     def run_query(
         self,
@@ -306,15 +488,63 @@ class ServerConnection:
         to_pandas: bool = False,
         to_iter: bool = False,
         is_ddl_on_temp_object: bool = False,
+        params: Optional[Sequence[Any]] = None,
+        cursor: Optional[SnowflakeCursor] = None,
+        to_arrow: bool = False,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Executes ``query`` with ``cursor``, or with an idle cursor if it isn't
+        given, which is released when the result is fetched."""
+        if cursor is not None:
+            return self._run_query_with_cursor(
+                cursor,
+                query,
+                to_pandas,
+                to_iter,
+                is_ddl_on_temp_object,
+                params,
+                to_arrow,
+                **kwargs,
+            )
+        cursor = self._acquire_cursor()
+        try:
+            result = self._run_query_with_cursor(
+                cursor,
+                query,
+                to_pandas,
+                to_iter,
+                is_ddl_on_temp_object,
+                params,
+                to_arrow,
+                **kwargs,
+            )
+        except BaseException:
+            self._release_cursor(cursor)
+            raise
+        if to_iter:
+            result["data"] = self._release_after(result["data"], cursor)
+        else:
+            self._release_cursor(cursor)
+        return result
+
+    def _run_query_with_cursor(
+        self,
+        cursor: SnowflakeCursor,
+        query: str,
+        to_pandas: bool,
+        to_iter: bool,
+        is_ddl_on_temp_object: bool,
+        params: Optional[Sequence[Any]],
+        to_arrow: bool = False,
         **kwargs,
     ) -> Dict[str, Any]:
         try:
-            # Set SNOWPARK_SKIP_TXN_COMMIT_IN_DDL to True to avoid DDL commands to commit the open transaction
-            if is_ddl_on_temp_object:
-                if not kwargs.get("_statement_params"):
-                    kwargs["_statement_params"] = {}
-                kwargs["_statement_params"]["SNOWPARK_SKIP_TXN_COMMIT_IN_DDL"] = True
-            results_cursor = self._cursor.execute(query, **kwargs)
+            self._before_query(query, is_ddl_on_temp_object, kwargs)
+            if params:
+                # the values are bound to the ? placeholders in the query
+                kwargs["params"] = params
+            results_cursor = cursor.execute(query, **kwargs)
+            self._after_query(query, is_ddl_on_temp_object)
             self.notify_query_listeners(
                 QueryRecord(results_cursor.sfqid, results_cursor.query)
             )
@@ -329,15 +559,45 @@ class ServerConnection:
         # because when the query plan has multiple queries, it will
         # have non-select statements, and it shouldn't fail if the user
         # calls to_pandas() to execute the query.
-        if to_pandas:
+        if to_arrow:
+            try:
+                if to_iter:
+                    data_or_iter = (
+                        batch
+                        for table in results_cursor.fetch_arrow_batches()
+                        for batch in table.to_batches()
+                    )
+                else:
+                    data_or_iter = results_cursor.fetch_arrow_all()
+                    if data_or_iter is None:
+                        # the connector doesn't return a table without rows
+                        data_or_iter = rows_to_arrow_table(
+                            [], results_cursor.description
+                        )
+            except NotSupportedError:
+                # the result of a non-SELECT statement isn't in the Arrow format
+                data_or_iter = rows_to_arrow_table(
+                    results_cursor.fetchall(), results_cursor.description
+                )
+                if to_iter:
+                    data_or_iter = iter(data_or_iter.to_batches())
+            except KeyboardInterrupt:
+                raise
+            except BaseException as ex:
+                raise SnowparkClientExceptionMessages.SERVER_FAILED_FETCH_ARROW(str(ex))
+        elif to_pandas:
             try:
                 data_or_iter = (
                     map(
-                        self._fix_pandas_df_integer,
+                        functools.partial(
+                            self._fix_pandas_df_integer, cursor=results_cursor
+                        ),
                         results_cursor.fetch_pandas_batches(),
                     )
                     if to_iter
-                    else self._fix_pandas_df_integer(results_cursor.fetch_pandas_all())
+                    else self._fix_pandas_df_integer(
+                        results_cursor.fetch_pandas_all(), results_cursor
+                    )
                 )
             except NotSupportedError:
                 data_or_iter = (
@@ -354,27 +614,55 @@ class ServerConnection:
                 iter(results_cursor) if to_iter else results_cursor.fetchall()
             )
 
-        return {"data": data_or_iter, "sfqid": results_cursor.sfqid}
+        return {
+            "data": data_or_iter,
+            "sfqid": results_cursor.sfqid,
+            "description": results_cursor.description,
+        }
 
     def execute(
         self,
         plan: SnowflakePlan,
         to_pandas: bool = False,
         to_iter: bool = False,
+        to_arrow: bool = False,
         **kwargs,
     ) -> Union[
-        List[Row], "pandas.DataFrame", Iterator[Row], Iterator["pandas.DataFrame"]
+        List[Row],
+        "pandas.DataFrame",
+        Iterator[Row],
+        Iterator["pandas.DataFrame"],
+        "pyarrow.Table",
+        Iterator["pyarrow.RecordBatch"],
     ]:
         result_set, result_meta = self.get_result_set(
-            plan, to_pandas, to_iter, **kwargs
+            plan, to_pandas, to_iter, to_arrow, **kwargs
         )
-        if to_pandas:
+        # the next chunks of an iterator are retrieved in the background
+        prefetch_depth = plan.session._result_prefetch_depth if to_iter else 0
+        if to_pandas or to_arrow:
+            if prefetch_depth:
+                return prefetch_chunks(result_set, prefetch_depth)
             return result_set
         else:
             if to_iter:
-                return result_set_to_iter(result_set, result_meta)
+                rows = result_set_to_iter(result_set, result_meta)
+                return prefetch_rows(rows, prefetch_depth) if prefetch_depth else rows
             else:
-                return result_set_to_rows(result_set, result_meta)
+                return self._to_rows(result_set, result_meta, plan.session)
+
+    @staticmethod
+    def _to_rows(
+        result_set: List[Any],
+        result_meta: Optional[List[ResultMetadata]],
+        session: "snowflake.snowpark.session.Session",
+    ) -> Union[List[Row], ResultSet]:
+        # the rows of a result, which are stored by column if the session asks so
+        if session._columnar_results_enabled:
+            return ResultSet._from_rows(
+                result_set, [col.name for col in result_meta] if result_meta else None
+            )
+        return result_set_to_rows(result_set, result_meta)
 
     @SnowflakePlan.Decorator.wrap_exception
     def get_result_set(
@@ -382,51 +670,376 @@ class ServerConnection:
         plan: SnowflakePlan,
         to_pandas: bool = False,
         to_iter: bool = False,
+        to_arrow: bool = False,
         **kwargs,
     ) -> Union[
         List[Any],
         "pandas.DataFrame",
         SnowflakeCursor,
         Iterator["pandas.DataFrame"],
+        "pyarrow.Table",
+        Iterator["pyarrow.RecordBatch"],
         List[ResultMetadata],
     ]:
         action_id = plan.session._generate_new_action_id()
+        # the queries of an action are executed with the same cursor, which no
+        # other action uses until the result of the last query is fetched
+        cursor = self._acquire_cursor()
 
         result, result_meta = None, None
         try:
             placeholders = {}
-            for i, query in enumerate(plan.queries):
-                if isinstance(query, BatchInsertQuery):
-                    self.run_batch_insert(query.sql, query.rows, **kwargs)
+            queries = plan.queries
+            if self._execute_pre_queries_concurrently(
+                plan, action_id, placeholders, **kwargs
+            ):
+                queries = plan.queries[-1:]
+            batches = self._multi_statement_batches(
+                queries[:-1], plan.session, queries[-1:]
+            ) + [queries[-1:]]
+            for i, batch in enumerate(batches):
+                query = batch[0]
+                if len(batch) > 1:
+                    self.run_multi_statement_query(
+                        batch, placeholders, cursor=cursor, **kwargs
+                    )
+                elif isinstance(query, BatchInsertQuery):
+                    self.run_batch_insert(
+                        query.sql, query.rows, cursor=cursor, **kwargs
+                    )
                 else:
-                    final_query = query.sql
-                    for holder, id_ in placeholders.items():
-                        final_query = final_query.replace(holder, id_)
+                    final_query = fill_slots(query.sql, placeholders)
                     result = self.run_query(
                         final_query,
                         to_pandas,
-                        to_iter and (i == len(plan.queries) - 1),
+                        to_iter and (i == len(batches) - 1),
                         is_ddl_on_temp_object=query.is_ddl_on_temp_object,
+                        params=query.params,
+                        cursor=cursor,
+                        to_arrow=to_arrow,
                         **kwargs,
                     )
                     placeholders[query.query_id_place_holder] = result["sfqid"]
-                    result_meta = self._cursor.description
+                    result_meta = cursor.description
                 if action_id < plan.session._last_canceled_id:
                     raise SnowparkClientExceptionMessages.SERVER_QUERY_IS_CANCELLED()
+        except BaseException:
+            self._release_cursor(cursor)
+            raise
         finally:
             # delete created tmp object
-            for action in plan.post_actions:
-                self.run_query(
-                    action.sql,
-                    is_ddl_on_temp_object=action.is_ddl_on_temp_object,
-                    **kwargs,
-                )
+            self.run_post_actions(plan.post_actions, plan.session, **kwargs)
 
         if result is None:
+            self._release_cursor(cursor)
             raise SnowparkClientExceptionMessages.SQL_LAST_QUERY_RETURN_RESULTSET()
 
+        if to_iter:
+            return self._release_after(result["data"], cursor), result_meta
+        self._release_cursor(cursor)
         return result["data"], result_meta
 
+    def _multi_statement_batches(
+        self,
+        queries: List[Query],
+        session: "snowflake.snowpark.session.Session",
+        later_queries: Sequence[Query] = (),
+    ) -> List[List[Query]]:
+        """Groups consecutive queries in ``queries`` that can be executed in one
+        multi-statement request, to save the round trips of executing them one by
+        one. A query whose result or query ID is used, e.g., by a later query in
+        ``queries`` or ``later_queries``, is executed on its own.
+
+        The queries that Snowpark generates to create, fill and drop its temporary
+        objects, e.g., the creation of a temporary table and the COPY into it, are
+        only batched with each other, because the statement parameters of DDL on
+        temporary objects apply to the whole request."""
+        if not _batching_enabled(session):
+            return [[q] for q in queries]
+        all_queries = [*queries, *later_queries]
+        batches = []
+        for i, query in enumerate(queries):
+            batchable = (
+                not isinstance(query, BatchInsertQuery)
+                and not query.params
+                # PUT and GET can't be executed in a multi-statement request
+                and not query.sql.lstrip().lower().startswith(("put", "get"))
+                and all(
+                    query.query_id_place_holder not in q.sql
+                    for q in all_queries[i + 1 :]
+                )
+            )
+            if (
+                batchable
+                and batches
+                and batches[-1][-1] is not None
+                and _on_temp_object(batches[-1][-1]) == _on_temp_object(query)
+            ):
+                batches[-1].append(query)
+            else:
+                # None marks a query that nothing can be batched with
+                batches.append([query] if batchable else [query, None])
+        return [[q for q in batch if q is not None] for batch in batches]
+
+    @_Decorator.wrap_exception
+    def run_multi_statement_query(
+        self,
+        queries: List[Query],
+        placeholders: Optional[Dict[str, str]] = None,
+        cursor: Optional[SnowflakeCursor] = None,
+        **kwargs,
+    ) -> List[str]:
+        """Executes the statements of ``queries`` in one request and returns their
+        query IDs. Every statement is still recorded by the query listeners."""
+        sqls = [
+            fill_slots(q.sql, placeholders) if placeholders else q.sql for q in queries
+        ]
+        for query, sql in zip(queries, sqls):
+            self._before_query(sql, query.is_ddl_on_temp_object, kwargs)
+        multi_statement_query = ";\n".join(sql.strip().rstrip(";") for sql in sqls)
+        with self._pooled_cursor(cursor) as cursor:
+            try:
+                results_cursor = cursor.execute(
+                    multi_statement_query, num_statements=len(queries), **kwargs
+                )
+            except Exception as ex:
+                query_id_log = f" [queryID: {ex.sfqid}]" if hasattr(ex, "sfqid") else ""
+                logger.error(
+                    f"Failed to execute query{query_id_log} {multi_statement_query}\n{ex}"
+                )
+                # the statements before the failed one may have been executed,
+                # so the request is still recorded
+                if getattr(ex, "sfqid", None):
+                    self.notify_query_listeners(
+                        QueryRecord(ex.sfqid, multi_statement_query)
+                    )
+                raise ex
+            query_ids = list(results_cursor.multi_statement_savedIds)
+        for query, sql in zip(queries, sqls):
+            self._after_query(sql, query.is_ddl_on_temp_object)
+        for query_id, sql in zip(query_ids, sqls):
+            self.notify_query_listeners(QueryRecord(query_id, sql))
+            logger.debug(f"Execute query [queryID: {query_id}] {sql}")
+        return query_ids
+
+    def run_post_actions(
+        self,
+        post_actions: List[Query],
+        session: "snowflake.snowpark.session.Session",
+        **kwargs,
+    ) -> None:
+        for batch in self._multi_statement_batches(post_actions, session):
+            if len(batch) > 1:
+                try:
+                    self.run_multi_statement_query(batch, **kwargs)
+                    continue
+                except Exception as ex:
+                    # a failed statement skips the statements after it in the
+                    # request, so every statement is executed again on its own,
+                    # e.g., to still drop the other temporary objects
+                    logger.debug(f"Executing the post actions one by one: {ex}")
+                    self._run_post_actions_one_by_one(batch, **kwargs)
+            else:
+                self.run_query(
+                    batch[0].sql,
+                    is_ddl_on_temp_object=batch[0].is_ddl_on_temp_object,
+                    **kwargs,
+                )
+
+    def _run_post_actions_one_by_one(self, post_actions: List[Query], **kwargs) -> None:
+        # every post action is executed, and the first error is raised afterwards
+        error = None
+        for query in post_actions:
+            try:
+                self.run_query(
+                    query.sql,
+                    is_ddl_on_temp_object=query.is_ddl_on_temp_object,
+                    **kwargs,
+                )
+            except Exception as ex:
+                error = error or ex
+        if error is not None:
+            raise error
+
+    def _execute_pre_queries_concurrently(
+        self,
+        plan: SnowflakePlan,
+        action_id: int,
+        placeholders: Dict[str, str],
+        **kwargs,
+    ) -> bool:
+        """Executes the queries of ``plan`` before its last query, each with a cursor
+        of its own as soon as the queries it depends on are executed, if some of
+        them don't depend on each other, and returns whether they are executed.
+        The query IDs of the queries are added to ``placeholders``."""
+        if not plan.session._concurrent_pre_queries_enabled:
+            return False
+        # Only batch insertions, which upload local data and can't be executed in
+        # a multi-statement request, gain more from being executed concurrently
+        # than from saving round trips, so other pre-queries are batched instead
+        if _batching_enabled(plan.session) and not any(
+            isinstance(q, BatchInsertQuery) for q in plan.queries[:-1]
+        ):
+            return False
+        pre_queries = []
+        for query in plan.queries[:-1]:
+            # a query shared by the children of a plan, e.g., the creation of a
+            # temporary table in a self join, is executed once
+            if all(
+                q.query_id_place_holder != query.query_id_place_holder
+                for q in pre_queries
+            ):
+                pre_queries.append(query)
+        dependencies = _pre_query_dependencies(pre_queries)
+        if all(i - 1 in dependencies[i] for i in range(1, len(pre_queries))):
+            return False
+
+        # a batch insertion with a query tag sets the tag for the whole session
+        # while it runs, so no other query runs at the same time
+        exclusive = (
+            {i for i, q in enumerate(pre_queries) if isinstance(q, BatchInsertQuery)}
+            if _batch_insert_query_tag(kwargs)
+            else set()
+        )
+        executed, running = set(), {}
+        with ThreadPoolExecutor(MAX_CONCURRENT_PRE_QUERIES) as executor:
+            while len(executed) < len(pre_queries):
+                for i, query in enumerate(pre_queries):
+                    if exclusive & set(running.values()):
+                        break
+                    if (
+                        i not in executed
+                        and i not in running.values()
+                        and dependencies[i] <= executed
+                        and not (i in exclusive and running)
+                    ):
+                        future = executor.submit(
+                            self._execute_pre_query,
+                            query,
+                            fill_slots(query.sql, placeholders),
+                            **kwargs,
+                        )
+                        running[future] = i
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = running.pop(future)
+                    # the queries that are running when a query fails are waited
+                    # for when the executor shuts down
+                    query_id = future.result()
+                    placeholders[pre_queries[i].query_id_place_holder] = query_id
+                    executed.add(i)
+                if action_id < plan.session._last_canceled_id:
+                    raise SnowparkClientExceptionMessages.SERVER_QUERY_IS_CANCELLED()
+        return True
+
+    def _execute_pre_query(self, query: Query, sql: str, **kwargs) -> Optional[str]:
+        if isinstance(query, BatchInsertQuery):
+            self.run_batch_insert(query.sql, query.rows, **kwargs)
+            return None
+        return self.run_query(
+            sql,
+            is_ddl_on_temp_object=query.is_ddl_on_temp_object,
+            params=query.params,
+            **kwargs,
+        )["sfqid"]
+
+    @SnowflakePlan.Decorator.wrap_exception
+    def execute_async(
+        self, plan: SnowflakePlan, result_type: _AsyncResultType, **kwargs
+    ) -> AsyncJob:
+        """Executes the queries of ``plan`` before its last query, and submits the
+        last query without waiting for it. The post actions of ``plan`` are
+        executed by the returned job when its result is retrieved."""
+        action_id = plan.session._generate_new_action_id()
+        placeholders = {}
+        try:
+            with self._pooled_cursor() as cursor:
+                pre_queries = (
+                    []
+                    if self._execute_pre_queries_concurrently(
+                        plan, action_id, placeholders, **kwargs
+                    )
+                    else plan.queries[:-1]
+                )
+                for batch in self._multi_statement_batches(
+                    pre_queries, plan.session, plan.queries[-1:]
+                ):
+                    query = batch[0]
+                    if len(batch) > 1:
+                        self.run_multi_statement_query(
+                            batch, placeholders, cursor=cursor, **kwargs
+                        )
+                    elif isinstance(query, BatchInsertQuery):
+                        self.run_batch_insert(
+                            query.sql, query.rows, cursor=cursor, **kwargs
+                        )
+                    else:
+                        result = self.run_query(
+                            fill_slots(query.sql, placeholders),
+                            is_ddl_on_temp_object=query.is_ddl_on_temp_object,
+                            params=query.params,
+                            cursor=cursor,
+                            **kwargs,
+                        )
+                        placeholders[query.query_id_place_holder] = result["sfqid"]
+                last_query = plan.queries[-1]
+                final_query = fill_slots(last_query.sql, placeholders)
+                async_kwargs = dict(kwargs)
+                self._before_query(
+                    final_query, last_query.is_ddl_on_temp_object, async_kwargs
+                )
+                query_id = cursor.execute_async(
+                    final_query, last_query.params, **async_kwargs
+                )["queryId"]
+        except Exception:
+            self.run_post_actions(plan.post_actions, plan.session, **kwargs)
+            raise
+        self.notify_query_listeners(QueryRecord(query_id, final_query))
+        logger.debug(f"Execute async query [queryID: {query_id}] {final_query}")
+        return AsyncJob(
+            query_id,
+            final_query,
+            plan.session,
+            result_type,
+            post_actions=plan.post_actions,
+            **kwargs,
+        )
+
+    def is_query_done(self, query_id: str) -> bool:
+        status = self._conn.get_query_status(query_id)
+        return not self._conn.is_still_running(status)
+
+    @_Decorator.wrap_exception
+    def get_async_result(
+        self,
+        query_id: str,
+        result_type: _AsyncResultType,
+        session: "snowflake.snowpark.session.Session",
+    ) -> Any:
+        # a pooled cursor waits for the query, so that the other cursors can still
+        # execute other queries
+        with self._pooled_cursor() as cursor:
+            cursor.get_results_from_sfqid(query_id)
+            try:
+                if result_type == _AsyncResultType.PANDAS:
+                    try:
+                        return self._fix_pandas_df_integer(
+                            cursor.fetch_pandas_all(), cursor
+                        )
+                    except NotSupportedError:
+                        return cursor.fetchall()
+                result_set = cursor.fetchall()
+            except DatabaseError:
+                # the error of the query is more useful than the status of it
+                self._conn.get_query_status_throw_if_error(query_id)
+                raise
+            result_meta = cursor.description
+        if result_type == _AsyncResultType.NO_RESULT:
+            return None
+        if result_type == _AsyncResultType.COUNT:
+            return result_set_to_rows(result_set, result_meta)[0][0]
+        return self._to_rows(result_set, result_meta, session)
+
     def get_result_and_metadata(
         self, plan: SnowflakePlan, **kwargs
     ) -> Union[List[Row], List[Attribute]]:
@@ -436,40 +1049,43 @@ class ServerConnection:
         return result, meta
 
     @_Decorator.wrap_exception
-    def run_batch_insert(self, query: str, rows: List[Row], **kwargs) -> None:
+    def run_batch_insert(
+        self,
+        query: str,
+        rows: List[Row],
+        cursor: Optional[SnowflakeCursor] = None,
+        **kwargs,
+    ) -> None:
         # with qmark, Python data type will be dynamically mapped to Snowflake data type
         # https://docs.snowflake.com/en/user-guide/python-connector-api.html#data-type-mappings-for-qmark-and-numeric-bindings
         params = [list(row) for row in rows]
-        query_tag = (
-            kwargs["_statement_params"]["QUERY_TAG"]
-            if "_statement_params" in kwargs
-            and "QUERY_TAG" in kwargs["_statement_params"]
-            and not is_in_stored_procedure()
-            else None
-        )
-        if query_tag:
-            set_query_tag_cursor = self._cursor.execute(
-                f"alter session set query_tag='{query_tag}'"
-            )
-            self.notify_query_listeners(
-                QueryRecord(set_query_tag_cursor.sfqid, set_query_tag_cursor.query)
-            )
-        results_cursor = self._cursor.executemany(query, params)
-        self.notify_query_listeners(
-            QueryRecord(results_cursor.sfqid, results_cursor.query)
-        )
-        if query_tag:
-            unset_query_tag_cursor = self._cursor.execute(
-                "alter session unset query_tag"
-            )
+        query_tag = _batch_insert_query_tag(kwargs)
+        with self._pooled_cursor(cursor) as cursor:
+            if query_tag:
+                set_query_tag_cursor = cursor.execute(
+                    f"alter session set query_tag='{query_tag}'"
+                )
+                self.notify_query_listeners(
+                    QueryRecord(set_query_tag_cursor.sfqid, set_query_tag_cursor.query)
+                )
+            results_cursor = cursor.executemany(query, params)
             self.notify_query_listeners(
-                QueryRecord(unset_query_tag_cursor.sfqid, unset_query_tag_cursor.query)
+                QueryRecord(results_cursor.sfqid, results_cursor.query)
             )
+            if query_tag:
+                unset_query_tag_cursor = cursor.execute("alter session unset query_tag")
+                self.notify_query_listeners(
+                    QueryRecord(
+                        unset_query_tag_cursor.sfqid, unset_query_tag_cursor.query
+                    )
+                )
         logger.debug("Execute batch insertion query %s", query)
 
-    def _fix_pandas_df_integer(self, pd_df: "pandas.DataFrame") -> "pandas.DataFrame":
+    def _fix_pandas_df_integer(
+        self, pd_df: "pandas.DataFrame", cursor: SnowflakeCursor
+    ) -> "pandas.DataFrame":
         for column_metadata, pandas_dtype, pandas_col_name in zip(
-            self._cursor.description, pd_df.dtypes, pd_df.columns
+            cursor.description, pd_df.dtypes, pd_df.columns
         ):
             if (
                 FIELD_ID_TO_NAME.get(column_metadata.type_code) == "FIXED"
@@ -481,3 +1097,47 @@ class ServerConnection:
                     pd_df[pandas_col_name], downcast="integer"
                 )
         return pd_df
+
+
+def _batching_enabled(session: "snowflake.snowpark.session.Session") -> bool:
+    return session._multi_statement_batching_enabled and not is_in_stored_procedure()
+
+
+def _on_temp_object(query: Query) -> bool:
+    # whether the query creates, fills or drops a temporary object of Snowpark,
+    # which are the queries that are DDL on temporary objects or are declared
+    # with the queries they depend on by the plan builder
+    return query.is_ddl_on_temp_object or query.depends_on is not None
+
+
+def _pre_query_dependencies(queries: List[Query]) -> List[Set[int]]:
+    """Returns the indexes of the queries that each query in ``queries`` depends
+    on. A query that doesn't record its dependencies, or whose dependencies
+    aren't in ``queries``, depends on all the queries before it. A query that
+    records its dependencies also depends on the queries before it that may change
+    the state of the session, e.g., ``use schema``, which are the queries that
+    neither record their dependencies nor create or drop a temporary object."""
+    indexes = {q.query_id_place_holder: i for i, q in enumerate(queries)}
+    dependencies = []
+    session_queries = set()
+    for i, query in enumerate(queries):
+        if query.depends_on is not None and all(
+            p in indexes and indexes[p] < i for p in query.depends_on
+        ):
+            dependencies.append(
+                {indexes[p] for p in query.depends_on} | session_queries
+            )
+        else:
+            dependencies.append(set(range(i)))
+        if query.depends_on is None and not query.is_ddl_on_temp_object:
+            session_queries.add(i)
+    return dependencies
+
+
+def _batch_insert_query_tag(kwargs: Dict[str, Any]) -> Optional[str]:
+    """Returns the query tag that a batch insertion sets for the session while it
+    runs, if any."""
+    statement_params = kwargs.get("_statement_params")
+    if statement_params and not is_in_stored_procedure():
+        return statement_params.get("QUERY_TAG")
+    return None
@@ -9,25 +9,31 @@ import decimal
 import functools
 import hashlib
 import io
+import itertools
 import logging
 import os
 import platform
 import random
 import re
 import string
+import sys
+import threading
 import traceback
 import zipfile
+from collections import deque
 from enum import Enum
 from json import JSONEncoder
 from random import choice
-from typing import IO, Any, Iterator, List, Optional, Type
+from typing import IO, Any, Callable, Iterator, List, Optional, Type
 
 import snowflake.snowpark
+from snowflake.connector.constants import FIELD_ID_TO_NAME
 from snowflake.connector.cursor import ResultMetadata, SnowflakeCursor
 from snowflake.connector.description import OPERATING_SYSTEM, PLATFORM
+from snowflake.connector.options import pyarrow
 from snowflake.connector.version import VERSION as connector_version
 from snowflake.snowpark._internal.error_message import SnowparkClientExceptionMessages
-from snowflake.snowpark.row import Row
+from snowflake.snowpark.row import Row, _row_factory
 from snowflake.snowpark.version import VERSION as snowpark_version
 
 STAGE_PREFIX = "@"
@@ -58,6 +64,15 @@ SNOWFLAKE_STAGE_NAME_PATTERN = f"(%?{SNOWFLAKE_ID_PATTERN})"
 TEMP_OBJECT_NAME_PREFIX = "SNOWPARK_TEMP_"
 ALPHANUMERIC = string.digits + string.ascii_lowercase
 
+# The rows of an iterator are prefetched in chunks of this many rows
+PREFETCH_CHUNK_ROWS = 10000
+# The chunks of a result that are prefetched but not consumed take at most this
+# much memory, unless a single chunk is larger
+MAX_PREFETCH_BYTES = 256 * 1024 * 1024
+# The first version of the connector whose cursor records the query IDs of the
+# statements of a multi-statement request
+MULTI_STATEMENT_CONNECTOR_VERSION = (2, 9, 0)
+
 
 # A set of widely-used packages,
 # whose names in pypi are different from their package name
@@ -121,6 +136,7 @@ class TempObjectType(Enum):
     COLUMN = "COLUMN"
     PROCEDURE = "PROCEDURE"
     TABLE_FUNCTION = "TABLE_FUNCTION"
+    CTE = "CTE"
 
 
 def validate_object_name(name: str):
@@ -140,6 +156,10 @@ def get_connector_version() -> str:
     return ".".join([str(d) for d in connector_version if d is not None])
 
 
+def is_multi_statement_supported() -> bool:
+    return tuple(connector_version[:3]) >= MULTI_STATEMENT_CONNECTOR_VERSION
+
+
 def get_os_name() -> str:
     return platform.system()
 
@@ -418,6 +438,45 @@ def generate_random_alphanumeric(length: int = 10) -> str:
     return "".join(choice(ALPHANUMERIC) for _ in range(length))
 
 
+# the generator of the aliases in the current deterministic_aliases() block
+_alias_generator = threading.local()
+
+
+@contextlib.contextmanager
+def deterministic_aliases(seed: str) -> Iterator[None]:
+    """Derives the aliases generated by :func:`random_alias` in the block from
+    ``seed``, so that the same SQL is generated for the same seed."""
+    previous = getattr(_alias_generator, "random", None)
+    _alias_generator.random = random.Random(seed)
+    try:
+        yield
+    finally:
+        _alias_generator.random = previous
+
+
+def random_alias(length: int = 10) -> str:
+    """Returns a random alphanumeric string for an alias in the SQL of a query,
+    e.g., of a subquery or a column. Unlike the name of a temporary object, it
+    is derived from the seed of the enclosing :func:`deterministic_aliases` block."""
+    generator = getattr(_alias_generator, "random", None)
+    if generator is None:
+        return generate_random_alphanumeric(length)
+    return "".join(generator.choice(ALPHANUMERIC) for _ in range(length))
+
+
+def random_alias_for_temp_object(object_type: TempObjectType) -> str:
+    return f"{TEMP_OBJECT_NAME_PREFIX}{object_type.value}_{random_alias().upper()}"
+
+
+def stable_hash(*parts: str) -> str:
+    """Returns a hash of ``parts`` that is the same in every Python process."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
 def column_to_bool(col_):
     """A replacement to bool(col_) to check if ``col_`` is None or Empty.
 
@@ -433,28 +492,153 @@ def column_to_bool(col_):
 def result_set_to_rows(
     result_set: List[Any], result_meta: Optional[List[ResultMetadata]] = None
 ) -> List[Row]:
-    if result_meta:
-        col_names = [col.name for col in result_meta]
-        rows = []
-        for data in result_set:
-            row = Row(*data)
-            # row might have duplicated column names
-            row._fields = col_names
-            rows.append(row)
-    else:
-        rows = [Row(*row) for row in result_set]
-    return rows
+    # the rows share their column names, which might be duplicated
+    make_row = _row_factory([col.name for col in result_meta] if result_meta else None)
+    return [make_row(data) for data in result_set]
 
 
 def result_set_to_iter(
     result_set: SnowflakeCursor, result_meta: Optional[List[ResultMetadata]] = None
 ) -> Iterator[Row]:
-    col_names = [col.name for col in result_meta] if result_meta else None
+    make_row = _row_factory([col.name for col in result_meta] if result_meta else None)
     for data in result_set:
-        row = Row(*data)
-        if col_names:
-            row._fields = col_names
-        yield row
+        yield make_row(data)
+
+
+def _chunk_size(chunk: Any) -> int:
+    """Estimates the memory that a prefetched chunk takes."""
+    if isinstance(chunk, list):  # rows
+        return sys.getsizeof(chunk) + sum(map(sys.getsizeof, chunk))
+    elif hasattr(chunk, "memory_usage"):  # pandas DataFrame
+        return int(chunk.memory_usage(index=True).sum())
+    elif hasattr(chunk, "nbytes"):  # pyarrow RecordBatch
+        return chunk.nbytes
+    return sys.getsizeof(chunk)
+
+
+class ResultPrefetcher(Iterator[Any]):
+    """Retrieves the chunks of a result, e.g., pandas DataFrames, from an iterator
+    in a background thread, so the next chunks are downloaded while the current
+    one is processed.
+
+    At most ``depth`` chunks, which take at most ``max_bytes`` as estimated by
+    ``size``, are retrieved ahead of the consumer, but a chunk is always retrieved
+    if none is. :meth:`close` stops the thread and closes the iterator, e.g., to
+    release its cursor.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterator[Any],
+        depth: int,
+        size: Callable[[Any], int] = _chunk_size,
+        max_bytes: int = MAX_PREFETCH_BYTES,
+    ) -> None:
+        self._chunks = chunks
+        self._depth = depth
+        self._size = size
+        self._max_bytes = max_bytes
+        # the retrieved chunks and their sizes
+        self._buffer = deque()
+        #: The estimated memory of the chunks that are retrieved but not consumed.
+        self.buffered_bytes = 0
+        self._error: Optional[BaseException] = None
+        self._done = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._prefetch, name="snowpark-result-prefetcher", daemon=True
+        )
+        self._thread.start()
+
+    def _has_room(self, size: int) -> bool:
+        return not self._buffer or (
+            len(self._buffer) < self._depth
+            and self.buffered_bytes + size <= self._max_bytes
+        )
+
+    def _prefetch(self) -> None:
+        try:
+            for chunk in self._chunks:
+                size = self._size(chunk)
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: self._closed or self._has_room(size)
+                    )
+                    if self._closed:
+                        break
+                    self._buffer.append((chunk, size))
+                    self.buffered_bytes += size
+                    self._condition.notify_all()
+        except BaseException as ex:
+            self._error = ex
+        finally:
+            # the iterator is closed by the thread that runs it
+            close = getattr(self._chunks, "close", None)
+            if close is not None:
+                close()
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
+
+    def __next__(self) -> Any:
+        with self._condition:
+            self._condition.wait_for(lambda: self._buffer or self._done or self._closed)
+            if self._closed:
+                raise StopIteration
+            if self._buffer:
+                chunk, size = self._buffer.popleft()
+                self.buffered_bytes -= size
+                self._condition.notify_all()
+                return chunk
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            raise StopIteration
+
+    def close(self) -> None:
+        """Discards the retrieved chunks and waits for the thread to stop."""
+        with self._condition:
+            self._closed = True
+            self._buffer.clear()
+            self.buffered_bytes = 0
+            self._condition.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+def prefetch_chunks(chunks: Iterator[Any], depth: int) -> Iterator[Any]:
+    """Returns an iterator of ``chunks`` that retrieves up to ``depth`` chunks ahead
+    with a :class:`ResultPrefetcher`, which is closed with the returned iterator."""
+    prefetcher = ResultPrefetcher(chunks, depth)
+    try:
+        yield from prefetcher
+    finally:
+        prefetcher.close()
+
+
+def prefetch_rows(rows: Iterator[Row], depth: int) -> Iterator[Row]:
+    """Returns an iterator of ``rows`` that retrieves up to ``depth`` chunks of
+    :data:`PREFETCH_CHUNK_ROWS` rows ahead."""
+
+    def row_chunks() -> Iterator[List[Row]]:
+        try:
+            while True:
+                chunk = list(itertools.islice(rows, PREFETCH_CHUNK_ROWS))
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            close = getattr(rows, "close", None)
+            if close is not None:
+                close()
+
+    chunks = prefetch_chunks(row_chunks(), depth)
+    try:
+        for chunk in chunks:
+            yield from chunk
+    finally:
+        chunks.close()
 
 
 class PythonObjJSONEncoder(JSONEncoder):
@@ -498,3 +682,36 @@ def deprecate(*, deprecate_version, extra_warning_text="", extra_doc_string=""):
         return func_call_wrapper
 
     return deprecate_wrapper
+
+
+def _arrow_type(column: ResultMetadata) -> "pyarrow.DataType":
+    type_name = FIELD_ID_TO_NAME.get(column.type_code)
+    if type_name == "FIXED":
+        return (
+            pyarrow.decimal128(column.precision or 38, column.scale)
+            if column.scale
+            else pyarrow.int64()
+        )
+    if type_name in ("TIMESTAMP_LTZ", "TIMESTAMP_TZ"):
+        return pyarrow.timestamp("ns", tz="UTC")
+    return {
+        "REAL": pyarrow.float64(),
+        "BOOLEAN": pyarrow.bool_(),
+        "DATE": pyarrow.date32(),
+        "TIME": pyarrow.time64("ns"),
+        "TIMESTAMP_NTZ": pyarrow.timestamp("ns"),
+        "BINARY": pyarrow.binary(),
+    }.get(type_name, pyarrow.string())
+
+
+def rows_to_arrow_table(
+    rows: List[tuple], description: List[ResultMetadata]
+) -> "pyarrow.Table":
+    """Converts the rows of a result that isn't in the Arrow format to a table. The
+    types of the columns of an empty result are derived from its metadata."""
+    names = [column.name for column in description]
+    if rows:
+        arrays = [pyarrow.array(list(values)) for values in zip(*rows)]
+    else:
+        arrays = [pyarrow.array([], type=_arrow_type(c)) for c in description]
+    return pyarrow.Table.from_arrays(arrays, names=names)
@@ -0,0 +1,104 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Any, List, Optional
+
+import snowflake.snowpark
+
+if TYPE_CHECKING:
+    from snowflake.snowpark._internal.analyzer.snowflake_plan import Query
+
+
+# the seconds between the polls of the status of a query that is being canceled
+_CANCEL_POLL_INTERVAL = 0.1
+
+
+class _AsyncResultType(Enum):
+    ROW = "row"
+    PANDAS = "pandas"
+    COUNT = "count"
+    NO_RESULT = "no_result"
+
+
+class AsyncJob:
+    """Provides a way to track a query that is executed asynchronously in Snowflake,
+    and to retrieve its result when it finishes.
+
+    An :class:`AsyncJob` is returned by :meth:`DataFrame.collect_nowait`,
+    :meth:`DataFrame.to_pandas_nowait`, :meth:`DataFrame.count_nowait` and
+    :meth:`DataFrameWriter.save_as_table_nowait`. The queries that need to be
+    executed before the query of the DataFrame, e.g., to create a temporary table,
+    are executed before the job is returned, and the queries that clean up after it
+    are executed when its result is retrieved or it's canceled.
+
+    Example::
+
+        >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+        >>> jobs = [df.filter(df.a > i).collect_nowait() for i in range(3)]
+        >>> [job.result() for job in jobs]
+        [[Row(A=1, B=2), Row(A=3, B=4)], [Row(A=3, B=4)], [Row(A=3, B=4)]]
+    """
+
+    def __init__(
+        self,
+        query_id: str,
+        query: str,
+        session: "snowflake.snowpark.session.Session",
+        result_type: _AsyncResultType = _AsyncResultType.ROW,
+        post_actions: Optional[List["Query"]] = None,
+        **kwargs,
+    ) -> None:
+        #: The query ID of the asynchronous query in Snowflake.
+        self.query_id: str = query_id
+        #: The SQL text of the asynchronous query.
+        self.query: str = query
+        self._session = session
+        self._result_type = result_type
+        self._post_actions = post_actions if post_actions else []
+        # the arguments the post actions are executed with, e.g., the query tag
+        self._kwargs = kwargs
+        self._result: Any = None
+        self._has_result = False
+
+    def is_done(self) -> bool:
+        """Returns whether the query has finished, either successfully or not."""
+        return self._session._conn.is_query_done(self.query_id)
+
+    def cancel(self) -> None:
+        """Cancels the query if it is still running. It waits until the query
+        stops, so that the queries that clean up after it, e.g., drop the temporary
+        tables it reads, don't run while it's still reading them."""
+        self._session._conn.run_query(f"select system$cancel_query('{self.query_id}')")
+        while not self.is_done():
+            time.sleep(_CANCEL_POLL_INTERVAL)
+        self._execute_post_actions()
+
+    def result(self) -> Any:
+        """Blocks until the query finishes and returns its result, which is:
+
+        - a list of :class:`Row` objects, or a :class:`ResultSet` if
+          :attr:`Session.columnar_results_enabled` is ``True``, for
+          :meth:`DataFrame.collect_nowait`;
+        - a pandas DataFrame for :meth:`DataFrame.to_pandas_nowait`;
+        - an integer for :meth:`DataFrame.count_nowait`;
+        - ``None`` for :meth:`DataFrameWriter.save_as_table_nowait`.
+
+        The result is retrieved from Snowflake once, and later calls return it again.
+        """
+        if not self._has_result:
+            try:
+                self._result = self._session._conn.get_async_result(
+                    self.query_id, self._result_type, self._session
+                )
+            finally:
+                self._execute_post_actions()
+            self._has_result = True
+        return self._result
+
+    def _execute_post_actions(self) -> None:
+        post_actions, self._post_actions = self._post_actions, []
+        self._session._conn.run_post_actions(
+            post_actions, self._session, **self._kwargs
+        )
@@ -2,16 +2,27 @@
 #
 # Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
 #
+import contextlib
 import copy
 import itertools
 import re
 from collections import Counter
 from functools import cached_property
 from logging import getLogger
-from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import snowflake.snowpark
-from snowflake.connector.options import pandas
+from snowflake.connector.options import pandas, pyarrow
 from snowflake.snowpark._internal.analyzer.analyzer_utils import quote_name
 from snowflake.snowpark._internal.analyzer.binary_plan_node import (
     Cross,
@@ -26,6 +37,7 @@ from snowflake.snowpark._internal.analyzer.binary_plan_node import (
     UsingJoin,
     create_join_type,
 )
+from snowflake.snowpark._internal.analyzer.common_subplan import with_common_subplans
 from snowflake.snowpark._internal.analyzer.expression import (
     Attribute,
     Expression,
@@ -33,6 +45,7 @@ from snowflake.snowpark._internal.analyzer.expression import (
     NamedExpression,
     Star,
 )
+from snowflake.snowpark._internal.analyzer.snowflake_plan import SnowflakePlan
 from snowflake.snowpark._internal.analyzer.snowflake_plan_node import (
     CopyIntoTableNode,
     Limit,
@@ -75,15 +88,20 @@ from snowflake.snowpark._internal.utils import (
     column_to_bool,
     create_statement_query_tag,
     deprecate,
-    generate_random_alphanumeric,
+    deterministic_aliases,
     parse_positional_args_to_list,
+    prefetch_chunks,
+    random_alias,
     random_name_for_temp_object,
+    stable_hash,
     validate_object_name,
 )
+from snowflake.snowpark.async_job import AsyncJob, _AsyncResultType
 from snowflake.snowpark.column import Column, _to_col_if_sql_expr, _to_col_if_str
 from snowflake.snowpark.dataframe_na_functions import DataFrameNaFunctions
 from snowflake.snowpark.dataframe_stat_functions import DataFrameStatFunctions
 from snowflake.snowpark.dataframe_writer import DataFrameWriter
+from snowflake.snowpark.disk_result import DiskResult
 from snowflake.snowpark.exceptions import SnowparkDataframeException
 from snowflake.snowpark.functions import (
     abs as abs_,
@@ -114,7 +132,15 @@ _UNALIASED_REGEX = re.compile(f"""._[a-zA-Z0-9]{{{_NUM_PREFIX_DIGITS}}}_(.*)""")
 
 
 def _generate_prefix(prefix: str) -> str:
-    return f"{prefix}_{generate_random_alphanumeric(_NUM_PREFIX_DIGITS)}_"
+    return f"{prefix}_{random_alias(_NUM_PREFIX_DIGITS)}_"
+
+
+def _alias_scope(*dfs: "DataFrame") -> ContextManager[None]:
+    # the aliases are derived from the plans of the DataFrames they refer to when
+    # the session generates deterministic SQL
+    if not dfs[0]._session._deterministic_sql_enabled:
+        return contextlib.nullcontext()
+    return deterministic_aliases(stable_hash(*(df._plan.alias_seed for df in dfs)))
 
 
 def _get_unaliased(col_name: str) -> List[str]:
@@ -164,8 +190,9 @@ def _disambiguate(
         # We use the session of the LHS DataFrame to report this telemetry
         lhs._session._conn._telemetry_client.send_alias_in_join_telemetry()
 
-    lhs_prefix = _generate_prefix("l")
-    rhs_prefix = _generate_prefix("r")
+    with _alias_scope(lhs, rhs):
+        lhs_prefix = _generate_prefix("l")
+        rhs_prefix = _generate_prefix("r")
 
     lhs_remapped = lhs.select(
         [
@@ -410,7 +437,9 @@ class DataFrame:
         is_cached: bool = False,
     ) -> None:
         self._session = session
-        self._plan = session._analyzer.resolve(plan)
+        self._logical_plan = plan
+        if not session.lazy_analysis_enabled:
+            self._logical_plan.resolved_plan = session._analyzer.resolve(plan)
         self.is_cached: bool = is_cached  #: Whether it is a cached dataframe
 
         self._reader: Optional["snowflake.snowpark.DataFrameReader"] = None
@@ -428,6 +457,25 @@ class DataFrame:
         self.fillna = self._na.fill
         self.replace = self._na.replace
 
+    @property
+    def _plan(self) -> SnowflakePlan:
+        # the logical plan is resolved in __init__, or when it is first needed
+        # if the session analyzes DataFrames lazily
+        if self._logical_plan.resolved_plan is None:
+            self._logical_plan.resolved_plan = self._session._analyzer.resolve(
+                self._logical_plan
+            )
+        return self._logical_plan.resolved_plan
+
+    @property
+    def _execution_plan(self) -> SnowflakePlan:
+        # repeated subplans are only extracted into CTEs in the plan that is
+        # executed, so that the cached plan can still be nested in other plans.
+        # Every action executes this plan, or a command whose child is this plan.
+        if self._session._cte_optimization_enabled:
+            return with_common_subplans(self._plan)
+        return self._plan
+
     @property
     def stat(self) -> DataFrameStatFunctions:
         return self._stat
@@ -435,7 +483,8 @@ class DataFrame:
     @df_action_telemetry
     def collect(self) -> List["Row"]:
         """Executes the query representing this DataFrame and returns the result as a
-        list of :class:`Row` objects.
+        list of :class:`Row` objects, or as a :class:`ResultSet` if
+        :attr:`Session.columnar_results_enabled` is ``True``.
         """
         return self._internal_collect_with_tag()
 
@@ -444,7 +493,34 @@ class DataFrame:
         # we should always call this method instead of collect(), to make sure the
         # query tag is set properly.
         return self._session._conn.execute(
-            self._plan,
+            self._execution_plan,
+            _statement_params={"QUERY_TAG": create_statement_query_tag(3)}
+            if not self._session.query_tag
+            else None,
+        )
+
+    @df_action_telemetry
+    def collect_nowait(self) -> AsyncJob:
+        """Executes the query representing this DataFrame asynchronously and returns
+        an :class:`AsyncJob` without waiting for the query to finish. Its
+        :meth:`AsyncJob.result` returns the result as a list of :class:`Row` objects.
+
+        Example::
+
+            >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+            >>> job = df.collect_nowait()
+            >>> job.result()
+            [Row(A=1, B=2), Row(A=3, B=4)]
+        """
+        return self._internal_collect_async_with_tag(_AsyncResultType.ROW)
+
+    def _internal_collect_async_with_tag(
+        self, result_type: _AsyncResultType
+    ) -> AsyncJob:
+        # the asynchronous counterpart of _internal_collect_with_tag()
+        return self._session._conn.execute_async(
+            self._execution_plan,
+            result_type,
             _statement_params={"QUERY_TAG": create_statement_query_tag(3)}
             if not self._session.query_tag
             else None,
@@ -456,7 +532,8 @@ class DataFrame:
         of :class:`Row` objects that you can use to retrieve the results.
 
         Unlike :meth:`collect`, this method does not load all data into memory
-        at once.
+        at once. To download the next rows while you process the current ones, set
+        :attr:`Session.result_prefetch_depth`.
 
         Example::
 
@@ -467,7 +544,7 @@ class DataFrame:
             Row(PRODUCT_ID='id2', AMOUNT=Decimal('20.00'))
         """
         yield from self._session._conn.execute(
-            self._plan,
+            self._execution_plan,
             to_iter=True,
             _statement_params={"QUERY_TAG": create_statement_query_tag(3)}
             if not self._session.query_tag
@@ -477,6 +554,22 @@ class DataFrame:
     def __copy__(self) -> "DataFrame":
         return DataFrame(self._session, copy.copy(self._plan))
 
+    @df_action_telemetry
+    def to_pandas_nowait(self, **kwargs) -> AsyncJob:
+        """Executes the query representing this DataFrame asynchronously and returns
+        an :class:`AsyncJob` without waiting for the query to finish. Its
+        :meth:`AsyncJob.result` returns the result as a
+        `Pandas DataFrame <https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html>`_.
+
+        Note:
+            This method is only available if Pandas is installed and available.
+        """
+        if not self._session.query_tag:
+            kwargs["_statement_params"] = {"QUERY_TAG": create_statement_query_tag(2)}
+        return self._session._conn.execute_async(
+            self._execution_plan, _AsyncResultType.PANDAS, **kwargs
+        )
+
     @df_action_telemetry
     def to_pandas(self, **kwargs) -> "pandas.DataFrame":
         """
@@ -484,6 +577,7 @@ class DataFrame:
         `Pandas DataFrame <https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html>`_.
 
         When the data is too large to fit into memory, you can use :meth:`to_pandas_batches`.
+        To execute the query without waiting for it, use :meth:`to_pandas_nowait`.
 
         Note:
             1. This method is only available if Pandas is installed and available.
@@ -493,7 +587,9 @@ class DataFrame:
         """
         if not self._session.query_tag:
             kwargs["_statement_params"] = {"QUERY_TAG": create_statement_query_tag(2)}
-        result = self._session._conn.execute(self._plan, to_pandas=True, **kwargs)
+        result = self._session._conn.execute(
+            self._execution_plan, to_pandas=True, **kwargs
+        )
 
         # if the returned result is not a pandas dataframe, raise Exception
         # this might happen when calling this method with non-select commands
@@ -517,7 +613,8 @@ class DataFrame:
         retrieve the results.
 
         Unlike :meth:`to_pandas`, this method does not load all data into memory
-        at once.
+        at once. To download the next dataframes while you process the current
+        one, set :attr:`Session.result_prefetch_depth`.
 
         Example::
 
@@ -538,9 +635,99 @@ class DataFrame:
         if not self._session.query_tag:
             kwargs["_statement_params"] = {"QUERY_TAG": create_statement_query_tag(2)}
         yield from self._session._conn.execute(
-            self._plan, to_pandas=True, to_iter=True, **kwargs
+            self._execution_plan, to_pandas=True, to_iter=True, **kwargs
         )
 
+    @df_action_telemetry
+    def to_arrow(self, **kwargs) -> "pyarrow.Table":
+        """
+        Executes the query representing this DataFrame and returns the result as a
+        `pyarrow Table <https://arrow.apache.org/docs/python/generated/pyarrow.Table.html>`_.
+
+        The table is built from the Arrow result chunks of the query without
+        converting them to Pandas, so it can be passed to other libraries that
+        consume Arrow data without copying it. When the data is too large to fit
+        into memory, you can use :meth:`to_arrow_batches`.
+
+        Example::
+
+            >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+            >>> df.to_arrow().to_pydict()
+            {'A': [1, 3], 'B': [2, 4]}
+
+        Note:
+            This method is only available if pyarrow is installed and available.
+        """
+        if not self._session.query_tag:
+            kwargs["_statement_params"] = {"QUERY_TAG": create_statement_query_tag(2)}
+        return self._session._conn.execute(
+            self._execution_plan, to_arrow=True, **kwargs
+        )
+
+    @df_action_telemetry
+    def to_arrow_batches(self, **kwargs) -> Iterator["pyarrow.RecordBatch"]:
+        """
+        Executes the query representing this DataFrame and returns an iterator of
+        `pyarrow RecordBatches <https://arrow.apache.org/docs/python/generated/pyarrow.RecordBatch.html>`_
+        (containing a subset of rows) that you can use to retrieve the results.
+
+        Unlike :meth:`to_arrow`, this method does not load all data into memory
+        at once.
+
+        Example::
+
+            >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+            >>> for batch in df.to_arrow_batches():
+            ...     print(batch.to_pydict())
+            {'A': [1, 3], 'B': [2, 4]}
+
+        Note:
+            This method is only available if pyarrow is installed and available.
+        """
+        if not self._session.query_tag:
+            kwargs["_statement_params"] = {"QUERY_TAG": create_statement_query_tag(2)}
+        yield from self._session._conn.execute(
+            self._execution_plan, to_arrow=True, to_iter=True, **kwargs
+        )
+
+    @df_action_telemetry
+    def collect_to_disk(self, path: Optional[str] = None, **kwargs) -> DiskResult:
+        """
+        Executes the query representing this DataFrame, writes the result to an
+        Arrow IPC file on the local disk, and returns a :class:`DiskResult` that
+        memory-maps the file.
+
+        The Arrow result chunks of the query are written one at a time, so the
+        result can be larger than the memory. The file is deleted when the
+        :class:`DiskResult` is closed.
+
+        Args:
+            path: The directory that the file is written to, which is created if
+                it doesn't exist. If it's ``None``, the file is written to a new
+                temporary directory, which is deleted with the file.
+
+        Example::
+
+            >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+            >>> with df.collect_to_disk() as result:
+            ...     print(result.to_pandas())
+               A  B
+            0  1  2
+            1  3  4
+
+        Note:
+            This method is only available if pyarrow is installed and available.
+        """
+        if not self._session.query_tag:
+            kwargs["_statement_params"] = {"QUERY_TAG": create_statement_query_tag(2)}
+        batches, result_meta = self._session._conn.get_result_set(
+            self._execution_plan, to_arrow=True, to_iter=True, **kwargs
+        )
+        prefetch_depth = self._session._result_prefetch_depth
+        if prefetch_depth:
+            batches = prefetch_chunks(batches, prefetch_depth)
+        return DiskResult._write(batches, result_meta, path)
+
     def to_df(self, *names: Union[str, Iterable[str]]) -> "DataFrame":
         """
         Creates a new DataFrame containing columns with the specified names.
@@ -664,7 +851,7 @@ class DataFrame:
                     "The input of select() must be Column, column name, or a list of them"
                 )
 
-        return self._with_plan(Project(names, self._plan))
+        return self._with_plan(Project(names, self._logical_plan))
 
     def select_expr(self, *exprs: Union[str, Iterable[str]]) -> "DataFrame":
         """
@@ -778,7 +965,7 @@ class DataFrame:
         return self._with_plan(
             Filter(
                 _to_col_if_sql_expr(expr, "filter/where")._expression,
-                self._plan,
+                self._logical_plan,
             )
         )
 
@@ -870,7 +1057,7 @@ class DataFrame:
                     SortOrder(exprs[idx], orders[idx] if orders else Ascending())
                 )
 
-        return self._with_plan(Sort(sort_exprs, True, self._plan))
+        return self._with_plan(Sort(sort_exprs, True, self._logical_plan))
 
     def agg(
         self,
@@ -1122,7 +1309,8 @@ class DataFrame:
         rownum = row_number().over(
             snowflake.snowpark.Window.partition_by(*filter_cols).order_by(*filter_cols)
         )
-        rownum_name = generate_random_alphanumeric()
+        with _alias_scope(self):
+            rownum_name = random_alias()
         return (
             self.select(*output_cols, rownum.as_(rownum_name))
             .where(col(rownum_name) == 1)
@@ -1209,7 +1397,7 @@ class DataFrame:
         """
         column_exprs = self._convert_cols_to_exprs("unpivot()", column_list)
         return self._with_plan(
-            Unpivot(value_column, name_column, column_exprs, self._plan)
+            Unpivot(value_column, name_column, column_exprs, self._logical_plan)
         )
 
     def limit(self, n: int) -> "DataFrame":
@@ -1221,7 +1409,7 @@ class DataFrame:
         Args:
             n: Number of rows to return.
         """
-        return self._with_plan(Limit(Literal(n), self._plan))
+        return self._with_plan(Limit(Literal(n), self._logical_plan))
 
     def union(self, other: "DataFrame") -> "DataFrame":
         """Returns a new DataFrame that contains all the rows in the current DataFrame
@@ -1244,7 +1432,9 @@ class DataFrame:
         Args:
             other: the other :class:`DataFrame` that contains the rows to include.
         """
-        return self._with_plan(UnionPlan(self._plan, other._plan, is_all=False))
+        return self._with_plan(
+            UnionPlan([self._logical_plan, other._logical_plan], is_all=False)
+        )
 
     def union_all(self, other: "DataFrame") -> "DataFrame":
         """Returns a new DataFrame that contains all the rows in the current DataFrame
@@ -1269,7 +1459,9 @@ class DataFrame:
         Args:
             other: the other :class:`DataFrame` that contains the rows to include.
         """
-        return self._with_plan(UnionPlan(self._plan, other._plan, is_all=True))
+        return self._with_plan(
+            UnionPlan([self._logical_plan, other._logical_plan], is_all=True)
+        )
 
     @df_usage_telemetry
     def union_by_name(self, other: "DataFrame") -> "DataFrame":
@@ -1351,10 +1543,12 @@ class DataFrame:
         ]
 
         right_child = self._with_plan(
-            Project(right_project_list + not_found_attrs, other._plan)
+            Project(right_project_list + not_found_attrs, other._logical_plan)
         )
 
-        return self._with_plan(UnionPlan(self._plan, right_child._plan, is_all))
+        return self._with_plan(
+            UnionPlan([self._logical_plan, right_child._logical_plan], is_all)
+        )
 
     def intersect(self, other: "DataFrame") -> "DataFrame":
         """Returns a new DataFrame that contains the intersection of rows from the
@@ -1377,7 +1571,7 @@ class DataFrame:
             other: the other :class:`DataFrame` that contains the rows to use for the
                 intersection.
         """
-        return self._with_plan(Intersect(self._plan, other._plan))
+        return self._with_plan(Intersect(self._logical_plan, other._logical_plan))
 
     def except_(self, other: "DataFrame") -> "DataFrame":
         """Returns a new DataFrame that contains all the rows from the current DataFrame
@@ -1400,7 +1594,7 @@ class DataFrame:
         Args:
             other: The :class:`DataFrame` that contains the rows to exclude.
         """
-        return self._with_plan(Except(self._plan, other._plan))
+        return self._with_plan(Except(self._logical_plan, other._logical_plan))
 
     def natural_join(
         self, right: "DataFrame", join_type: Optional[str] = None
@@ -1439,8 +1633,8 @@ class DataFrame:
         join_type = join_type or "inner"
         return self._with_plan(
             Join(
-                self._plan,
-                right._plan,
+                self._logical_plan,
+                right._logical_plan,
                 NaturalJoin(create_join_type(join_type)),
                 None,
             )
@@ -1661,7 +1855,9 @@ class DataFrame:
         func_expr = _create_table_function_expression(
             func, *func_arguments, **func_named_arguments
         )
-        return DataFrame(self._session, TableFunctionJoin(self._plan, func_expr))
+        return DataFrame(
+            self._session, TableFunctionJoin(self._logical_plan, func_expr)
+        )
 
     def cross_join(self, right: "DataFrame") -> "DataFrame":
         """Performs a cross join, which returns the Cartesian product of the current
@@ -1714,8 +1910,8 @@ class DataFrame:
             lhs, rhs = _disambiguate(self, right, join_type, using_columns)
             return self._with_plan(
                 Join(
-                    lhs._plan,
-                    rhs._plan,
+                    lhs._logical_plan,
+                    rhs._logical_plan,
                     UsingJoin(join_type, using_columns),
                     None,
                 )
@@ -1728,8 +1924,8 @@ class DataFrame:
         expression = join_exprs._expression if join_exprs is not None else None
         return self._with_plan(
             Join(
-                lhs._plan,
-                rhs._plan,
+                lhs._logical_plan,
+                rhs._logical_plan,
                 join_type,
                 expression,
             )
@@ -1819,6 +2015,22 @@ class DataFrame:
         """
         return self.agg(("*", "count"))._internal_collect_with_tag()[0][0]
 
+    @df_action_telemetry
+    def count_nowait(self) -> AsyncJob:
+        """Executes the query that counts the rows of this DataFrame asynchronously
+        and returns an :class:`AsyncJob` without waiting for the query to finish.
+        Its :meth:`AsyncJob.result` returns the number of rows.
+
+        Example::
+
+            >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+            >>> df.count_nowait().result()
+            2
+        """
+        return self.agg(("*", "count"))._internal_collect_async_with_tag(
+            _AsyncResultType.COUNT
+        )
+
     @property
     def write(self) -> DataFrameWriter:
         """Returns a new :class:`DataFrameWriter` object that you can use to write the data in the :class:`DataFrame` to
@@ -2086,12 +2298,12 @@ class DataFrame:
         result_columns = [
             attr.name
             for attr in self._session._analyzer.resolve(
-                Lateral(self._plan, table_function)
+                Lateral(self._logical_plan, table_function)
             ).attributes
         ]
         common_col_names = [k for k, v in Counter(result_columns).items() if v > 1]
         if len(common_col_names) == 0:
-            return DataFrame(self._session, Lateral(self._plan, table_function))
+            return DataFrame(self._session, Lateral(self._logical_plan, table_function))
         prefix = _generate_prefix("a")
         child = self.select(
             [
@@ -2099,18 +2311,18 @@ class DataFrame:
                 for attr in self._output
             ]
         )
-        return DataFrame(self._session, Lateral(child._plan, table_function))
+        return DataFrame(self._session, Lateral(child._logical_plan, table_function))
 
     def _show_string(self, n: int = 10, max_width: int = 50, **kwargs) -> str:
         query = self._plan.queries[-1].sql.strip().lower()
 
         if query.startswith("select"):
             result, meta = self._session._conn.get_result_and_metadata(
-                self.limit(n)._plan, **kwargs
+                self.limit(n)._execution_plan, **kwargs
             )
         else:
             res, meta = self._session._conn.get_result_and_metadata(
-                self._plan, **kwargs
+                self._execution_plan, **kwargs
             )
             result = res[:n]
 
@@ -2248,7 +2460,7 @@ class DataFrame:
         cmd = CreateViewCommand(
             view_name,
             view_type,
-            self._plan,
+            self._execution_plan,
         )
 
         return self._session._conn.execute(
@@ -2292,7 +2504,7 @@ class DataFrame:
         """
         DataFrame._validate_sample_input(frac, n)
         return self._with_plan(
-            Sample(self._plan, probability_fraction=frac, row_count=n)
+            Sample(self._logical_plan, probability_fraction=frac, row_count=n)
         )
 
     @staticmethod
@@ -2490,7 +2702,7 @@ class DataFrame:
         """
         temp_table_name = random_name_for_temp_object(TempObjectType.TABLE)
         create_temp_table = self._session._plan_builder.create_temp_table(
-            temp_table_name, self._plan
+            temp_table_name, self._execution_plan
         )
         self._session._conn.execute(
             create_temp_table,
@@ -2571,9 +2783,10 @@ class DataFrame:
         evaluate this DataFrame with the key `queries`, and a list of post-execution
         actions (e.g., queries to clean up temporary objects) with the key `post_actions`.
         """
+        plan = self._execution_plan
         return {
-            "queries": [query.sql.strip() for query in self._plan.queries],
-            "post_actions": [query.sql.strip() for query in self._plan.post_actions],
+            "queries": [query.sql.strip() for query in plan.queries],
+            "post_actions": [query.sql.strip() for query in plan.post_actions],
         }
 
     def explain(self) -> None:
@@ -2587,19 +2800,20 @@ class DataFrame:
         print(self._explain_string())
 
     def _explain_string(self) -> str:
+        plan = self._execution_plan
         output_queries = "\n---\n".join(
-            f"{i+1}.\n{query.sql.strip()}" for i, query in enumerate(self._plan.queries)
+            f"{i+1}.\n{query.sql.strip()}" for i, query in enumerate(plan.queries)
         )
         msg = f"""---------DATAFRAME EXECUTION PLAN----------
 Query List:
 {output_queries}"""
         # if query list contains more then one queries, skip execution plan
-        if len(self._plan.queries) == 1:
-            exec_plan = self._session._explain_query(self._plan.queries[0].sql)
+        if len(plan.queries) == 1:
+            exec_plan = self._session._explain_query(plan.queries[0].sql)
             if exec_plan:
                 msg = f"{msg}\nLogical Execution Plan:\n{exec_plan}"
             else:
-                msg = f"{self._plan.queries[0].sql} can't be explained"
+                msg = f"{plan.queries[0].sql} can't be explained"
 
         return f"{msg}\n--------------------------------------------"
 
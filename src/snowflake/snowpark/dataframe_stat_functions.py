@@ -2,11 +2,11 @@
 # Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
 #
 
-from functools import reduce
 from typing import Dict, Iterable, List, Optional, Union
 
 import snowflake.snowpark
 from snowflake.snowpark import Column
+from snowflake.snowpark._internal.analyzer.binary_plan_node import Union as UnionPlan
 from snowflake.snowpark._internal.error_message import SnowparkClientExceptionMessages
 from snowflake.snowpark._internal.type_utils import ColumnOrName, LiteralType
 from snowflake.snowpark.functions import (
@@ -199,11 +199,13 @@ class DataFrameStatFunctions:
         if not fractions:
             return self._df.limit(0)
         col = _to_col_if_str(col, "sample_by")
-        res_df = reduce(
-            lambda x, y: x.union_all(y),
-            [self._df.filter(col == k).sample(v) for k, v in fractions.items()],
+        samples = [self._df.filter(col == k).sample(v) for k, v in fractions.items()]
+        if len(samples) == 1:
+            return samples[0]
+        # all samples are unioned in a single set operation
+        return self._df._with_plan(
+            UnionPlan([df._logical_plan for df in samples], is_all=True)
         )
-        return res_df
 
     approxQuantile = approx_quantile
     sampleBy = sample_by
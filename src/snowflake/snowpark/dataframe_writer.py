@@ -5,6 +5,7 @@
 from typing import Dict, Iterable, List, Optional, Union
 
 import snowflake.snowpark  # for forward references of type hints
+from snowflake.snowpark._internal.analyzer.snowflake_plan import SnowflakePlan
 from snowflake.snowpark._internal.analyzer.snowflake_plan_node import (
     CopyIntoLocationNode,
     SaveMode,
@@ -17,6 +18,7 @@ from snowflake.snowpark._internal.utils import (
     str_to_enum,
     validate_object_name,
 )
+from snowflake.snowpark.async_job import AsyncJob, _AsyncResultType
 from snowflake.snowpark.column import Column
 from snowflake.snowpark.functions import sql_expr
 from snowflake.snowpark.row import Row
@@ -97,6 +99,42 @@ class DataFrameWriter:
             >>> session.table("my_table").collect()
             [Row(A=1, B=2), Row(A=3, B=4), Row(A=1, B=2), Row(A=3, B=4)]
         """
+        self._dataframe._session._conn.execute(
+            self._save_as_table_plan(table_name, mode, create_temp_table)
+        )
+
+    @dfw_action_telemetry
+    def save_as_table_nowait(
+        self,
+        table_name: Union[str, Iterable[str]],
+        *,
+        mode: Optional[str] = None,
+        create_temp_table: bool = False,
+    ) -> AsyncJob:
+        """Writes the data to the specified table in a Snowflake database like
+        :meth:`save_as_table`, but executes the query asynchronously and returns an
+        :class:`AsyncJob` without waiting for the query to finish. Its
+        :meth:`AsyncJob.result` returns ``None`` when the table is written.
+
+        Examples::
+
+            >>> df = session.create_dataframe([[1,2],[3,4]], schema=["a", "b"])
+            >>> job = df.write.save_as_table_nowait("my_table", mode="overwrite", create_temp_table=True)
+            >>> job.result()
+            >>> session.table("my_table").collect()
+            [Row(A=1, B=2), Row(A=3, B=4)]
+        """
+        return self._dataframe._session._conn.execute_async(
+            self._save_as_table_plan(table_name, mode, create_temp_table),
+            _AsyncResultType.NO_RESULT,
+        )
+
+    def _save_as_table_plan(
+        self,
+        table_name: Union[str, Iterable[str]],
+        mode: Optional[str],
+        create_temp_table: bool,
+    ) -> SnowflakePlan:
         save_mode = (
             str_to_enum(mode.lower(), SaveMode, "'mode'") if mode else self._save_mode
         )
@@ -107,12 +145,10 @@ class DataFrameWriter:
         create_table_logic_plan = SnowflakeCreateTable(
             full_table_name,
             save_mode,
-            self._dataframe._plan,
+            self._dataframe._execution_plan,
             create_temp_table,
         )
-        session = self._dataframe._session
-        snowflake_plan = session._analyzer.resolve(create_table_logic_plan)
-        session._conn.execute(snowflake_plan)
+        return self._dataframe._session._analyzer.resolve(create_table_logic_plan)
 
     def copy_into_location(
         self,
@@ -172,7 +208,7 @@ class DataFrameWriter:
             )
         return self._dataframe._with_plan(
             CopyIntoLocationNode(
-                self._dataframe._plan,
+                self._dataframe._execution_plan,
                 stage_location,
                 partition_by=partition_by,
                 file_format_name=file_format_name,
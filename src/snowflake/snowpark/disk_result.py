@@ -0,0 +1,233 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import os
+import shutil
+import tempfile
+import weakref
+from logging import getLogger
+from typing import Iterator, List, Optional, Union
+
+from snowflake.connector.constants import FIELD_ID_TO_NAME
+from snowflake.connector.cursor import ResultMetadata
+from snowflake.connector.options import pyarrow
+from snowflake.snowpark._internal.utils import (
+    generate_random_alphanumeric,
+    rows_to_arrow_table,
+)
+
+_logger = getLogger(__name__)
+
+
+def _delete_files(path: str, directory: Optional[str]) -> None:
+    # directory is the temporary directory that was created for the file, if any
+    try:
+        if directory:
+            shutil.rmtree(directory)
+        else:
+            os.remove(path)
+    except OSError as ex:
+        _logger.warning(f"Failed to delete the result file {path}: {ex}")
+
+
+def _widen_type(datatype: "pyarrow.DataType") -> "pyarrow.DataType":
+    if pyarrow.types.is_integer(datatype):
+        return pyarrow.int64()
+    if pyarrow.types.is_decimal(datatype):
+        return pyarrow.decimal128(38, datatype.scale)
+    return datatype
+
+
+def _file_type(
+    column: ResultMetadata, datatype: "pyarrow.DataType"
+) -> "pyarrow.DataType":
+    # A chunk stores a NUMBER column as integers of the smallest width that fits
+    # its values, or as decimals if they don't fit in 64 bits, so the type of the
+    # column in the file is derived from its precision and scale instead.
+    if FIELD_ID_TO_NAME.get(column.type_code) != "FIXED":
+        return datatype
+    if not column.scale and column.precision is not None and column.precision <= 18:
+        return pyarrow.int64()
+    return pyarrow.decimal128(38, column.scale or 0)
+
+
+def _file_schema(
+    schema: "pyarrow.Schema", result_meta: Optional[List[ResultMetadata]]
+) -> "pyarrow.Schema":
+    # the chunks of a result may store the same number column with different
+    # types, so the file stores every number column with the same type
+    if not result_meta or len(result_meta) != len(schema):
+        return pyarrow.schema(
+            [field.with_type(_widen_type(field.type)) for field in schema]
+        )
+    return pyarrow.schema(
+        [
+            field.with_type(_file_type(column, field.type))
+            for field, column in zip(schema, result_meta)
+        ]
+    )
+
+
+class DiskResult:
+    """Represents the result of :meth:`DataFrame.collect_to_disk`, which is stored in
+    an `Arrow IPC file <https://arrow.apache.org/docs/python/ipc.html>`_ (also known
+    as Feather V2) on the local disk instead of in memory.
+
+    The file is memory-mapped, so the Arrow tables, pandas DataFrames and NumPy
+    arrays that are retrieved from it are backed by the file instead of a copy of
+    its data whenever their types allow it, and a result that is larger than the
+    memory can be processed one batch or column at a time.
+
+    Closing it, or leaving the ``with`` block that it's used in, deletes the file.
+    If it's not closed, the file is deleted when it's garbage collected or when
+    Python exits.
+
+    The types of the columns are derived from the metadata of the result, so that
+    every chunk of it is stored with the same types: a ``NUMBER`` column with a
+    scale of 0 is stored as 64-bit integers if its precision is at most 18, and
+    otherwise, like any other ``NUMBER`` column, as decimals with a precision of 38.
+
+    Example::
+
+        >>> df = session.create_dataframe([[1.5, "x"], [2.5, "y"]], schema=["a", "b"])
+        >>> with df.collect_to_disk() as result:
+        ...     print(result.num_rows, result.to_arrow().to_pydict())
+        2 {'A': [1.5, 2.5], 'B': ['x', 'y']}
+    """
+
+    def __init__(self, path: str, directory: Optional[str] = None) -> None:
+        #: The path of the Arrow IPC file.
+        self.path: str = path
+        self._source = pyarrow.memory_map(path)
+        self._reader = pyarrow.ipc.open_file(self._source)
+        self._finalizer = weakref.finalize(self, _delete_files, path, directory)
+
+    @classmethod
+    def _write(
+        cls,
+        batches: Iterator["pyarrow.RecordBatch"],
+        result_meta: Optional[List[ResultMetadata]],
+        path: Optional[str] = None,
+    ) -> "DiskResult":
+        """Writes ``batches`` to a new file in the directory ``path``, or in a new
+        temporary directory, without keeping more than one batch in memory."""
+        if path is None:
+            directory = tempfile.mkdtemp(prefix="snowpark_result_")
+        else:
+            directory = None
+            os.makedirs(path, exist_ok=True)
+        file_path = os.path.join(
+            directory or path, f"result_{generate_random_alphanumeric()}.arrow"
+        )
+        writer = None
+        try:
+            with pyarrow.OSFile(file_path, "wb") as sink:
+                for batch in batches:
+                    if writer is None:
+                        schema = _file_schema(batch.schema, result_meta)
+                        writer = pyarrow.ipc.new_file(sink, schema)
+                    if batch.schema.equals(schema):
+                        writer.write_batch(batch)
+                    else:
+                        writer.write_table(
+                            pyarrow.Table.from_batches([batch]).cast(schema)
+                        )
+                if writer is None:
+                    # the types of the columns of an empty result are derived from
+                    # its metadata
+                    schema = rows_to_arrow_table([], result_meta or []).schema
+                    writer = pyarrow.ipc.new_file(
+                        sink, _file_schema(schema, result_meta)
+                    )
+                writer.close()
+        except BaseException:
+            _delete_files(file_path, directory)
+            raise
+        finally:
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()
+        return cls(file_path, directory)
+
+    def _check_open(self) -> None:
+        if self.closed:
+            raise ValueError(f"The result file {self.path} is closed.")
+
+    @property
+    def closed(self) -> bool:
+        """Whether the result is closed and its file is deleted."""
+        return not self._finalizer.alive
+
+    @property
+    def schema(self) -> "pyarrow.Schema":
+        """The Arrow schema of the result."""
+        self._check_open()
+        return self._reader.schema
+
+    @property
+    def num_rows(self) -> int:
+        """The number of rows of the result."""
+        return sum(batch.num_rows for batch in self.to_arrow_batches())
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """Returns the result as a
+        `pyarrow Table <https://arrow.apache.org/docs/python/generated/pyarrow.Table.html>`_
+        whose columns are backed by the file."""
+        self._check_open()
+        return self._reader.read_all()
+
+    def to_arrow_batches(self) -> Iterator["pyarrow.RecordBatch"]:
+        """Returns an iterator of the
+        `pyarrow RecordBatches <https://arrow.apache.org/docs/python/generated/pyarrow.RecordBatch.html>`_
+        of the result, which are backed by the file."""
+        self._check_open()
+        for i in range(self._reader.num_record_batches):
+            yield self._reader.get_batch(i)
+
+    def to_pandas(self, **kwargs) -> "pandas.DataFrame":
+        """Returns the result as a Pandas DataFrame.
+
+        Args:
+            kwargs: The arguments of
+                `pyarrow.Table.to_pandas() <https://arrow.apache.org/docs/python/generated/pyarrow.Table.html#pyarrow.Table.to_pandas>`_,
+                e.g., ``split_blocks=True``, which lets the columns that don't have
+                nulls be backed by the file.
+        """
+        return self.to_arrow().to_pandas(**kwargs)
+
+    def to_pandas_batches(self, **kwargs) -> Iterator["pandas.DataFrame"]:
+        """Returns an iterator of Pandas DataFrames, one for each batch of the
+        result, which is converted with the given arguments like :meth:`to_pandas`."""
+        for batch in self.to_arrow_batches():
+            yield batch.to_pandas(**kwargs)
+
+    def column(self, item: Union[int, str]) -> "pyarrow.ChunkedArray":
+        """Returns a column of the result, given its index or name, which is backed
+        by the file."""
+        return self.to_arrow().column(item)
+
+    def to_numpy(self, item: Union[int, str]) -> "numpy.ndarray":
+        """Returns a column of the result, given its index or name, as a NumPy
+        array. The array is backed by the file if the result has one batch and the
+        column has a numeric type and no nulls, and is a copy otherwise."""
+        column = self.column(item)
+        if column.num_chunks == 1:
+            return column.chunk(0).to_numpy(zero_copy_only=False)
+        return column.to_numpy()
+
+    def close(self) -> None:
+        """Deletes the file of the result. The Arrow tables, Pandas DataFrames and
+        NumPy arrays that are backed by the file remain valid on the platforms that
+        allow deleting a memory-mapped file, like Linux and macOS."""
+        if not self.closed:
+            self._source.close()
+            self._finalizer()
+
+    def __enter__(self) -> "DiskResult":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"DiskResult({self.path!r}{', closed' if self.closed else ''})"
@@ -98,10 +98,10 @@ class FileOperation:
         }
         if is_in_stored_procedure():
             try:
-                cursor = self._session._conn._cursor
-                cursor._upload(local_file_name, stage_location, options)
-                result_meta = cursor.description
-                result_data = cursor.fetchall()
+                with self._session._conn._pooled_cursor() as cursor:
+                    cursor._upload(local_file_name, stage_location, options)
+                    result_meta = cursor.description
+                    result_data = cursor.fetchall()
                 put_result = result_set_to_rows(result_data, result_meta)
             except ProgrammingError as pe:
                 tb = sys.exc_info()[2]
@@ -175,10 +175,10 @@ class FileOperation:
         try:
             if is_in_stored_procedure():
                 try:
-                    cursor = self._session._conn._cursor
-                    cursor._download(stage_location, target_directory, options)
-                    result_meta = cursor.description
-                    result_data = cursor.fetchall()
+                    with self._session._conn._pooled_cursor() as cursor:
+                        cursor._download(stage_location, target_directory, options)
+                        result_meta = cursor.description
+                        result_data = cursor.fetchall()
                     get_result = result_set_to_rows(result_data, result_meta)
                 except ProgrammingError as pe:
                     tb = sys.exc_info()[2]
@@ -169,6 +169,7 @@ The return type is always ``Column``. The input types tell you the acceptable va
     <BLANKLINE>
 """
 import functools
+import operator
 from random import randint
 from types import ModuleType
 from typing import Callable, Iterable, List, Optional, Tuple, Union, overload
@@ -732,6 +733,71 @@ def not_(e: ColumnOrName) -> Column:
     return ~c
 
 
+def all_of(*conditions: Union[ColumnOrSqlExpr, Iterable[ColumnOrSqlExpr]]) -> Column:
+    """Returns true if all the specified conditions are true, which is equivalent to
+    combining them with ``&``. The conditions are combined as a balanced tree instead
+    of a chain, so the SQL generated for a large number of conditions isn't deeply nested.
+
+    Example::
+
+        >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+        >>> df.filter(all_of([col("a") > 1, col("b") > 1])).collect()
+        [Row(A=3, B=4)]
+
+    Args:
+        conditions: The :class:`Column` expressions or SQL text of the conditions,
+            or a list of them.
+    """
+    return _balanced_tree(
+        operator.and_,
+        [
+            _to_col_if_sql_expr(c, "all_of")
+            for c in parse_positional_args_to_list(*conditions)
+        ],
+        "all_of",
+    )
+
+
+def any_of(*conditions: Union[ColumnOrSqlExpr, Iterable[ColumnOrSqlExpr]]) -> Column:
+    """Returns true if any of the specified conditions is true, which is equivalent to
+    combining them with ``|``. The conditions are combined as a balanced tree instead
+    of a chain, so the SQL generated for a large number of conditions isn't deeply nested.
+
+    Example::
+
+        >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+        >>> df.filter(any_of([col("a") == i for i in range(3)])).collect()
+        [Row(A=1, B=2)]
+
+    Args:
+        conditions: The :class:`Column` expressions or SQL text of the conditions,
+            or a list of them.
+    """
+    return _balanced_tree(
+        operator.or_,
+        [
+            _to_col_if_sql_expr(c, "any_of")
+            for c in parse_positional_args_to_list(*conditions)
+        ],
+        "any_of",
+    )
+
+
+def _balanced_tree(
+    op: Callable[[Column, Column], Column], cols: List[Column], function_name: str
+) -> Column:
+    if not cols:
+        raise ValueError(f"{function_name}() needs at least one condition")
+    # combine adjacent pairs until one column is left, so the order of the
+    # conditions is kept and the depth of the tree is logarithmic
+    while len(cols) > 1:
+        cols = [
+            op(cols[i], cols[i + 1]) if i + 1 < len(cols) else cols[i]
+            for i in range(0, len(cols), 2)
+        ]
+    return cols[0]
+
+
 def random(seed: Optional[int] = None) -> Column:
     """Each call returns a pseudo-random 64-bit integer."""
     s = seed if seed is not None else randint(-(2**63), 2**63 - 1)
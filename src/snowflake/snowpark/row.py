@@ -2,7 +2,23 @@
 #
 # Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
 #
-from typing import Any, Dict, Iterable, Union
+from functools import lru_cache, partial
+from operator import itemgetter
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 
 def _restore_row_from_pickle(values, named_values, fields):
@@ -14,6 +30,47 @@ def _restore_row_from_pickle(values, named_values, fields):
     return row
 
 
+@lru_cache(maxsize=1024)
+def _row_class(fields: Tuple[str, ...], length: int) -> Type["Row"]:
+    """Returns the subclass of :class:`Row` for rows of ``length`` values with the
+    given column names.
+
+    The column names, and a map from each name to the index of its first
+    occurrence, are stored once in the class and shared by all its rows, so a row
+    is just a tuple. A value is read by name with a dict lookup, and by attribute
+    with a property of the class.
+    """
+    field_index = {}
+    # a row may have more column names than values
+    for index, name in enumerate(fields[:length]):
+        field_index.setdefault(name, index)
+    namespace = {
+        name: property(itemgetter(index))
+        for name, index in field_index.items()
+        # methods of Row take precedence over columns with the same name
+        if not hasattr(Row, name)
+    }
+    namespace.update(
+        __slots__=(),
+        __module__=Row.__module__,
+        __qualname__=Row.__qualname__,
+        _fields=fields,
+        _field_index=MappingProxyType(field_index),
+        _has_duplicates=len(set(fields)) != len(fields),
+    )
+    return type("Row", (Row,), namespace)
+
+
+def _row_factory(
+    fields: Optional[Sequence[str]] = None,
+) -> Callable[[Iterable[Any]], "Row"]:
+    """Returns a function that creates a :class:`Row` with the given column names
+    from a sequence of values. The column names are processed once, so it's used
+    to create all rows of a result."""
+    cls = _row_class(tuple(fields), len(fields)) if fields else Row
+    return partial(tuple.__new__, cls)
+
+
 class Row(tuple):
     """Represents a row in :class:`DataFrame`.
 
@@ -50,28 +107,40 @@ class Row(tuple):
 
     """
 
+    # A row doesn't have a __dict__. Its column names are stored in its class:
+    # rows with the same column names and number of values are instances of the
+    # same subclass of Row, which is created by _row_class(), and setting _fields
+    # changes the class of a row.
+    __slots__ = ()
+
+    # _fields is for internal use only. Users shouldn't set this attribute.
+    # It contains a tuple of str representing column names. It also allows duplicates.
+    # snowflake DB can return duplicate column names, for instance, "select a, a from a_table."
+    # When return a DataFrame from a sql, duplicate column names can happen.
+    # But using duplicate column names is obviously a bad practice even though we allow it.
+    # A name that occurs more than once refers to its first occurrence.
+    _fields: Optional[Tuple[str, ...]] = None
+    _field_index: Mapping[str, int] = MappingProxyType({})
+    _has_duplicates: bool = False
+
     def __new__(cls, *values: Any, **named_values: Any):
         if values and named_values:
             raise ValueError("Either values or named_values is required but not both.")
         if named_values:
             # After py3.7, dict is ordered(not sorted) by item insertion sequence.
             # If we support 3.6 or older someday, this implementation needs changing.
-            row = tuple.__new__(cls, tuple(named_values.values()))
-            row.__dict__["_named_values"] = named_values
-            row.__dict__["_fields"] = tuple(named_values.keys())
-        else:
-            row = tuple.__new__(cls, values)
-            row.__dict__["_named_values"] = None
-            row.__dict__["_fields"] = None
-
-        # _fields is for internal use only. Users shouldn't set this attribute.
-        # It contains a list of str representing column names. It also allows duplicates.
-        # snowflake DB can return duplicate column names, for instance, "select a, a from a_table."
-        # When return a DataFrame from a sql, duplicate column names can happen.
-        # But using duplicate column names is obviously a bad practice even though we allow it.
-        # It's value is assigned in __setattr__ if internal code assign value explicitly.
-        row.__dict__["_has_duplicates"] = None
-        return row
+            return tuple.__new__(
+                _row_class(tuple(named_values), len(named_values)),
+                tuple(named_values.values()),
+            )
+        return tuple.__new__(cls, values)
+
+    @property
+    def _named_values(self) -> Optional[Dict[str, Any]]:
+        # the values by column name, if the row has column names without duplicates
+        if not self._fields or self._has_duplicates:
+            return None
+        return dict(zip(self._fields, self))
 
     def __getitem__(self, item: Union[int, str, slice]):
         if isinstance(item, int):
@@ -79,50 +148,24 @@ class Row(tuple):
         elif isinstance(item, slice):
             return Row(*super().__getitem__(item))
         else:  # str
-            self._populate_named_values_from_fields()
-            # get from _named_values first
-            if self._named_values:
-                return self._named_values[item]
-            # we have duplicated fields and _named_values is not populated,
-            # so indexing fields
-            elif self._fields and self._check_if_having_duplicates():
-                try:
-                    index = self._fields.index(item)  # may throw ValueError
-                    return super().__getitem__(index)  # may throw IndexError
-                except (IndexError, ValueError):
-                    raise KeyError(item)
-            # no column names/keys/fields
-            else:
-                raise KeyError(item)
+            return super().__getitem__(self._field_index[item])
 
     def __setitem__(self, key, value):
         raise TypeError("Row object does not support item assignment")
 
     def __getattr__(self, item):
-        self._populate_named_values_from_fields()
-        if self._named_values and item in self._named_values:
-            return self._named_values[item]
-        elif self._fields and self._check_if_having_duplicates():
-            try:
-                index = self._fields.index(item)  # may throw ValueError
-                return self[index]  # may throw IndexError
-            except (IndexError, ValueError):
-                raise AttributeError(f"Row object has no attribute {item}")
-        else:
-            raise AttributeError(f"Row object has no attribute {item}")
+        # the values of the columns are properties of the class of the row
+        raise AttributeError(f"Row object has no attribute {item}")
 
     def __setattr__(self, key, value):
         if key != "_fields":
             raise AttributeError("Can't set attribute to Row object")
         if value is not None:
-            self.__dict__["_fields"] = value
+            object.__setattr__(self, "__class__", _row_class(tuple(value), len(self)))
 
     def __contains__(self, item):
-        self._populate_named_values_from_fields()
-        if self._named_values:
-            return item in self._named_values
-        elif self._fields:
-            return item in self._fields
+        if self._fields:
+            return item in self._field_index
         else:
             return super().__contains__(item)
 
@@ -134,22 +177,21 @@ class Row(tuple):
             )
         elif args and len(args) != len(self):
             raise ValueError(f"{len(self)} values are expected.")
-        self._populate_named_values_from_fields()
-        if self._named_values:
+        named_values = self._named_values
+        if named_values:
             if args:
                 raise ValueError(
                     "The Row object can't be called with a list of values"
                     "because it already has fields and values."
                 )
-            new_row = Row(**self._named_values)
             for input_key, input_value in kwargs.items():
-                if input_key not in self._named_values:
+                if input_key not in named_values:
                     raise ValueError(
                         f"Wrong keyword argument {input_key} for Row f{self}"
                     )
-                new_row._named_values[input_key] = input_value
-            return new_row
-        elif self._fields and self._check_if_having_duplicates():
+                named_values[input_key] = input_value
+            return Row(**named_values)
+        elif self._fields and self._has_duplicates:
             raise ValueError(
                 "The Row object can't be called because it has duplicate fields"
             )
@@ -168,24 +210,20 @@ class Row(tuple):
             return Row(**{k: v for k, v in zip(self, args)})
 
     def __copy__(self):
-        return _restore_row_from_pickle(self, self._named_values, self._fields)
+        return _restore_row_from_pickle(self, None, self._fields)
 
     def __repr__(self):
         if self._fields:
             return "Row({})".format(
                 ", ".join(f"{k}={v!r}" for k, v in zip(self._fields, self))
             )
-        elif self._named_values:
-            return "Row({})".format(
-                ", ".join(f"{k}={v!r}" for k, v in self._named_values.items())
-            )
         else:
             return "Row({})".format(", ".join(f"{v!r}" for v in self))
 
     def __reduce__(self):
         return (
             _restore_row_from_pickle,
-            (tuple(self), self._named_values, self._fields),
+            (tuple(self), None, self._fields),
         )
 
     def as_dict(self, recursive: bool = False) -> Dict:
@@ -200,14 +238,14 @@ class Row(tuple):
         >>> row.as_dict(True)
         {'name1': 1, 'name2': 2, 'name3': {'childname': 3}}
         """
-        self._populate_named_values_from_fields()
-        if not self._named_values:
+        named_values = self._named_values
+        if not named_values:
             raise TypeError(
                 "Cannot convert a Row without key values or duplicated keys to a dict."
             )
         if not recursive:
-            return dict(self._named_values)
-        return self._convert_dict(self._named_values)
+            return named_values
+        return self._convert_dict(named_values)
 
     def _convert_dict(
         self, obj: Union["Row", Dict, Iterable[Union["Row", Dict]]]
@@ -224,22 +262,102 @@ class Row(tuple):
 
         return obj
 
-    def _populate_named_values_from_fields(self) -> None:
-        # populate _named_values dict if we have unduplicated fields
-        if (
-            self._named_values is None
-            and self._fields
-            and not self._check_if_having_duplicates()
-        ):
-            self.__dict__["_named_values"] = {k: v for k, v in zip(self._fields, self)}
-
-    def _check_if_having_duplicates(self) -> bool:
-        if self._has_duplicates is None:
-            # Usually we don't have duplicate keys
-            self.__dict__["_has_duplicates"] = bool(
-                len(set(self._fields)) != len(self._fields)
-            )
-        return self._has_duplicates
-
     # Add aliases for user code migration
     asDict = as_dict
+
+
+class ResultSet(Sequence[Row]):
+    """Represents the result of :meth:`DataFrame.collect` when
+    :attr:`Session.columnar_results_enabled` is ``True``.
+
+    It works like a list of :class:`Row` objects that can't be modified: it can be
+    indexed, sliced, iterated over and compared with a list. However, it stores
+    the values of each column in a list, and the column names once, and a
+    :class:`Row` is only created when it's retrieved, so a large result takes a
+    fraction of the memory of a list of :class:`Row` objects.
+
+    >>> result = ResultSet._from_rows([(1, "a"), (2, "b")], ["A", "B"])
+    >>> result
+    [Row(A=1, B='a'), Row(A=2, B='b')]
+    >>> result[1].B
+    'b'
+    >>> result == [Row(A=1, B="a"), Row(A=2, B="b")]
+    True
+    >>> result.column("A")
+    [1, 2]
+    """
+
+    __slots__ = ("_columns", "_fields", "_length", "_row")
+
+    def __init__(
+        self,
+        columns: List[List[Any]],
+        fields: Optional[List[str]] = None,
+        length: Optional[int] = None,
+    ) -> None:
+        self._columns = columns
+        self._fields = fields
+        self._length = (
+            length if length is not None else len(columns[0]) if columns else 0
+        )
+        # the rows share the column names
+        self._row = _row_factory(fields)
+
+    @classmethod
+    def _from_rows(
+        cls, rows: Iterable[Sequence[Any]], fields: Optional[List[str]] = None
+    ) -> "ResultSet":
+        rows = rows if isinstance(rows, list) else list(rows)
+        if rows:
+            columns = [list(values) for values in zip(*rows)]
+        else:
+            columns = [[] for _ in fields or []]
+        return cls(columns, fields, len(rows))
+
+    def column(self, item: Union[int, str]) -> List[Any]:
+        """Returns the values of a column, given its index or name, without
+        creating any :class:`Row` objects."""
+        if isinstance(item, str):
+            if not self._fields or item not in self._fields:
+                raise KeyError(item)
+            item = self._fields.index(item)
+        return list(self._columns[item])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[Row, "ResultSet"]:
+        if isinstance(item, slice):
+            indexes = range(self._length)[item]
+            return ResultSet(
+                [column[item] for column in self._columns], self._fields, len(indexes)
+            )
+        index = range(self._length)[item]  # may throw IndexError
+        return self._row([column[index] for column in self._columns])
+
+    def __iter__(self) -> Iterator[Row]:
+        if not self._columns:
+            for _ in range(self._length):
+                yield self._row(())
+            return
+        for values in zip(*self._columns):
+            yield self._row(values)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (list, ResultSet)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __add__(self, other: Iterable[Row]) -> List[Row]:
+        return list(self) + list(other)
+
+    def __radd__(self, other: Iterable[Row]) -> List[Row]:
+        return list(other) + list(self)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def __reduce__(self):
+        return ResultSet, (self._columns, self._fields, self._length)
@@ -6,13 +6,14 @@ import datetime
 import decimal
 import json
 import logging
+import math
 import os
 from array import array
 from functools import reduce
 from logging import getLogger
-from threading import RLock
+from threading import Lock, RLock, local
 from types import ModuleType
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 
 import cloudpickle
 import pkg_resources
@@ -20,7 +21,11 @@ import pkg_resources
 from snowflake.connector import ProgrammingError, SnowflakeConnection
 from snowflake.connector.options import installed_pandas, pandas
 from snowflake.connector.pandas_tools import write_pandas
-from snowflake.snowpark._internal.analyzer.analyzer import Analyzer
+from snowflake.snowpark._internal.analyzer.analyzer import (
+    LARGE_IN_LIST_THRESHOLD,
+    Analyzer,
+    ExpressionSqlMemo,
+)
 from snowflake.snowpark._internal.analyzer.analyzer_utils import (
     escape_quotes,
     quote_name,
@@ -46,6 +51,7 @@ from snowflake.snowpark._internal.type_utils import (
 )
 from snowflake.snowpark._internal.utils import (
     MODULE_NAME_TO_PACKAGE_NAME_MAP,
+    MULTI_STATEMENT_CONNECTOR_VERSION,
     STAGE_PREFIX,
     PythonObjJSONEncoder,
     TempObjectType,
@@ -57,6 +63,7 @@ from snowflake.snowpark._internal.utils import (
     get_stage_file_prefix_length,
     get_version,
     is_in_stored_procedure,
+    is_multi_statement_supported,
     normalize_remote_file_or_dir,
     parse_positional_args_to_list,
     random_name_for_temp_object,
@@ -82,7 +89,7 @@ from snowflake.snowpark.functions import (
     to_variant,
 )
 from snowflake.snowpark.query_history import QueryHistory
-from snowflake.snowpark.row import Row
+from snowflake.snowpark.row import ResultSet, Row
 from snowflake.snowpark.stored_procedure import StoredProcedureRegistration
 from snowflake.snowpark.table import Table
 from snowflake.snowpark.table_function import (
@@ -131,6 +138,14 @@ def _remove_session(session: "Session") -> None:
         _active_sessions.remove(session)
 
 
+def _is_bindable(value: Any) -> bool:
+    # the connector binds these values with the type of their SQL literals, and
+    # their subclasses, e.g., numpy.float64, aren't bound
+    if type(value) is float:
+        return math.isfinite(value)
+    return type(value) in (bool, int, str, bytes, decimal.Decimal)
+
+
 class Session:
     """
     Establishes a connection with a Snowflake database and provides methods for creating DataFrames
@@ -160,7 +175,13 @@ class Session:
     :class:`Session` contains functions to construct a :class:`DataFrame` like :meth:`table`,
     :meth:`sql` and :attr:`read`.
 
-    A :class:`Session` object is not thread-safe.
+    A :class:`Session` object can be shared by multiple threads, which can
+    create DataFrames and execute their actions concurrently: each thread
+    generates SQL with an analyzer of its own, and each action executes its
+    queries with a cursor of its own, so the results of an action are never
+    returned to another thread. However, changing the state of the session, e.g.,
+    its query tag, imports, packages, current database or schema, affects the
+    actions of all threads and isn't synchronized with them.
     """
 
     class SessionBuilder:
@@ -244,10 +265,42 @@ class Session:
         self._plan_builder = SnowflakePlanBuilder(self)
         self._last_action_id = 0
         self._last_canceled_id = 0
+        # merge stacked projections, filters, sorts and limits into one SELECT
+        self._sql_fusion_enabled = True
+        self._lazy_analysis_enabled = False
+        # the number of times the schema of a plan was derived locally
+        # instead of describing its schema query
+        self._avoided_describe_query_count = 0
+        # evaluate the operators whose operands are literals locally
+        self._constant_folding_enabled = True
+        # reuse the SQL of expressions that are analyzed more than once, in any
+        # thread that uses this session
+        self._expression_sql_memo_enabled = True
+        self._expression_sql_memo = ExpressionSqlMemo()
+        self._unfolded_expression_sql_memo = ExpressionSqlMemo()
+        # define the subplans repeated in the SQL of a DataFrame once, in CTEs
+        self._cte_optimization_enabled = True
+        # the number of bytes of SQL saved by extracting repeated subplans
+        self._eliminated_sql_bytes = 0
+        self._plan_optimization_enabled = False
+        self._deterministic_sql_enabled = False
+        # the number of values of Column.in_() from which they are loaded into a
+        # temporary table instead of being written in the SQL
+        self._large_in_list_threshold = LARGE_IN_LIST_THRESHOLD
+        self._concurrent_pre_queries_enabled = False
+        self._multi_statement_batching_enabled = False
+        self._columnar_results_enabled = False
+        self._result_prefetch_depth = 0
 
         self._file = FileOperation(self)
 
-        self._analyzer = Analyzer(self)
+        # the analyzer holds the state of the plan it's resolving, so every
+        # thread resolves plans with its own analyzer
+        self._thread_local = local()
+        self._action_id_lock = Lock()
+        # guards the counters of the optimizations, which are updated by every
+        # thread that uses this session
+        self._counter_lock = Lock()
         _logger.info("Snowpark Session information: %s", self._session_info)
 
     def __enter__(self):
@@ -256,9 +309,17 @@ class Session:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    @property
+    def _analyzer(self) -> Analyzer:
+        analyzer = getattr(self._thread_local, "analyzer", None)
+        if analyzer is None:
+            analyzer = self._thread_local.analyzer = Analyzer(self)
+        return analyzer
+
     def _generate_new_action_id(self) -> int:
-        self._last_action_id += 1
-        return self._last_action_id
+        with self._action_id_lock:
+            self._last_action_id += 1
+            return self._last_action_id
 
     def close(self) -> None:
         """Close this session."""
@@ -879,7 +940,7 @@ class Session:
             TableFunctionRelation(func_expr),
         )
 
-    def sql(self, query: str) -> DataFrame:
+    def sql(self, query: str, params: Optional[Sequence[Any]] = None) -> DataFrame:
         """
         Returns a new DataFrame representing the results of a SQL query.
         You can use this method to execute a SQL statement. Note that you still
@@ -887,6 +948,10 @@ class Session:
 
         Args:
             query: The SQL statement to execute.
+            params: The values bound to the ``?`` placeholders in ``query``, in
+                their order. Binding the values instead of writing them in
+                ``query`` lets the statements that only differ in these values
+                share the same SQL text, and avoids quoting them by hand.
 
         Example::
 
@@ -895,8 +960,11 @@ class Session:
             >>> # execute the query
             >>> df.collect()
             [Row(1/2=Decimal('0.500000'))]
+            >>> # bind the values of the query
+            >>> session.sql("select * from values (1), (2), (3) as t(a) where a > ?", params=[1]).collect()
+            [Row(A=2), Row(A=3)]
         """
-        return DataFrame(self, self._plan_builder.query(query, None))
+        return DataFrame(self, self._plan_builder.query(query, None, params=params))
 
     @property
     def read(self) -> "DataFrameReader":
@@ -904,13 +972,20 @@ class Session:
         supported sources (e.g. a file in a stage) as a DataFrame."""
         return DataFrameReader(self)
 
-    def _run_query(self, query: str, is_ddl_on_temp_object: bool = False) -> List[Any]:
-        return self._conn.run_query(query, is_ddl_on_temp_object=is_ddl_on_temp_object)[
-            "data"
-        ]
-
-    def _get_result_attributes(self, query: str) -> List[Attribute]:
-        return self._conn.get_result_attributes(query)
+    def _run_query(
+        self,
+        query: str,
+        is_ddl_on_temp_object: bool = False,
+        params: Optional[Sequence[Any]] = None,
+    ) -> List[Any]:
+        return self._conn.run_query(
+            query, is_ddl_on_temp_object=is_ddl_on_temp_object, params=params
+        )["data"]
+
+    def _get_result_attributes(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[Attribute]:
+        return self._conn.get_result_attributes(query, params)
 
     def get_session_stage(self) -> str:
         """
@@ -1088,7 +1163,7 @@ class Session:
         if isinstance(data, Row):
             raise TypeError("create_dataframe() function does not accept a Row object.")
 
-        if not isinstance(data, (list, tuple)) and (
+        if not isinstance(data, (list, tuple, ResultSet)) and (
             not installed_pandas
             or (installed_pandas and not isinstance(data, pandas.DataFrame))
         ):
@@ -1404,6 +1479,241 @@ class Session:
             self._conn._conn.telemetry_enabled = False
             self._conn._telemetry_client.telemetry._enabled = False
 
+    @property
+    def lazy_analysis_enabled(self) -> bool:
+        """
+        Returns whether DataFrames defer generating their SQL until it is needed.
+        The default value is ``False``, which means a DataFrame is analyzed as soon
+        as it is created, and an invalid transformation fails immediately. When
+        it is set to ``True``, a DataFrame keeps its logical plan and analyzes it
+        only when an action, :attr:`DataFrame.queries`, :attr:`DataFrame.schema` or
+        :meth:`DataFrame.explain` needs it, so intermediate DataFrames that are
+        never used don't generate SQL. The analyzed plan is cached on the DataFrame.
+
+        Example::
+
+            >>> session.lazy_analysis_enabled
+            False
+            >>> session.lazy_analysis_enabled = True
+            >>> session.lazy_analysis_enabled
+            True
+            >>> session.lazy_analysis_enabled = False
+        """
+        return self._lazy_analysis_enabled
+
+    @lazy_analysis_enabled.setter
+    def lazy_analysis_enabled(self, value: bool) -> None:
+        self._lazy_analysis_enabled = value
+
+    @property
+    def plan_optimization_enabled(self) -> bool:
+        """
+        Returns whether the logical plan of a DataFrame is optimized before its SQL
+        is generated. The default value is ``False``. When it is set to ``True``, a
+        filter is moved below the projections and into the sides of a join that it
+        only refers to the columns of, and the columns of a projection that the
+        projection on top of it doesn't use are removed, so that Snowflake reads
+        fewer rows and columns when it doesn't optimize the query the same way.
+        The optimized plan returns the same result as the original plan.
+
+        Example::
+
+            >>> session.plan_optimization_enabled
+            False
+            >>> session.plan_optimization_enabled = True
+            >>> session.plan_optimization_enabled
+            True
+            >>> session.plan_optimization_enabled = False
+        """
+        return self._plan_optimization_enabled
+
+    @plan_optimization_enabled.setter
+    def plan_optimization_enabled(self, value: bool) -> None:
+        self._plan_optimization_enabled = value
+
+    @property
+    def deterministic_sql_enabled(self) -> bool:
+        """
+        Returns whether the same DataFrame operations generate the same SQL. The
+        default value is ``False``, which means the aliases in the SQL of joins,
+        of local data and of :meth:`DataFrame.drop_duplicates` are random, so the
+        SQL of a DataFrame is different every time it is created. When it is set
+        to ``True``, these aliases are derived from a hash of the DataFrames they
+        refer to, so running the same program again sends the same queries, which
+        Snowflake can answer from its result cache. The names of the temporary
+        objects that are created to run a query, e.g., of the temporary table of
+        large local data, are still random, because they must be unique in a
+        session.
+
+        Example::
+
+            >>> session.deterministic_sql_enabled
+            False
+            >>> session.deterministic_sql_enabled = True
+            >>> df = session.create_dataframe([[1, 2]], schema=["a", "b"])
+            >>> df.join(df, "a").queries == df.join(df, "a").queries
+            True
+            >>> session.deterministic_sql_enabled = False
+        """
+        return self._deterministic_sql_enabled
+
+    @deterministic_sql_enabled.setter
+    def deterministic_sql_enabled(self, value: bool) -> None:
+        self._deterministic_sql_enabled = value
+
+    @property
+    def concurrent_pre_queries_enabled(self) -> bool:
+        """
+        Returns whether the queries that prepare the last query of an action and
+        don't depend on each other are executed concurrently, each with a cursor
+        of its own. The default value is ``False``. When it is set to ``True``, the
+        creation and filling of the temporary tables of DataFrames created from
+        large local data, e.g., of both sides of a join, overlap. A query that may
+        change the state of the session, e.g., ``USE SCHEMA`` or ``ALTER SESSION``,
+        is still executed after all the queries before it and before all the
+        queries after it.
+
+        Example::
+
+            >>> session.concurrent_pre_queries_enabled
+            False
+            >>> session.concurrent_pre_queries_enabled = True
+            >>> session.concurrent_pre_queries_enabled
+            True
+            >>> session.concurrent_pre_queries_enabled = False
+        """
+        return self._concurrent_pre_queries_enabled
+
+    @concurrent_pre_queries_enabled.setter
+    def concurrent_pre_queries_enabled(self, value: bool) -> None:
+        self._concurrent_pre_queries_enabled = value
+
+    @property
+    def multi_statement_batching_enabled(self) -> bool:
+        """
+        Returns whether consecutive queries of an action whose results aren't used,
+        e.g., the creation and filling of temporary tables and the drops of them
+        after the action, are executed in one multi-statement request instead of
+        one by one, which saves a round trip per query. The default value is
+        ``False``. Every query is still recorded with its own query ID by
+        :meth:`query_history`. It requires version 2.9.0 or later of the
+        Snowflake Connector for Python.
+
+        If a query of a request that drops temporary objects fails, the queries
+        of the request are executed again one by one, so that the other objects
+        are still dropped.
+
+        Example::
+
+            >>> session.multi_statement_batching_enabled
+            False
+            >>> session.multi_statement_batching_enabled = True
+            >>> session.multi_statement_batching_enabled
+            True
+            >>> session.multi_statement_batching_enabled = False
+        """
+        return self._multi_statement_batching_enabled
+
+    @multi_statement_batching_enabled.setter
+    def multi_statement_batching_enabled(self, value: bool) -> None:
+        if value and not is_multi_statement_supported():
+            raise ValueError(
+                "multi_statement_batching_enabled requires snowflake-connector-python "
+                f"{'.'.join(map(str, MULTI_STATEMENT_CONNECTOR_VERSION))} or later, "
+                f"but the installed version is {get_connector_version()}"
+            )
+        self._multi_statement_batching_enabled = value
+
+    @property
+    def columnar_results_enabled(self) -> bool:
+        """
+        Returns whether :meth:`DataFrame.collect` returns a :class:`ResultSet`
+        instead of a list of :class:`Row` objects. The default value is ``False``.
+        A :class:`ResultSet` works like a list of :class:`Row` objects that can't be
+        modified, but stores the values of each column in a list and creates a
+        :class:`Row` only when it's retrieved, so a result with millions of rows
+        takes a fraction of the memory.
+
+        Example::
+
+            >>> session.columnar_results_enabled
+            False
+            >>> session.columnar_results_enabled = True
+            >>> result = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"]).collect()
+            >>> result
+            [Row(A=1, B=2), Row(A=3, B=4)]
+            >>> result.column("B")
+            [2, 4]
+            >>> session.columnar_results_enabled = False
+        """
+        return self._columnar_results_enabled
+
+    @columnar_results_enabled.setter
+    def columnar_results_enabled(self, value: bool) -> None:
+        self._columnar_results_enabled = value
+
+    @property
+    def result_prefetch_depth(self) -> int:
+        """
+        Returns the number of chunks of a result that :meth:`DataFrame.to_local_iterator`,
+        :meth:`DataFrame.to_pandas_batches` and :meth:`DataFrame.to_arrow_batches`
+        retrieve in a background thread ahead of the one you're processing, so
+        downloading the result overlaps with processing it. The default value is
+        ``0``, which retrieves every chunk when it's needed.
+
+        The chunks that are retrieved ahead take at most 256 MB, and they're
+        discarded when the iterator is closed or garbage collected.
+
+        Example::
+
+            >>> session.result_prefetch_depth
+            0
+            >>> session.result_prefetch_depth = 2
+            >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+            >>> for row in df.to_local_iterator():
+            ...     print(row)
+            Row(A=1, B=2)
+            Row(A=3, B=4)
+            >>> session.result_prefetch_depth = 0
+        """
+        return self._result_prefetch_depth
+
+    @result_prefetch_depth.setter
+    def result_prefetch_depth(self, value: int) -> None:
+        if value < 0:
+            raise ValueError(
+                f"result_prefetch_depth must be a non-negative integer, but got {value}"
+            )
+        self._result_prefetch_depth = value
+
+    @property
+    def large_in_list_threshold(self) -> int:
+        """
+        Returns the number of values from which :meth:`Column.in_` and
+        :func:`functions.in_` load the values into a temporary table that the
+        generated SQL selects from, instead of writing every value in the SQL.
+        The default value is ``5000``. It must be a positive integer.
+
+        Example::
+
+            >>> session.large_in_list_threshold
+            5000
+            >>> session.large_in_list_threshold = 3
+            >>> df = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+            >>> df.filter(df.a.in_([1, 2, 5])).collect()
+            [Row(A=1, B=2)]
+            >>> session.large_in_list_threshold = 5000
+        """
+        return self._large_in_list_threshold
+
+    @large_in_list_threshold.setter
+    def large_in_list_threshold(self, value: int) -> None:
+        if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+            raise ValueError(
+                f"large_in_list_threshold must be a positive integer, but got {value}"
+            )
+        self._large_in_list_threshold = value
+
     @property
     def file(self) -> FileOperation:
         """
@@ -1464,9 +1774,18 @@ class Session:
         validate_object_name(sproc_name)
 
         sql_args = []
+        params = []
         for arg in args:
-            sql_args.append(to_sql(arg, infer_type(arg)))
-        return self.sql(f"CALL {sproc_name}({', '.join(sql_args)})").collect()[0][0]
+            # basic values are bound, so calls with different arguments share
+            # the same SQL text
+            if _is_bindable(arg):
+                sql_args.append("?")
+                params.append(arg)
+            else:
+                sql_args.append(to_sql(arg, infer_type(arg)))
+        return self.sql(
+            f"CALL {sproc_name}({', '.join(sql_args)})", params=params
+        ).collect()[0][0]
 
     @deprecate(
         deprecate_version="0.7.0",
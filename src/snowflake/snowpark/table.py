@@ -251,9 +251,7 @@ class Table(DataFrame):
         table_name: str,
         session: Optional["snowflake.snowpark.session.Session"] = None,
     ):
-        super().__init__(
-            session, session._analyzer.resolve(UnresolvedRelation(table_name))
-        )
+        super().__init__(session, UnresolvedRelation(table_name))
         self.table_name: str = table_name  #: The table name
 
     def __copy__(self) -> "Table":
@@ -372,7 +370,9 @@ class Table(DataFrame):
                     for k, v in assignments.items()
                 },
                 condition._expression if condition is not None else None,
-                _disambiguate(self, source, create_join_type("left"), [])[1]._plan
+                _disambiguate(self, source, create_join_type("left"), [])[
+                    1
+                ]._execution_plan
                 if source
                 else None,
             )
@@ -432,7 +432,9 @@ class Table(DataFrame):
             TableDelete(
                 self.table_name,
                 condition._expression if condition is not None else None,
-                _disambiguate(self, source, create_join_type("left"), [])[1]._plan
+                _disambiguate(self, source, create_join_type("left"), [])[
+                    1
+                ]._execution_plan
                 if source
                 else None,
             )
@@ -497,7 +499,9 @@ class Table(DataFrame):
         new_df = self._with_plan(
             TableMerge(
                 self.table_name,
-                _disambiguate(self, source, create_join_type("left"), [])[1]._plan,
+                _disambiguate(self, source, create_join_type("left"), [])[
+                    1
+                ]._execution_plan,
                 join_expr._expression,
                 merge_exprs,
             )
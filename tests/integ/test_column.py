@@ -8,8 +8,9 @@ import json
 import pytest
 
 from snowflake.snowpark import Row
+from snowflake.snowpark._internal.analyzer.analyzer import LARGE_IN_LIST_THRESHOLD
 from snowflake.snowpark.exceptions import SnowparkColumnException, SnowparkSQLException
-from snowflake.snowpark.functions import col, lit, parse_json, when
+from snowflake.snowpark.functions import col, in_, lit, parse_json, when
 from tests.utils import TestData, Utils
 
 
@@ -151,3 +152,22 @@ def test_when_accept_sql_expr(session):
     assert TestData.null_data1(session).select(
         when("a is NULL", 5).when("a = 1", 6).as_("a")
     ).collect() == [Row(5), Row(None), Row(6), Row(None), Row(5)]
+
+
+@pytest.mark.parametrize("threshold", [3, 5000])
+def test_large_in_list(session, threshold):
+    session.large_in_list_threshold = threshold
+    try:
+        df = session.create_dataframe([[1, "a"], [2, "b"], [3, None]]).to_df(["a", "b"])
+        values = list(range(2, 6000))
+        Utils.check_answer(df.filter(col("a").in_(values)), [Row(2, "b"), Row(3, None)])
+        Utils.check_answer(
+            df.select(in_([col("a"), col("b")], [[1, "a"], [2, "a"], [3, None]])),
+            [Row(True), Row(False), Row(None)],
+        )
+        Utils.check_answer(
+            df.select((~col("a").in_([2, None, 4, 5])).alias("c")),
+            [Row(None), Row(False), Row(None)],
+        )
+    finally:
+        session.large_in_list_threshold = LARGE_IN_LIST_THRESHOLD
@@ -0,0 +1,100 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import itertools
+
+import pytest
+
+from snowflake.snowpark import Column
+from snowflake.snowpark._internal.analyzer.expression import Literal
+from snowflake.snowpark.functions import lit
+from snowflake.snowpark.types import BooleanType, DoubleType, LongType, StringType
+
+OPERANDS = {
+    "integer": [
+        Column(Literal(v, LongType())) for v in (-7, 0, 3, 10**37, 2**53 + 1, None)
+    ],
+    "float": [Column(Literal(v, DoubleType())) for v in (-7.5, 0.0, 2.25, 1e300, None)],
+    "string": [Column(Literal(v, StringType())) for v in ("a", "b", "é", "", None)],
+    "boolean": [Column(Literal(v, BooleanType())) for v in (True, False, None)],
+}
+
+BINARY_OPERATORS = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": lambda a, b: a / b,
+    "%": lambda a, b: a % b,
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    ">=": lambda a, b: a >= b,
+    "equal_null": lambda a, b: a.equal_null(b),
+    "and": lambda a, b: a & b,
+    "or": lambda a, b: a | b,
+}
+
+UNARY_OPERATORS = {
+    "-": lambda a: -a,
+    "not": lambda a: ~a,
+    "is_null": lambda a: a.is_null(),
+    "cast": lambda a: a.cast(LongType()),
+}
+
+
+def _results(session, columns, folding):
+    session._constant_folding_enabled = folding
+    try:
+        df = session.range(1).select(*[c.alias(f"c{i}") for i, c in enumerate(columns)])
+        return df.collect()[0]
+    finally:
+        session._constant_folding_enabled = True
+
+
+def _valid_columns(session, columns):
+    # the expressions that Snowflake can't evaluate, e.g., 1 % 0, aren't folded
+    valid = []
+    for column in columns:
+        try:
+            session.range(1).select(column.alias("c")).collect()
+            valid.append(column)
+        except Exception:
+            pass
+    return valid
+
+
+@pytest.mark.parametrize("kinds", list(itertools.product(OPERANDS, repeat=2)))
+def test_folded_binary_operators(session, kinds):
+    # folding an expression doesn't change its result
+    columns = [
+        operator(left, right)
+        for operator in BINARY_OPERATORS.values()
+        for left in OPERANDS[kinds[0]]
+        for right in OPERANDS[kinds[1]]
+    ]
+    columns = _valid_columns(session, columns)
+    assert _results(session, columns, True) == _results(session, columns, False)
+
+
+@pytest.mark.parametrize("kind", list(OPERANDS))
+def test_folded_unary_operators(session, kind):
+    columns = [
+        operator(operand)
+        for operator in UNARY_OPERATORS.values()
+        for operand in OPERANDS[kind]
+    ]
+    columns = _valid_columns(session, columns)
+    assert _results(session, columns, True) == _results(session, columns, False)
+
+
+def test_folded_types(session):
+    columns = [lit(1) + lit(2), lit(1.5) * lit(2), lit(1) < lit(2)]
+    folded = session.range(1).select(*[c.alias(f"c{i}") for i, c in enumerate(columns)])
+    session._constant_folding_enabled = False
+    try:
+        unfolded = session.range(1).select(
+            *[c.alias(f"c{i}") for i, c in enumerate(columns)]
+        )
+        assert folded.schema == unfolded.schema
+    finally:
+        session._constant_folding_enabled = True
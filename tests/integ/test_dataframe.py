@@ -1583,3 +1583,21 @@ def test_unpivot(session, column_list):
         ],
         sort=False,
     )
+
+
+def test_async_actions(session):
+    df = session.create_dataframe([[i, i % 3] for i in range(1000)], schema=["a", "b"])
+    jobs = [df.filter(col("b") == i).collect_nowait() for i in range(3)]
+    assert sum(len(job.result()) for job in jobs) == 1000
+    assert all(job.is_done() for job in jobs)
+
+    count_job = df.count_nowait()
+    assert count_job.result() == 1000
+
+    table_name = Utils.random_name_for_temp_object(TempObjectType.TABLE)
+    try:
+        job = df.write.save_as_table_nowait(table_name, create_temp_table=True)
+        assert job.result() is None
+        assert session.table(table_name).count() == 1000
+    finally:
+        Utils.drop_table(session, table_name)
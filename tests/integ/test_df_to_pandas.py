@@ -2,9 +2,11 @@
 #
 # Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
 #
+import os
 from typing import Iterator
 
 import pandas as pd
+import pyarrow
 import pytest
 from packaging import version
 from pandas import DataFrame as PandasDF, Series as PandasSeries
@@ -133,3 +135,38 @@ def test_to_pandas_batches(session):
     for df_batch in df.to_pandas_batches():
         assert_frame_equal(df_batch, entire_pandas_df.iloc[: len(df_batch)])
         break
+
+
+def test_to_arrow(session):
+    df = session.range(100000).cache_result()
+    table = df.to_arrow()
+    assert isinstance(table, pyarrow.Table)
+    assert table.column_names == ["ID"]
+    assert table.column("ID").to_pylist() == list(range(100000))
+
+    batches = list(df.to_arrow_batches())
+    assert len(batches) > 1
+    assert all(isinstance(batch, pyarrow.RecordBatch) for batch in batches)
+    assert pyarrow.Table.from_batches(batches).equals(table)
+
+    # an empty result and the result of a non-SELECT statement are tables too
+    assert df.filter(col("id") < 0).to_arrow().num_rows == 0
+    table = session.sql("show tables like 'no_such_table'").to_arrow()
+    assert table.num_rows == 0
+
+
+def test_collect_to_disk(session, tmpdir):
+    df = session.range(100000).cache_result()
+    with df.collect_to_disk() as result:
+        assert result.num_rows == 100000
+        # the ID column is a NUMBER(38, 0), which is stored as decimals
+        assert result.schema == pyarrow.schema([("ID", pyarrow.decimal128(38, 0))])
+        assert result.to_numpy("ID").tolist() == list(range(100000))
+        path = result.path
+    assert not os.path.exists(path)
+
+    with df.filter(col("id") < 0).collect_to_disk(str(tmpdir)) as result:
+        assert os.path.dirname(result.path) == str(tmpdir)
+        assert result.num_rows == 0
+        assert result.schema.names == ["ID"]
+    assert os.listdir(str(tmpdir)) == []
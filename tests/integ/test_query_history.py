@@ -81,3 +81,21 @@ def test_query_history_executemany(session):
     assert "alter session unset query_tag" in queries[3].sql_text
     assert 'SELECT "A" FROM' in queries[4].sql_text
     assert "DROP  TABLE  If  EXISTS" in queries[5].sql_text  # post action
+
+
+def test_query_history_multi_statement(session):
+    df = session.create_dataframe([[1]] * (ARRAY_BIND_THRESHOLD + 1), schema=["a"])
+    df2 = session.create_dataframe([[2]] * (ARRAY_BIND_THRESHOLD + 1), schema=["b"])
+    session.multi_statement_batching_enabled = True
+    try:
+        with session.query_history() as query_listener:
+            df.join(df2).count()
+    finally:
+        session.multi_statement_batching_enabled = False
+
+    # the temporary tables are dropped in one request, but every statement is
+    # recorded with its own query ID
+    drops = [q for q in query_listener.queries if "DROP" in q.sql_text]
+    assert len(drops) == 2
+    assert len({q.query_id for q in drops}) == 2
+    assert all(";" not in q.sql_text for q in drops)
@@ -0,0 +1,89 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import datetime
+import decimal
+
+import pytest
+
+from snowflake.snowpark.functions import col, count, lit, max as max_, min as min_
+from snowflake.snowpark.types import DecimalType, DoubleType, IntegerType, LongType
+from tests.utils import Utils
+
+# Each DataFrame below has a schema that is derived locally. It must be the same
+# as the schema that describing its query returns.
+DATAFRAMES = {
+    "columns": lambda t, u: t.select(col("a"), col("b").alias("x")),
+    "literals": lambda t, u: t.select(
+        lit(1).alias("l1"),
+        lit(1.5).alias("l2"),
+        lit("s").alias("l3"),
+        lit(True).alias("l4"),
+        lit(decimal.Decimal("1.25")).alias("l5"),
+        lit(datetime.date(2022, 1, 1)).alias("l6"),
+    ),
+    "predicates": lambda t, u: t.select(
+        (col("a") > 1).alias("p1"),
+        (col("b") == "x").alias("p2"),
+        (~(col("a") > 1)).alias("p3"),
+        col("b").is_null().alias("p4"),
+        ((col("a") > 1) & (col("c") < 2)).alias("p5"),
+    ),
+    "casts": lambda t, u: t.select(
+        col("a").cast(IntegerType()).alias("k1"),
+        col("c").cast(DecimalType(10, 0)).alias("k2"),
+        col("c").cast(DecimalType(12, 3)).alias("k3"),
+        col("a").cast(DoubleType()).alias("k4"),
+        col("d").cast(LongType()).alias("k5"),
+    ),
+    "aggregate": lambda t, u: t.group_by("b").agg(
+        [count("a").alias("n"), max_("a").alias("mx"), min_("c").alias("mn")]
+    ),
+    "count_star": lambda t, u: t.select(count("*").alias("n")),
+    "filter_sort_limit": lambda t, u: t.filter(col("a") > 1).sort("b").limit(5),
+    "sample": lambda t, u: t.sample(0.5),
+    "inner_join": lambda t, u: t.join(u, t["a"] == u["e"]),
+    "left_join": lambda t, u: t.join(u, t["a"] == u["e"], "left"),
+    "right_join": lambda t, u: t.join(u, t["a"] == u["e"], "right"),
+    "full_join": lambda t, u: t.join(u, t["a"] == u["e"], "full"),
+    "using_join": lambda t, u: t.join(u.select(col("e").alias("a"), "f"), "a"),
+    "full_using_join": lambda t, u: t.join(
+        u.select(col("e").alias("a"), "f"), "a", "full"
+    ),
+    "natural_join": lambda t, u: t.natural_join(u.select(col("e").alias("a"), "f")),
+    "semi_join": lambda t, u: t.join(u, t["a"] == u["e"], "leftsemi"),
+    "anti_join": lambda t, u: t.join(u, t["a"] == u["e"], "leftanti"),
+    "union": lambda t, u: t.select("a", "b").union(u.select("e", "f")),
+    "union_all": lambda t, u: t.select("a", "b").union_all(u.select("e", "f")),
+    "intersect": lambda t, u: t.select("a", "b").intersect(u.select("e", "f")),
+    "except": lambda t, u: t.select("a", "b").except_(u.select("e", "f")),
+}
+
+
+@pytest.fixture(scope="module")
+def tables(session):
+    table_name = Utils.random_table_name()
+    other_table_name = Utils.random_table_name()
+    Utils.create_table(
+        session,
+        table_name,
+        "a int not null, b string, c number(10, 2), d double",
+        is_temporary=True,
+    )
+    Utils.create_table(
+        session, other_table_name, "e int, f string not null", is_temporary=True
+    )
+    yield session.table(table_name), session.table(other_table_name)
+    Utils.drop_table(session, table_name)
+    Utils.drop_table(session, other_table_name)
+
+
+@pytest.mark.parametrize("name", DATAFRAMES)
+def test_inferred_attributes_match_describe(session, tables, name):
+    df = DATAFRAMES[name](*tables)
+    inferred = df._plan.inferred_attributes
+    assert inferred is not None, f"the schema of {name} isn't derived locally"
+    described = session._conn.get_result_attributes(df._plan.queries[-1].sql)
+    assert [(a.name, a.datatype, a.nullable) for a in inferred] == [
+        (a.name, a.datatype, a.nullable) for a in described
+    ]
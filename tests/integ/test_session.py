@@ -11,6 +11,7 @@ import snowflake.connector
 from snowflake.snowpark import Row, Session
 from snowflake.snowpark._internal.utils import TempObjectType
 from snowflake.snowpark.exceptions import SnowparkSessionException
+from snowflake.snowpark.functions import col
 from snowflake.snowpark.session import _active_sessions, _get_active_session
 from tests.utils import TestFiles, Utils
 
@@ -20,6 +21,18 @@ def test_select_1(session):
     assert res == [Row(1)]
 
 
+def test_sql_with_bind_params(session):
+    df = session.sql(
+        "select * from values (1, 'a'), (2, 'b'), (3, 'c') as t(a, b) where a > ?",
+        params=[1],
+    )
+    assert df.schema.names == ["A", "B"]
+    assert df.filter(col("b") != "c").collect() == [Row(2, "b")]
+    other = session.sql("select ? as a, ? as c", params=[2, "d"])
+    assert df.join(other, "a").select("a", "c").collect() == [Row(2, "d")]
+    assert df.union_all(df).count() == 4
+
+
 def test_active_session(session):
     assert session == _get_active_session()
 
@@ -0,0 +1,5 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+# the benchmarks use the mock session of the unit tests
+from tests.unit.conftest import mock_server_connection, mock_session  # noqa: F401
@@ -0,0 +1,188 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import functools
+import operator
+import time
+import tracemalloc
+from typing import Tuple
+from unittest import mock
+
+from snowflake.snowpark._internal.analyzer.expression import Attribute
+from snowflake.snowpark._internal.analyzer.snowflake_plan import Query, SnowflakePlan
+from snowflake.snowpark._internal.analyzer.sql_rope import SqlRope
+from snowflake.snowpark._internal.analyzer.unary_plan_node import Project
+from snowflake.snowpark.functions import any_of, coalesce, col, lit, upper
+from snowflake.snowpark.types import LongType
+
+# Microbenchmarks of generating the SQL of large plans. Run them with
+#   pytest -s -m perf tests/perf/test_analyzer_perf.py
+
+WIDTH = 2000
+ROUNDS = 10
+SUBQUERIES = 500
+PIPELINE_STEPS = 300
+WITH_COLUMN_STEPS = 40
+
+
+def wide_projection(session) -> Project:
+    columns = [
+        coalesce(upper(col(f"c{i}")), lit("")).alias(f"c{i}") for i in range(WIDTH)
+    ]
+    return Project(
+        [c._expression for c in columns], session.table("test_table")._logical_plan
+    )
+
+
+def analyze_rounds(session, plan: Project) -> Tuple[float, str]:
+    # each round resolves the projection again, as a DataFrame would do when
+    # the same columns are used in another DataFrame
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        sql = (
+            session._analyzer.resolve_with_resolved_children(
+                plan, {plan.child: plan.child.resolved_plan}
+            )
+            .queries[-1]
+            .sql
+        )
+    return (time.perf_counter() - start) / ROUNDS, sql
+
+
+def test_wide_projection(mock_session):
+    mock_session.table("test_table")._plan
+    plan = wide_projection(mock_session)
+
+    mock_session._expression_sql_memo_enabled = False
+    without_memo, expected_sql = analyze_rounds(mock_session, plan)
+    mock_session._expression_sql_memo_enabled = True
+    with_memo, sql = analyze_rounds(mock_session, plan)
+
+    assert sql == expected_sql
+    print(
+        f"\nanalyzing a projection of {WIDTH} columns: "
+        f"{without_memo * 1000:.1f} ms without the expression memo, "
+        f"{with_memo * 1000:.1f} ms with it"
+    )
+
+
+def test_long_predicate(mock_session):
+    conditions = [col("a") == i for i in range(10000)]
+    df = mock_session.table("test_table")
+
+    start = time.perf_counter()
+    chain_sql = df.filter(functools.reduce(operator.or_, conditions)).queries
+    chain = time.perf_counter() - start
+    start = time.perf_counter()
+    balanced_sql = df.filter(any_of(conditions)).queries
+    balanced = time.perf_counter() - start
+
+    assert len(chain_sql["queries"][0]) == len(balanced_sql["queries"][0])
+    print(
+        f"\nanalyzing a predicate of {len(conditions)} terms: "
+        f"{chain * 1000:.1f} ms as a chain, {balanced * 1000:.1f} ms as a balanced tree"
+    )
+
+
+def test_many_subqueries(mock_session, mock_server_connection):
+    mock_server_connection.get_result_attributes.return_value = [
+        Attribute('"B"', LongType())
+    ]
+    subqueries = [
+        mock_session.table("other_table")
+        .filter(any_of([col(f"c{j}") == i for j in range(100)]))
+        .select("b")
+        for i in range(SUBQUERIES)
+    ]
+    for subquery in subqueries:
+        subquery._plan.schema_query
+    df = mock_session.table("test_table")
+    predicate = any_of([col("a").in_(subquery) for subquery in subqueries])
+
+    start = time.perf_counter()
+    plan = df.filter(predicate)._plan
+    slots = time.perf_counter() - start
+
+    # the substitution that was done before, replacing each subquery in the
+    # whole schema query one by one
+    sql = plan.queries[-1].sql
+    schema_query = sql
+    start = time.perf_counter()
+    for subquery in subqueries:
+        schema_query = schema_query.replace(
+            subquery._plan.queries[-1].sql, subquery._plan.schema_query
+        )
+    replace = time.perf_counter() - start
+
+    assert schema_query == plan.schema_query
+    print(
+        f"\nresolving a filter with {SUBQUERIES} subqueries "
+        f"({len(sql)} characters): {slots * 1000:.1f} ms, while replacing "
+        f"the subqueries one by one takes {replace * 1000:.1f} ms"
+    )
+
+
+def test_deep_pipeline(mock_session):
+    def generate_sql() -> Tuple[float, int, str]:
+        df = mock_session.table("test_table")
+        for i in range(PIPELINE_STEPS):
+            df = df.select(col("a"), (col("b") + i).alias("b")).filter(col("b") > i)
+        tracemalloc.start()
+        start = time.perf_counter()
+        sql = df.queries["queries"][-1]
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak, sql
+
+    mock_session.lazy_analysis_enabled = True
+    with_ropes, rope_peak, sql = generate_sql()
+    # the SQL of each child is copied into its parent, as plain strings would be
+    with mock.patch.object(
+        Query, "sql_rope", property(lambda self: SqlRope.of(self.sql))
+    ), mock.patch.object(
+        SnowflakePlan,
+        "schema_query_rope",
+        property(lambda self: SqlRope.of(self.schema_query)),
+    ):
+        with_copies, copy_peak, expected_sql = generate_sql()
+
+    assert sql == expected_sql
+    print(
+        f"\ngenerating the SQL of a pipeline of {PIPELINE_STEPS} steps: "
+        f"{with_ropes * 1000:.1f} ms and {rope_peak / 2**20:.1f} MiB with ropes, "
+        f"{with_copies * 1000:.1f} ms and {copy_peak / 2**20:.1f} MiB "
+        f"when the SQL of each child is copied"
+    )
+
+
+def test_with_column_chain(mock_session, mock_server_connection):
+    mock_server_connection.get_result_attributes.return_value = [
+        Attribute('"A"', LongType()),
+        Attribute('"B"', LongType()),
+    ]
+
+    def nesting() -> Tuple[int, int]:
+        df = mock_session.table("test_table")
+        for i in range(WITH_COLUMN_STEPS):
+            df = df.with_column(f"c{i}", col("a") > i)
+        sql = df.queries["queries"][-1]
+        depth = max_depth = 0
+        for c in sql:
+            depth += c == "("
+            depth -= c == ")"
+            max_depth = max(max_depth, depth)
+        return sql.upper().count("SELECT"), max_depth
+
+    mock_session._sql_fusion_enabled = False
+    nested_selects, nested_depth = nesting()
+    mock_session._sql_fusion_enabled = True
+    merged_selects, merged_depth = nesting()
+
+    assert merged_selects == 1
+    print(
+        f"\nthe SQL of {WITH_COLUMN_STEPS} chained with_column() calls: "
+        f"{nested_selects} SELECTs and a nesting depth of {nested_depth} without "
+        f"merging, {merged_selects} SELECT and a nesting depth of {merged_depth} "
+        f"with merging"
+    )
@@ -0,0 +1,68 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from snowflake.snowpark import ResultSet
+from snowflake.snowpark._internal.utils import result_set_to_rows
+
+# Benchmarks of the memory that the result of DataFrame.collect() takes. Run them with
+#   pytest -s -m perf tests/perf/test_result_set_perf.py
+
+ROWS = 200000
+NAMES = ["ID", "NAME", "PRICE", "FLAG"]
+
+
+def fetched_rows():
+    # the values are created once, so only the containers are measured
+    names = [f"name{i % 100}" for i in range(100)]
+    return [(i, names[i % 100], i * 0.5, i % 2 == 0) for i in range(ROWS)]
+
+
+def measure(convert: Callable) -> Tuple[float, int]:
+    rows = fetched_rows()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = convert(rows)
+    elapsed = time.perf_counter() - start
+    # the fetched tuples are released once they are converted
+    del rows
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(result) == ROWS
+    return elapsed, size
+
+
+def test_collect_memory():
+    meta = [type("Meta", (), {"name": name}) for name in NAMES]
+    rows_time, rows_size = measure(lambda rows: result_set_to_rows(rows, meta))
+    result_set_time, result_set_size = measure(
+        lambda rows: ResultSet._from_rows(rows, NAMES)
+    )
+
+    assert result_set_size < rows_size / 2
+    print(
+        f"\ncollecting {ROWS} rows of {len(NAMES)} columns: "
+        f"{rows_size / 2**20:.1f} MiB in {rows_time * 1000:.1f} ms as Row objects, "
+        f"{result_set_size / 2**20:.1f} MiB in {result_set_time * 1000:.1f} ms "
+        f"as a ResultSet"
+    )
+
+
+def test_iterate_result_set():
+    rows = fetched_rows()
+    result_set = ResultSet._from_rows(rows, NAMES)
+    start = time.perf_counter()
+    total = sum(row.ID for row in result_set)
+    iterate = time.perf_counter() - start
+    start = time.perf_counter()
+    column_total = sum(result_set.column("ID"))
+    column = time.perf_counter() - start
+
+    assert total == column_total
+    print(
+        f"\nsumming a column of {ROWS} rows: {iterate * 1000:.1f} ms over Row "
+        f"views, {column * 1000:.1f} ms over the column"
+    )
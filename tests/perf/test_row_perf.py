@@ -0,0 +1,58 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import itertools
+import sys
+import time
+
+from snowflake.snowpark import Row
+from snowflake.snowpark._internal.utils import result_set_to_iter, result_set_to_rows
+
+# Benchmarks of creating Row objects from a result and reading their values. Run them
+# with
+#   pytest -s -m perf tests/perf/test_row_perf.py
+
+ROWS = 10000000
+NAMES = ["ID", "NAME", "PRICE", "FLAG"]
+META = [type("Meta", (), {"name": name}) for name in NAMES]
+# the values are created once, so only the rows are measured
+VALUES = (1, "name", 0.5, True)
+
+
+def fetched_rows(n: int):
+    return itertools.repeat(VALUES, n)
+
+
+def test_create_and_read_rows():
+    start = time.perf_counter()
+    for _ in fetched_rows(ROWS):
+        pass
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in result_set_to_iter(fetched_rows(ROWS), META):
+        pass
+    create = time.perf_counter() - start
+
+    start = time.perf_counter()
+    total = 0
+    for row in result_set_to_iter(fetched_rows(ROWS), META):
+        total += row.ID
+        _ = row["PRICE"]
+    read = time.perf_counter() - start - create
+
+    assert total == ROWS
+    print(
+        f"\n{ROWS} rows of {len(NAMES)} columns: iterating the result takes "
+        f"{baseline:.2f} s, creating Row objects {create:.2f} s, reading a value "
+        f"by attribute and by name {read:.2f} s"
+    )
+
+
+def test_row_size():
+    rows = result_set_to_rows(list(fetched_rows(1000)), META)
+    # a row is a tuple without a __dict__, and all rows share the column names
+    assert sys.getsizeof(rows[0]) == sys.getsizeof(VALUES)
+    assert not hasattr(rows[0], "__dict__")
+    assert all(row._fields is rows[0]._fields for row in rows)
+    assert Row(*VALUES) == rows[0]
@@ -0,0 +1,21 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+from unittest import mock
+
+import pytest
+
+from snowflake.snowpark import Session
+from snowflake.snowpark._internal.server_connection import ServerConnection
+
+
+@pytest.fixture
+def mock_server_connection() -> ServerConnection:
+    fake_snowflake_connection = mock.create_autospec(ServerConnection)
+    fake_snowflake_connection._conn = mock.MagicMock()
+    return fake_snowflake_connection
+
+
+@pytest.fixture
+def mock_session(mock_server_connection) -> Session:
+    return Session(mock_server_connection)
@@ -253,6 +253,16 @@ def test_plan_cannot_create_literal():
     assert ex.message == f"Cannot create a Literal for {t}"
 
 
+def test_plan_bind_parameters_in_subquery():
+    ex = SnowparkClientExceptionMessages.PLAN_BIND_PARAMETERS_IN_SUBQUERY()
+    assert type(ex) == SnowparkPlanException
+    assert ex.error_code == "1207"
+    assert ex.message == (
+        "A DataFrame created by Session.sql() with bind parameters can't be "
+        "used as a subquery of an expression."
+    )
+
+
 def test_sql_last_query_return_resultset():
     ex = SnowparkClientExceptionMessages.SQL_LAST_QUERY_RETURN_RESULTSET()
     assert type(ex) == SnowparkSQLException
@@ -370,6 +380,14 @@ def test_server_failed_fetch_pandas():
     assert ex.message == f"Failed to fetch a Pandas Dataframe. The error is: {message}"
 
 
+def test_server_failed_fetch_arrow():
+    message = "unknown"
+    ex = SnowparkClientExceptionMessages.SERVER_FAILED_FETCH_ARROW(message)
+    assert isinstance(ex, SnowparkFetchDataException)
+    assert ex.error_code == "1412"
+    assert ex.message == f"Failed to fetch an Arrow table. The error is: {message}"
+
+
 def test_server_udf_upload_file_stream_closed():
     dest_filename = "file"
     ex = SnowparkClientExceptionMessages.SERVER_UDF_UPLOAD_FILE_STREAM_CLOSED(
@@ -0,0 +1,106 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import functools
+import operator
+import re
+from unittest import mock
+
+import pytest
+
+import snowflake.snowpark._internal.analyzer.analyzer as analyzer
+from snowflake.snowpark._internal.analyzer.expression import (
+    Attribute,
+    Expression,
+    FunctionExpression,
+)
+from snowflake.snowpark import Row
+from snowflake.snowpark.exceptions import SnowparkPlanException
+from snowflake.snowpark.functions import col, in_, lit, upper
+from snowflake.snowpark.types import LongType
+
+
+class MyFunction(FunctionExpression):
+    pass
+
+
+def test_dispatch_by_class(mock_session):
+    expr = MyFunction("my_func", [col("a")._expression], False)
+    assert mock_session._analyzer.analyze(expr) == 'my_func("A")'
+    # the subclass is handled by the method of its base class
+    assert analyzer._EXPRESSION_ANALYZERS.lookup(
+        MyFunction
+    ) is analyzer._EXPRESSION_ANALYZERS.lookup(FunctionExpression)
+
+    with pytest.raises(SnowparkPlanException) as ex_info:
+        mock_session._analyzer.analyze(Expression())
+    assert "Invalid type" in str(ex_info)
+
+
+def test_memoized_expression_sql(mock_session):
+    column = upper(col("a") + lit(1)).alias("b")
+    df = mock_session.table("test_table")
+    with mock.patch.object(
+        analyzer, "function_expression", wraps=analyzer.function_expression
+    ) as function_expression:
+        for i in range(10):
+            df = df.with_column(f"c{i}", column)
+    assert function_expression.call_count == 1
+    assert (
+        mock_session._analyzer.expression_sql_memo[column._expression.child]
+        == 'upper(("A" + 1 :: bigint))'
+    )
+
+    mock_session._expression_sql_memo_enabled = False
+    with mock.patch.object(
+        analyzer, "function_expression", wraps=analyzer.function_expression
+    ) as function_expression:
+        df.with_column("d", column).with_column("e", column)
+    assert function_expression.call_count == 2
+
+
+def test_context_dependent_expression_sql_is_not_memoized(mock_session):
+    memo = mock_session._analyzer.expression_sql_memo
+    attribute = Attribute('"A"', LongType())
+    expr = FunctionExpression("upper", [attribute], False)
+    mock_session._analyzer.alias_maps_to_use = {attribute.expr_id: '"B"'}
+    assert mock_session._analyzer.analyze(expr) == 'upper("B")'
+    mock_session._analyzer.alias_maps_to_use = {}
+    assert mock_session._analyzer.analyze(expr) == 'upper("A")'
+    assert expr not in memo and attribute not in memo
+
+
+def test_deep_operator_chain(mock_session):
+    # the chain is deeper than the recursion limit
+    conditions = [col("a") == i for i in range(5000)]
+    predicate = functools.reduce(operator.or_, conditions)
+    sql = mock_session._analyzer.analyze((~predicate).alias("b")._expression)
+    assert sql.startswith("NOT " + "(" * 4999 + '("A" = 0 :: bigint) OR ')
+    assert sql.endswith(' OR ("A" = 4999 :: bigint)) AS "B"')
+
+    df = mock_session.table("test_table").filter(predicate)
+    assert df.queries["queries"][0].endswith(sql[4:-7])
+
+
+def test_large_in_list_is_loaded_into_table(mock_session):
+    mock_session.large_in_list_threshold = 3
+    df = mock_session.table("test_table")
+
+    plan = df.filter(col("a").in_([1, 2, None])).select(col("a"))._plan
+    create, insert, select = plan.queries
+    table_name = re.search(r"SNOWPARK_TEMP_TABLE_\w+", create.sql).group()
+    assert create.sql == f' CREATE  TEMPORARY  TABLE {table_name}("C1" BIGINT)'
+    assert insert.rows == [Row(1), Row(2), Row(None)]
+    assert select.sql.endswith(f'"A" IN (( SELECT  *  FROM ({table_name}))))')
+    assert plan.post_actions[0].sql.endswith(f"DROP  TABLE  If  EXISTS {table_name}")
+    # the schema query doesn't need the table
+    assert table_name not in plan.schema_query
+
+    plan = df.filter(in_([col("a"), col("b")], [[1, "x"], [2, None], [3, "z"]]))._plan
+    assert '("C1" BIGINT, "C2" STRING)' in plan.queries[0].sql
+
+    # a list shorter than the threshold, or whose values can't be bound as the
+    # values of a typed column, is written in the SQL
+    for values in [[1, 2], [1, 2.5, 3], [None, None, None]]:
+        plan = df.filter(col("a").in_(values))._plan
+        assert len(plan.queries) == 1 and not plan.post_actions
@@ -0,0 +1,209 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import itertools
+from typing import Dict, Iterator, List
+from unittest import mock
+
+import pytest
+
+from snowflake.connector import SnowflakeConnection
+from snowflake.connector.constants import QueryStatus
+from snowflake.connector.cursor import ResultMetadata
+from snowflake.connector.errors import DatabaseError, ProgrammingError
+from snowflake.snowpark import AsyncJob, QueryHistory, ResultSet, Row, Session
+from snowflake.snowpark._internal.server_connection import ServerConnection
+
+
+class FakeConnection:
+    """Simulates the status of asynchronous queries, which are running until
+    their status is polled a given number of times."""
+
+    is_still_running = staticmethod(SnowflakeConnection.is_still_running)
+    database = "DB"
+    schema = "PUBLIC"
+
+    def __init__(self) -> None:
+        self.statuses: Dict[str, Iterator[QueryStatus]] = {}
+        self.results: Dict[str, List[tuple]] = {}
+        self.polls = 0
+
+    def submit(self, query_id: str, rows: List[tuple], polls: int = 2, status=None):
+        self.statuses[query_id] = itertools.chain(
+            [QueryStatus.RUNNING] * polls,
+            itertools.repeat(status or QueryStatus.SUCCESS),
+        )
+        self.results[query_id] = rows
+
+    def get_query_status(self, query_id: str) -> QueryStatus:
+        self.polls += 1
+        return next(self.statuses[query_id])
+
+    def get_query_status_throw_if_error(self, query_id: str) -> QueryStatus:
+        status = self.get_query_status(query_id)
+        if status == QueryStatus.FAILED_WITH_ERROR:
+            raise ProgrammingError(f"query {query_id} failed", sfqid=query_id)
+        return status
+
+    def cursor(self) -> "FakeCursor":
+        return FakeCursor(self)
+
+    def is_closed(self) -> bool:
+        return False
+
+
+class FakeCursor:
+    """Waits for an asynchronous query by polling its status, like the cursor
+    of the connector does when its results are fetched."""
+
+    def __init__(self, connection: FakeConnection) -> None:
+        self.connection = connection
+        self.description = [ResultMetadata("A", 0, None, None, 38, 0, False)]
+
+    def get_results_from_sfqid(self, query_id: str) -> None:
+        self.query_id = query_id
+
+    def fetchall(self) -> List[tuple]:
+        while True:
+            status = self.connection.get_query_status(self.query_id)
+            if not self.connection.is_still_running(status):
+                break
+        if status != QueryStatus.SUCCESS:
+            raise DatabaseError(f"Status of query '{self.query_id}' is {status.name}")
+        return self.connection.results[self.query_id]
+
+
+@pytest.fixture
+def fake_connection() -> FakeConnection:
+    return FakeConnection()
+
+
+@pytest.fixture
+def session(fake_connection) -> Session:
+    conn = ServerConnection({}, mock.MagicMock())
+    conn._conn = fake_connection
+    conn._cursor.execute_async.side_effect = lambda *args, **kwargs: {
+        "queryId": f"q{conn._cursor.execute_async.call_count}"
+    }
+    # the results are fetched with the pooled cursor
+    fake_cursor = FakeCursor(fake_connection)
+    conn._cursor.get_results_from_sfqid.side_effect = fake_cursor.get_results_from_sfqid
+    conn._cursor.fetchall.side_effect = fake_cursor.fetchall
+    conn._cursor.description = fake_cursor.description
+    conn._telemetry_client = mock.MagicMock()
+    with mock.patch.object(conn, "get_session_id", return_value=1):
+        return Session(conn)
+
+
+def test_collect_nowait(session, fake_connection):
+    fake_connection.submit("q1", [(1,), (2,)])
+    with QueryHistory(session) as history:
+        session._conn.add_query_listener(history)
+        job = session.sql("select a from t").collect_nowait()
+    assert isinstance(job, AsyncJob)
+    assert job.query_id == "q1"
+    assert job.query == "select a from t"
+    assert history.queries[0].query_id == "q1"
+
+    assert not job.is_done()
+    assert not job.is_done()
+    assert job.is_done()
+    assert job.result() == [Row(A=1), Row(A=2)]
+
+
+def test_result_waits_for_query(session, fake_connection):
+    fake_connection.submit("q1", [(3,)], polls=5)
+    job = session.sql("select a from t").count_nowait()
+    assert fake_connection.polls == 0
+    assert job.result() == 3
+    assert fake_connection.polls == 6
+    # the result is only retrieved once
+    assert job.result() == 3
+    assert fake_connection.polls == 6
+
+
+def test_concurrent_jobs(session, fake_connection):
+    for i in range(3):
+        fake_connection.submit(f"q{i + 1}", [(i,)], polls=2 - i)
+    jobs = [session.sql(f"select {i} as a").collect_nowait() for i in range(3)]
+    # all queries are submitted before any of them is waited for
+    assert session._conn._cursor.execute_async.call_count == 3
+    assert [job.is_done() for job in jobs] == [False, False, True]
+    assert [job.result() for job in jobs] == [[Row(A=i)] for i in range(3)]
+
+
+def test_post_actions_run_with_result(session, fake_connection):
+    fake_connection.submit("q1", [(1,)])
+    df = session.create_dataframe([[i] for i in range(1000)], schema=["a"])
+    cursor = session._conn._cursor
+
+    def executed(keyword: str) -> int:
+        return sum(keyword in c.args[0] for c in cursor.execute.call_args_list)
+
+    job = df.collect_nowait()
+    # the temporary table is created and filled before the query is submitted
+    cursor.executemany.assert_called_once()
+    assert executed("CREATE") == 1
+    assert executed("DROP") == 0
+    assert "SNOWPARK_TEMP_TABLE" in job.query
+
+    job.result()
+    assert executed("DROP") == 1
+    job.result()
+    assert executed("DROP") == 1
+
+
+def test_failed_job(session, fake_connection):
+    fake_connection.submit("q1", [], status=QueryStatus.FAILED_WITH_ERROR)
+    df = session.create_dataframe([[i] for i in range(1000)], schema=["a"])
+    job = df.collect_nowait()
+    with pytest.raises(ProgrammingError, match="query q1 failed"):
+        job.result()
+    # the temporary table is still dropped
+    assert "DROP" in session._conn._cursor.execute.call_args.args[0]
+
+
+def test_cancel(session, fake_connection):
+    fake_connection.submit("q1", [])
+    job = session.sql("select a from t").collect_nowait()
+    job.cancel()
+    assert session._conn._cursor.execute.call_args.args[0] == (
+        "select system$cancel_query('q1')"
+    )
+
+
+def test_cancel_drops_after_query_stops(session, fake_connection):
+    fake_connection.submit("q1", [], polls=3, status=QueryStatus.ABORTED)
+    df = session.create_dataframe([[i] for i in range(1000)], schema=["a"])
+    cursor = session._conn._cursor
+    polls_at_drop = []
+    cursor.execute.side_effect = (
+        lambda query, *args, **kwargs: (
+            polls_at_drop.append(fake_connection.polls) if "DROP" in query else None
+        )
+        or mock.MagicMock()
+    )
+
+    job = df.collect_nowait()
+    with mock.patch("snowflake.snowpark.async_job._CANCEL_POLL_INTERVAL", 0):
+        job.cancel()
+    # the temporary table is dropped once the query isn't running anymore
+    assert polls_at_drop == [4]
+
+
+def test_results_use_pooled_cursor(session, fake_connection):
+    fake_connection.submit("q1", [(1,), (2,)])
+    fake_connection.cursor = mock.Mock(side_effect=AssertionError("new cursor"))
+    session.columnar_results_enabled = True
+    result = session.sql("select a from t").collect_nowait().result()
+    # the result is built like the result of collect()
+    assert isinstance(result, ResultSet)
+    assert result == [Row(A=1), Row(A=2)]
+    assert session._conn._idle_cursors == [session._conn._cursor]
+
+
+def test_save_as_table_nowait(session, fake_connection):
+    fake_connection.submit("q1", [("Table T successfully created.",)])
+    job = session.sql("select 1 as a").write.save_as_table_nowait("t", mode="overwrite")
+    assert job.query.startswith(" CREATE  OR  REPLACE")
+    assert job.result() is None
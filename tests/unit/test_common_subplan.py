@@ -0,0 +1,142 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+from unittest import mock
+
+import pytest
+
+from snowflake.snowpark._internal.analyzer.common_subplan import (
+    eliminate_common_subplans,
+    with_common_subplans,
+)
+from snowflake.snowpark._internal.analyzer.snowflake_plan import Query, SnowflakePlan
+from snowflake.snowpark._internal.analyzer.sql_rope import SqlRope, join_fragments
+from snowflake.snowpark.functions import col
+
+
+COLUMNS = ", ".join(f"c{i}" for i in range(20))
+
+
+def build_df(session):
+    return session.table("test_table").select(
+        col("a"), *[(col("b") + i).alias(f"b{i}") for i in range(5)]
+    )
+
+
+@pytest.fixture
+def df(mock_session):
+    return build_df(mock_session)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_repeated_subplan_is_defined_once(mock_session, lazy):
+    mock_session.lazy_analysis_enabled = lazy
+    df = build_df(mock_session)
+    subplan_sql = df._plan.queries[-1].sql
+    result = df.union_all(df.filter(col("b1") > 2)).union_all(df)
+
+    sql = result._execution_plan.queries[-1].sql
+    assert sql.startswith(" WITH SNOWPARK_TEMP_CTE_")
+    assert sql.count(subplan_sql) == 1
+    assert sql.count("( SELECT  *  FROM (SNOWPARK_TEMP_CTE_") == 3
+    assert mock_session._eliminated_sql_bytes == len(
+        result._plan.queries[-1].sql
+    ) - len(sql)
+    # the cached plan isn't changed, so it can be nested in other plans
+    assert result._plan.queries[-1].sql.count(subplan_sql) == 3
+
+
+def test_plan_is_rewritten_once(mock_session, df):
+    result = df.union_all(df)
+    sql = result._execution_plan.queries[-1].sql
+    eliminated_bytes = mock_session._eliminated_sql_bytes
+    assert eliminated_bytes > 0
+    for _ in range(3):
+        result.queries
+        assert result._execution_plan.queries[-1].sql == sql
+    assert mock_session._eliminated_sql_bytes == eliminated_bytes
+
+
+@pytest.mark.parametrize(
+    "statement", ["insert into t {}", "create table t as {}", "( {} )", "with x as {}"]
+)
+def test_only_queries_are_rewritten(mock_session, statement):
+    subplan = SnowflakePlan([Query(f" SELECT {COLUMNS} FROM t WHERE a > 1")], "")
+    union = join_fragments(
+        " UNION ALL ", ["(" + subplan.queries[-1].sql_rope + ")"] * 3
+    )
+    prefix, suffix = statement.split("{}")
+    plan = SnowflakePlan(
+        [Query(prefix + union + suffix)],
+        "",
+        session=mock_session,
+        subquery_plans=[subplan],
+    )
+    rewritten = with_common_subplans(plan) is not plan
+    assert rewritten == (not statement.startswith(("insert", "create")))
+
+
+def test_cte_names_are_deterministic(df):
+    assert df.union_all(df).queries == df.union_all(df).queries
+
+
+def test_cte_optimization_disabled(mock_session, df):
+    mock_session._cte_optimization_enabled = False
+    result = df.union_all(df)
+    assert result.queries["queries"][-1] == result._plan.queries[-1].sql.strip()
+    assert mock_session._eliminated_sql_bytes == 0
+
+
+def test_nested_common_subplans():
+    inner = SqlRope.of(f" SELECT {COLUMNS} FROM t WHERE a > 1")
+    outer = f" SELECT {COLUMNS} FROM (" + inner + ") WHERE b > 2"
+    sql = join_fragments(
+        " UNION ALL ",
+        ["(" + outer + ")", "(" + outer + ")", "(" + inner + ")", "(" + inner + ")"],
+    )
+    result = eliminate_common_subplans(sql, [inner, outer])
+    # the inner CTE is defined first, and the outer CTE refers to it
+    assert result.count(str(inner)) == 1
+    assert result.count("FROM t WHERE") == 1
+    assert result.index(str(inner)) < result.index("WHERE b > 2")
+
+
+def test_only_subplans_are_extracted():
+    # a parenthesized query with the same SQL as a subplan can be correlated, and
+    # only the copies of the subplan itself are extracted
+    subplan = SqlRope.of(f" SELECT {COLUMNS} FROM t2 WHERE t2.a = t1.a")
+    subquery = str(subplan)
+    sql = SqlRope.of(
+        f"SELECT * FROM t1 WHERE EXISTS ({subquery}) OR NOT EXISTS ({subquery})"
+    )
+    assert eliminate_common_subplans(sql, [subplan]) is None
+    sql = join_fragments(" UNION ALL ", [sql, *["(" + subplan + ")"] * 3])
+    result = eliminate_common_subplans(sql, [subplan])
+    assert result.count(f"EXISTS ({subquery})") == 2
+    assert result.count(" SELECT  *  FROM (SNOWPARK_TEMP_CTE_") == 3
+
+
+def test_shared_subplan_in_deep_rope():
+    # the rope of a deep plan is deeper than the recursion limit
+    subplan = SqlRope.of(f" SELECT {COLUMNS} FROM t WHERE a > 1")
+    rope = "(" + subplan + ")"
+    for _ in range(5000):
+        rope = "(" + join_fragments(" UNION ALL ", [rope, "(" + subplan + ")"]) + ")"
+    result = eliminate_common_subplans(rope, [subplan])
+    assert result.count(str(subplan)) == 1
+
+
+@pytest.mark.parametrize(
+    "action",
+    [
+        lambda df: df.collect(),
+        lambda df: df.cache_result(),
+        lambda df: df.create_or_replace_view("v"),
+        lambda df: df.write.save_as_table("t"),
+    ],
+)
+def test_every_action_executes_rewritten_plan(mock_session, df, action):
+    mock_session._conn._telemetry_client = mock.MagicMock()
+    action(df.union_all(df))
+    executed_plan = mock_session._conn.execute.call_args[0][0]
+    assert " WITH SNOWPARK_TEMP_CTE_" in executed_plan.queries[-1].sql
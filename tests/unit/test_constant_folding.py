@@ -0,0 +1,211 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import functools
+import math
+import operator
+from decimal import Decimal
+
+import pytest
+
+from snowflake.snowpark import Column
+from snowflake.snowpark._internal.analyzer.constant_folding import fold_constants
+from snowflake.snowpark._internal.analyzer.expression import Attribute, Literal
+from snowflake.snowpark.functions import col, lit, sum as sum_, upper
+from snowflake.snowpark.types import (
+    BooleanType,
+    DecimalType,
+    DoubleType,
+    FloatType,
+    IntegerType,
+    LongType,
+    StringType,
+)
+
+NULL_INT = lit(None).cast(LongType())
+
+
+def literal(value, datatype):
+    return Column(Literal(value, datatype))
+
+
+@pytest.mark.parametrize(
+    "column, value, datatype",
+    [
+        (lit(1) + lit(2), 3, LongType()),
+        (lit(1) - lit(2) * lit(3), -5, LongType()),
+        (-lit(4), -4, LongType()),
+        (literal(2, IntegerType()) * lit(3), 6, LongType()),
+        (lit(7) % lit(3), 1, LongType()),
+        (lit(-7) % lit(3), -1, LongType()),
+        (lit(7) % lit(-3), 1, LongType()),
+        (lit(10**37) * lit(9), 9 * 10**37, LongType()),
+        (lit(1.5) + lit(2), 3.5, DoubleType()),
+        (lit(1) / lit(4.0), 0.25, DoubleType()),
+        (lit(-7.5) % lit(2), -1.5, DoubleType()),
+        (-lit(0.5), -0.5, DoubleType()),
+        (literal(None, LongType()) + lit(1), None, LongType()),
+        (literal(None, DoubleType()) * lit(1), None, DoubleType()),
+        (lit(1) < lit(2), True, BooleanType()),
+        (lit(2) == lit(2.0), True, BooleanType()),
+        (lit(2**53 + 1) == lit(float(2**53)), True, BooleanType()),
+        (lit(3) >= lit(4), False, BooleanType()),
+        (lit("a") < lit("b"), True, BooleanType()),
+        (lit("b") != lit("b"), False, BooleanType()),
+        (lit("é") > lit("z"), True, BooleanType()),
+        (lit(False) < lit(True), True, BooleanType()),
+        (literal(None, LongType()) == lit(1), None, BooleanType()),
+        (
+            literal(None, LongType()).equal_null(literal(None, LongType())),
+            True,
+            BooleanType(),
+        ),
+        (lit(1).equal_null(literal(None, LongType())), False, BooleanType()),
+        (lit(True) & lit(False), False, BooleanType()),
+        (lit(True) | lit(False), True, BooleanType()),
+        (literal(None, BooleanType()) & lit(False), False, BooleanType()),
+        (literal(None, BooleanType()) & lit(True), None, BooleanType()),
+        (literal(None, BooleanType()) | lit(True), True, BooleanType()),
+        (literal(None, BooleanType()) | lit(False), None, BooleanType()),
+        (~lit(True), False, BooleanType()),
+        (~literal(None, BooleanType()), None, BooleanType()),
+        (lit(1).is_null(), False, BooleanType()),
+        (lit(None).is_not_null(), False, BooleanType()),
+        ((lit(1) + lit(2) > lit(2)) & ~(lit("a") == lit("b")), True, BooleanType()),
+    ],
+)
+def test_folded_constants(column, value, datatype):
+    folded = fold_constants(column._expression)
+    assert isinstance(folded, Literal)
+    assert folded.value == value and type(folded.value) is type(value)
+    assert folded.datatype == datatype
+
+
+@pytest.mark.parametrize(
+    "column",
+    [
+        # the quotient of integers is a decimal
+        lit(1) / lit(2),
+        # Snowflake raises an error
+        lit(1) % lit(0),
+        lit(1.0) / lit(0),
+        lit(10**37) * lit(10),
+        lit(1e308) * lit(10),
+        # NaN is equal to itself in Snowflake
+        lit(math.nan) == lit(math.nan),
+        literal(Decimal("1.5"), DecimalType(2, 1)) + lit(1),
+        lit("a") + lit("b"),
+        lit(1) == lit("1"),
+        lit(1) & lit(True),
+        lit(None) + lit(1),
+        col("a") + lit(1),
+    ],
+)
+def test_unfolded_constants(column):
+    assert fold_constants(column._expression) is column._expression
+
+
+def test_partially_folded_expression():
+    expr = ((lit(1) + lit(2)) * col("a") - (lit(3) - lit(4))).alias("b")._expression
+    folded = fold_constants(expr)
+    assert folded.name == '"B"'
+    assert folded.child.left.left.value == 3
+    assert folded.child.left.right is expr.child.left.right
+    assert folded.child.right.value == -1
+    # an unchanged subtree is reused
+    other = (col("a") + lit(1))._expression
+    assert fold_constants(other) is other
+
+
+@pytest.mark.parametrize(
+    "column, expected",
+    [
+        (lit(1).cast(LongType()), lit(1)),
+        (lit(1.5).cast(FloatType()), lit(1.5)),
+        (lit(True).cast(BooleanType()), lit(True)),
+        (NULL_INT.cast(LongType()), NULL_INT),
+        (col("a").cast(LongType()).cast(LongType()), col("a").cast(LongType())),
+        (
+            col("a").try_cast(LongType()).cast(LongType()),
+            col("a").try_cast(LongType()),
+        ),
+    ],
+)
+def test_redundant_casts(mock_session, column, expected):
+    analyze = mock_session._analyzer.analyze
+    mock_session._analyzer.alias_maps_to_use = {}
+    assert analyze(column._expression) == analyze(expected._expression)
+
+
+@pytest.mark.parametrize(
+    "column",
+    [
+        lit(1).cast(DoubleType()),
+        lit(1.5).cast(DoubleType()),
+        lit("a").cast(StringType()),
+        col("a").cast(LongType()).cast(StringType()),
+        literal(None, DecimalType(2, 1)).cast(DecimalType(2, 1)),
+    ],
+)
+def test_necessary_casts(column):
+    assert fold_constants(column._expression) is column._expression
+
+
+def test_deep_chain_is_folded():
+    # the chain is deeper than the recursion limit
+    column = functools.reduce(operator.add, [lit(1)] * 5000)
+    assert fold_constants(column._expression).value == 5000
+
+
+@pytest.fixture
+def df(mock_session, mock_server_connection):
+    mock_server_connection.get_result_attributes.return_value = [
+        Attribute('"A"', LongType()),
+        Attribute('"B"', LongType()),
+    ]
+    return mock_session.table("t")
+
+
+def test_constants_are_folded_in_sql(mock_session, df):
+    result = df.select((lit(1) + lit(2) * col("a")).alias("x")).filter(
+        (lit(1) + lit(2) < col("x")) & ~(lit(1) > lit(2))
+    )
+    assert result.queries["queries"][-1] == (
+        'SELECT  *  FROM ( SELECT (1 :: bigint + (2 :: bigint * "A")) AS "X" FROM '
+        '(t)) WHERE ((3 :: bigint < "X") AND True :: boolean)'
+    )
+
+    mock_session._constant_folding_enabled = False
+    assert df.select((lit(1) + lit(2)).alias("x")).queries["queries"][-1] == (
+        'SELECT (1 :: bigint + 2 :: bigint) AS "X" FROM (t)'
+    )
+
+
+def test_unaliased_constants_are_not_folded(df):
+    # the name of the column is the SQL of its expression
+    result = df.select(lit(1) + lit(2), (lit(1) + lit(2)).alias("c"))
+    sql = result.queries["queries"][-1]
+    assert sql == 'SELECT (1 :: bigint + 2 :: bigint), 3 :: bigint AS "C" FROM (t)'
+
+
+def test_aggregation_constants_are_not_folded(df):
+    # the expressions of an aggregation must match its grouping expressions
+    grouping = col("a") + lit(1) * lit(2)
+    sql = df.group_by(grouping).agg(sum_(col("b") + lit(1) + lit(1)).alias("s"))
+    sql = sql.queries["queries"][-1]
+    assert sql.count('("A" + (1 :: bigint * 2 :: bigint))') == 2
+    assert '((("B" + 1 :: bigint) + 1 :: bigint))' in sql
+
+
+def test_folded_and_unfolded_sql_are_memoized_separately(mock_session, df):
+    column = lit(1) + lit(2)
+    folded = df.select(upper(column).alias("c")).queries["queries"][-1]
+    unfolded = df.select(upper(column)).queries["queries"][-1]
+    assert folded == 'SELECT upper(3 :: bigint) AS "C" FROM (t)'
+    assert unfolded == "SELECT upper((1 :: bigint + 2 :: bigint)) FROM (t)"
+    analyzer = mock_session._analyzer
+    assert analyzer.expression_sql_memo[column._expression] == "3 :: bigint"
+    assert (
+        analyzer.unfolded_expression_sql_memo[column._expression]
+        == "(1 :: bigint + 2 :: bigint)"
+    )
@@ -2,8 +2,19 @@
 #
 # Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
 #
-from snowflake.snowpark import DataFrame, DataFrameNaFunctions, DataFrameStatFunctions
+import re
+from unittest import mock
+
+from snowflake.connector.cursor import ResultMetadata
+from snowflake.snowpark import (
+    DataFrame,
+    DataFrameNaFunctions,
+    DataFrameStatFunctions,
+    Session,
+)
+from snowflake.snowpark._internal.server_connection import ServerConnection
 from snowflake.snowpark.dataframe import _get_unaliased
+from snowflake.snowpark.functions import col
 
 
 def test_get_unaliased():
@@ -76,3 +87,56 @@ def test_dataframe_method_alias():
     assert (
         DataFrameStatFunctions.approxQuantile == DataFrameStatFunctions.approx_quantile
     )
+
+
+def test_lazy_analysis(mock_session):
+    eager_df = mock_session.table("test_table").filter(col("a") > 1).select("a")
+    mock_session.lazy_analysis_enabled = True
+    with mock.patch.object(
+        mock_session._analyzer, "resolve", wraps=mock_session._analyzer.resolve
+    ) as resolve:
+        df = mock_session.table("test_table").filter(col("a") > 1)
+        df = df.select("a").sort(col("a"))
+        resolve.assert_not_called()
+        assert df._logical_plan.resolved_plan is None
+
+        plan = df._plan
+        assert df._plan is plan
+        assert resolve.call_count == 1
+        assert (
+            df.queries["queries"][-1] == eager_df.sort(col("a")).queries["queries"][-1]
+        )
+
+
+def test_lazy_analysis_deep_plan(mock_session):
+    mock_session.lazy_analysis_enabled = True
+    df = mock_session.table("test_table")
+    for i in range(2000):
+        df = df.limit(10) if i % 2 else df.filter(col("a") > i)
+    assert df.queries["queries"][-1].startswith("SELECT")
+
+
+def test_join_describe_count():
+    conn = ServerConnection({}, mock.MagicMock())
+    conn._conn.is_closed.return_value = False
+
+    def describe(query):
+        # every table has a key column and a value column named after it
+        table = re.search(r"\bfrom \((\w+)\)", query, re.IGNORECASE).group(1)
+        return [
+            ResultMetadata("ID", 0, None, None, 38, 0, False),
+            ResultMetadata(f"V_{table}", 0, None, None, 38, 0, True),
+        ]
+
+    conn._cursor.describe.side_effect = describe
+    session = Session(conn)
+    df = session.table("fact")
+    for i in range(15):
+        dim = session.table(f"dim_{i}")
+        df = df.join(dim, "id", "left" if i % 2 else "inner")
+    df = df.union_all(df.join(session.table("dim_0"), "id", "leftsemi"))
+
+    # each table is described once to find the common columns, and the schema
+    # of the joins and the union is derived from them
+    assert len(df.schema.fields) == 17
+    assert conn._cursor.describe.call_count == 16
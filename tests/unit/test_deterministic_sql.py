@@ -0,0 +1,74 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import copy
+import re
+from unittest import mock
+
+import pytest
+
+from snowflake.snowpark import Session
+from snowflake.snowpark._internal.analyzer.expression import Attribute
+from snowflake.snowpark._internal.server_connection import ServerConnection
+from snowflake.snowpark.functions import col
+from snowflake.snowpark.types import LongType
+
+
+def new_session(deterministic: bool, lazy: bool = False) -> Session:
+    connection = mock.create_autospec(ServerConnection)
+    connection._conn = mock.MagicMock()
+    connection._telemetry_client = mock.MagicMock()
+    connection.get_result_attributes.return_value = [
+        Attribute('"A"', LongType()),
+        Attribute('"B"', LongType()),
+    ]
+    session = Session(connection)
+    session.deterministic_sql_enabled = deterministic
+    session.lazy_analysis_enabled = lazy
+    return session
+
+
+def program(session: Session):
+    df1 = session.table("t1")
+    df2 = session.create_dataframe([[1, 2], [3, 4]], schema=["a", "b"])
+    joined = df1.join(df2, df1["a"] == df2["a"]).join(session.table("t2"), "a")
+    semi = df1.join(df2, "a", "leftsemi")
+    return (
+        joined.select(col("a"))
+        .union_all(semi.select(col("a")))
+        .union_all(df1.drop_duplicates("b").select(col("a")))
+        .queries
+    )
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_same_program_generates_same_sql(lazy):
+    session = new_session(deterministic=True, lazy=lazy)
+    queries = program(session)
+    assert program(session) == queries
+    assert program(new_session(deterministic=True, lazy=lazy)) == queries
+    assert "SNOWPARK_TEMP_TABLE_" in queries["queries"][-1]
+    assert queries["queries"][-1].count('"l_') > 0
+
+
+def test_random_sql_by_default():
+    session = new_session(deterministic=False)
+    assert program(session) != program(session)
+
+
+def test_aliases_are_unique_in_query():
+    session = new_session(deterministic=True)
+    df1, df2 = session.table("t1"), session.table("t2")
+    df3, df4 = copy.copy(df1), copy.copy(df2)
+    joined1 = df1.join(df2, df1["a"] == df2["a"])
+    joined2 = df3.join(df4, df3["a"] == df4["a"])
+    inner = set(re.findall(r'"([lr]_[0-9a-z]{4})_', joined1.queries["queries"][-1]))
+    # the same join generates the same prefixes
+    assert inner == set(
+        re.findall(r'"([lr]_[0-9a-z]{4})_', joined2.queries["queries"][-1])
+    )
+    left, right = joined1.columns[0], joined2.columns[1]
+    sql = joined1.join(joined2, joined1[left] == joined2[right])
+    # the outer join generates its own prefixes of the common columns
+    outer = set(re.findall(r'"([lr]_[0-9a-z]{4})_', sql.queries["queries"][-1]))
+    assert len(inner) == 2 and len(outer - inner) == 2
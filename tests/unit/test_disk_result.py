@@ -0,0 +1,170 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import decimal
+import gc
+import os
+from unittest import mock
+
+import pandas
+import pyarrow
+import pytest
+
+from snowflake.connector.cursor import ResultMetadata
+from snowflake.snowpark import DiskResult, Session
+from snowflake.snowpark._internal.server_connection import ServerConnection
+
+
+def batches():
+    yield pyarrow.record_batch(
+        [pyarrow.array([1, 2], type=pyarrow.int8()), pyarrow.array(["a", "b"])],
+        names=["A", "B"],
+    )
+    yield pyarrow.record_batch(
+        [pyarrow.array([300, 4]), pyarrow.array(["c", None])], names=["A", "B"]
+    )
+
+
+def test_write_and_read():
+    with DiskResult._write(batches(), None) as result:
+        # the integer columns of all batches are stored with the same type
+        assert result.schema == pyarrow.schema(
+            [("A", pyarrow.int64()), ("B", pyarrow.string())]
+        )
+        assert result.num_rows == 4
+        expected = {"A": [1, 2, 300, 4], "B": ["a", "b", "c", None]}
+        assert result.to_arrow().to_pydict() == expected
+        assert [b.num_rows for b in result.to_arrow_batches()] == [2, 2]
+        df = result.to_pandas()
+        assert df["A"].tolist() == expected["A"]
+        assert df["B"][:3].tolist() == expected["B"][:3] and pandas.isna(df["B"][3])
+        assert [len(df) for df in result.to_pandas_batches()] == [2, 2]
+        assert result.column("B").to_pylist() == expected["B"]
+        assert result.to_numpy(0).tolist() == expected["A"]
+
+
+def test_decimal_batches():
+    # a chunk of a result may store a column with a smaller precision than others
+    batches = [
+        pyarrow.record_batch(
+            [pyarrow.array([decimal.Decimal("1.50")], type=pyarrow.decimal128(3, 2))],
+            names=["A"],
+        ),
+        pyarrow.record_batch(
+            [
+                pyarrow.array(
+                    [decimal.Decimal("12345678901234567890.25")],
+                    type=pyarrow.decimal128(22, 2),
+                )
+            ],
+            names=["A"],
+        ),
+    ]
+    with DiskResult._write(iter(batches), None) as result:
+        assert result.schema == pyarrow.schema([("A", pyarrow.decimal128(38, 2))])
+        assert result.column("A").to_pylist() == [
+            decimal.Decimal("1.50"),
+            decimal.Decimal("12345678901234567890.25"),
+        ]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize(
+    "precision, file_type",
+    [(38, pyarrow.decimal128(38, 0)), (18, pyarrow.int64()), (5, pyarrow.int64())],
+)
+def test_mixed_integer_and_decimal_batches(reverse, precision, file_type):
+    # a chunk of a NUMBER(38, 0) column stores the values as integers if they
+    # fit in 64 bits, and as decimals otherwise
+    meta = [ResultMetadata("A", 0, None, None, precision, 0, False)]
+    batches = [
+        pyarrow.record_batch([pyarrow.array([1, 2], type=pyarrow.int8())], names=["A"]),
+        pyarrow.record_batch([pyarrow.array([3])], names=["A"]),
+    ]
+    if precision > 18:
+        batches.append(
+            pyarrow.record_batch(
+                [
+                    pyarrow.array(
+                        [decimal.Decimal("12345678901234567890")],
+                        type=pyarrow.decimal128(38, 0),
+                    )
+                ],
+                names=["A"],
+            )
+        )
+    if reverse:
+        batches.reverse()
+    with DiskResult._write(iter(batches), meta) as result:
+        # the schema doesn't depend on the order of the chunks
+        assert result.schema == pyarrow.schema([("A", file_type)])
+        values = [int(v) for v in result.column("A").to_pylist()]
+        expected = [1, 2, 3] + ([12345678901234567890] if precision > 18 else [])
+        assert sorted(values) == expected
+
+
+def test_zero_copy():
+    batch = pyarrow.record_batch([pyarrow.array([1.5, 2.5])], names=["A"])
+    with DiskResult._write(iter([batch]), None) as result:
+        array = result.to_numpy("A")
+        assert array.tolist() == [1.5, 2.5]
+        # the array is a view of the memory-mapped file
+        assert not array.flags.owndata
+        assert not array.flags.writeable
+
+
+def test_close_deletes_files(tmpdir):
+    result = DiskResult._write(batches(), None)
+    directory = os.path.dirname(result.path)
+    table = result.to_arrow()
+    result.close()
+    assert result.closed
+    # the temporary directory is deleted with the file
+    assert not os.path.exists(directory)
+    assert table.num_rows == 4
+    with pytest.raises(ValueError, match="is closed"):
+        result.to_arrow()
+    result.close()
+
+    result = DiskResult._write(batches(), None, str(tmpdir))
+    assert os.listdir(str(tmpdir)) == [os.path.basename(result.path)]
+    del result
+    gc.collect()
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_empty_result(tmpdir):
+    meta = [ResultMetadata("A", 0, None, None, 38, 0, False)]
+    with DiskResult._write(iter([]), meta, str(tmpdir / "new")) as result:
+        assert result.num_rows == 0
+        assert result.schema == pyarrow.schema([("A", pyarrow.decimal128(38, 0))])
+    meta = [ResultMetadata("A", 0, None, None, 10, 0, False)]
+    with DiskResult._write(iter([]), meta, str(tmpdir / "new")) as result:
+        assert result.schema == pyarrow.schema([("A", pyarrow.int64())])
+
+
+def test_failed_write_deletes_file(tmpdir):
+    def failing_batches():
+        yield from batches()
+        raise ValueError("failed to download")
+
+    with pytest.raises(ValueError, match="failed to download"):
+        DiskResult._write(failing_batches(), None, str(tmpdir))
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_collect_to_disk(tmpdir):
+    conn = ServerConnection({}, mock.MagicMock())
+    conn._conn.is_closed.return_value = False
+    conn._telemetry_client = mock.MagicMock()
+    with mock.patch.object(conn, "get_session_id", return_value=1):
+        session = Session(conn)
+    results_cursor = conn._cursor.execute.return_value
+    results_cursor.fetch_arrow_batches.return_value = iter(
+        [pyarrow.table({"A": [1, 2]}), pyarrow.table({"A": [3]})]
+    )
+    session.result_prefetch_depth = 1
+    with session.sql("select a from t").collect_to_disk(str(tmpdir)) as result:
+        assert result.to_arrow().to_pydict() == {"A": [1, 2, 3]}
+    # the cursor is released once the result is written
+    assert conn._idle_cursors == [conn._cursor]
@@ -8,15 +8,19 @@ from typing import Union
 import pytest
 
 from snowflake.snowpark import Column
+from snowflake.snowpark._internal.analyzer.binary_expression import And, Or
 from snowflake.snowpark._internal.analyzer.table_function import (
     NamedArgumentsTableFunction,
     PosArgumentsTableFunction,
 )
 from snowflake.snowpark.functions import (
+    all_of,
+    any_of,
     approx_percentile,
     approx_percentile_accumulate,
     approx_percentile_combine,
     approx_percentile_estimate,
+    col,
     corr,
     covar_pop,
     covar_samp,
@@ -115,3 +119,29 @@ def test_functions_alias():
     assert functions.substr == functions.substring
     assert functions.count_distinct == functions.countDistinct
     assert functions.to_char == functions.to_varchar
+
+
+def expression_depth(expr) -> int:
+    return 1 + max((expression_depth(c) for c in expr.children or []), default=0)
+
+
+@pytest.mark.parametrize("func, operator_class", [(all_of, And), (any_of, Or)])
+def test_all_of_any_of(mock_session, func, operator_class):
+    conditions = [col("a") == i for i in range(1000)]
+    column = func(conditions)
+    assert isinstance(column._expression, operator_class)
+    # 1000 conditions are combined by a balanced tree of depth 10, plus the
+    # depth of the conditions
+    assert expression_depth(column._expression) == 12
+    sql = mock_session._analyzer.analyze(column._expression)
+    assert sql.count(f" {operator_class.sql_operator} ") == 999
+    assert sql.index("= 0 ") < sql.index("= 1 ") < sql.index("= 999 ")
+
+    assert func(*conditions[:2])._expression.children == [
+        conditions[0]._expression,
+        conditions[1]._expression,
+    ]
+    assert func(conditions[0]) is conditions[0]
+    assert isinstance(func("a > 1", "b > 1")._expression, operator_class)
+    with pytest.raises(ValueError, match="at least one condition"):
+        func([])
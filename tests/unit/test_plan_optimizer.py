@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import re
+from unittest import mock
+
+import pytest
+
+from snowflake.snowpark import Window
+from snowflake.snowpark._internal.analyzer.expression import Attribute
+from snowflake.snowpark.functions import (
+    call_builtin,
+    col,
+    lit,
+    row_number,
+    sql_expr,
+    sum as sum_,
+)
+from snowflake.snowpark.types import LongType
+
+
+@pytest.fixture(params=[False, True], ids=["eager", "lazy"])
+def session(request, mock_session, mock_server_connection):
+    mock_server_connection._telemetry_client = mock.MagicMock()
+    mock_server_connection.get_result_attributes.return_value = [
+        Attribute('"A"', LongType()),
+        Attribute('"B"', LongType()),
+    ]
+    mock_session.lazy_analysis_enabled = request.param
+    mock_session.plan_optimization_enabled = True
+    return mock_session
+
+
+def last_query(df) -> str:
+    # the generated aliases of join columns and tables are random
+    sql = df.queries["queries"][-1]
+    sql = re.sub(r'"([lr])_[0-9a-z]{4}_', r'"\1_', sql)
+    return re.sub(r"SNOWPARK_TEMP_TABLE_[0-9A-Z]+", "T", sql)
+
+
+def test_filter_is_pushed_below_projection(session):
+    df = session.table("t").with_column("c", col("a") + 1).filter(col("b") > 1)
+    assert (
+        last_query(df) == 'SELECT "A", "B", ("A" + 1 :: bigint) AS "C" FROM (t) '
+        'WHERE ("B" > 1 :: bigint)'
+    )
+
+    # a filter on a column passed through is merged into the projection too
+    session.plan_optimization_enabled = False
+    df = session.table("t").with_column("c", col("a") + 1).filter(col("b") > 1)
+    assert last_query(df) == (
+        'SELECT "A", "B", ("A" + 1 :: bigint) AS "C" FROM (t) WHERE ("B" > 1 :: bigint)'
+    )
+    session._sql_fusion_enabled = False
+    df = session.table("t").with_column("c", col("a") + 1).filter(col("b") > 1)
+    assert (
+        last_query(df) == 'SELECT  *  FROM ( SELECT "A", "B", ("A" + 1 :: bigint) '
+        'AS "C" FROM ( SELECT  *  FROM (t))) WHERE ("B" > 1 :: bigint)'
+    )
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        col("c") > 1,
+        (col("b") > 1) & (col("c") > 1),
+        lit(True),
+        sql_expr("b > 1"),
+    ],
+)
+def test_filter_is_not_pushed_below_projection(session, condition):
+    df = session.table("t").with_column("c", col("a") + 1).filter(condition)
+    assert last_query(df).startswith('SELECT  *  FROM ( SELECT "A", "B", ("A" + 1')
+
+
+@pytest.mark.parametrize(
+    "column",
+    [row_number().over(Window.order_by("a")), call_builtin("seq4")],
+    ids=["window", "sequence"],
+)
+def test_filter_is_not_pushed_below_computed_projection(session, column):
+    df = session.table("t").select(col("b"), column.alias("c")).filter(col("b") > 1)
+    assert last_query(df).startswith('SELECT  *  FROM ( SELECT "B", ')
+
+
+def test_filter_is_pushed_into_inner_join(session):
+    df1, df2 = session.table("t1"), session.table("t2")
+    df = df1.join(df2, df1["a"] == df2["a"]).filter(
+        (df1["b"] > 1) & (df2["b"] < 3) & (df1["a"] > df2["b"])
+    )
+    assert last_query(df) == (
+        'SELECT  *  FROM ( SELECT  *  FROM (( SELECT "A" AS "l_A", "B" AS "l_B" '
+        'FROM (t1) WHERE ("B" > 1 :: bigint)) AS T INNER JOIN ( SELECT "A" AS '
+        '"r_A", "B" AS "r_B" FROM (t2) WHERE ("B" < 3 :: bigint)) AS T ON '
+        '("l_A" = "r_A"))) WHERE ("l_A" > "r_B")'
+    )
+
+
+def test_filter_is_not_pushed_into_outer_side_of_join(session):
+    df1, df2 = session.table("t1"), session.table("t2")
+    df = df1.join(df2, df1["a"] == df2["a"], "left").filter(
+        (df1["b"] > 1) & (df2["b"] < 3)
+    )
+    assert last_query(df) == (
+        'SELECT  *  FROM ( SELECT  *  FROM (( SELECT "A" AS "l_A", "B" AS "l_B" '
+        'FROM (t1) WHERE ("B" > 1 :: bigint)) AS T LEFT OUTER JOIN ( SELECT "A" '
+        'AS "r_A", "B" AS "r_B" FROM (t2)) AS T ON ("l_A" = "r_A"))) '
+        'WHERE ("r_B" < 3 :: bigint)'
+    )
+
+    df = df1.join(df2, "a").filter(df1["b"] > 1)
+    assert last_query(df).endswith('USING (a))) WHERE ("l_B" > 1 :: bigint)')
+
+
+def test_unused_columns_are_pruned(session):
+    df = session.table("t").select(col("a"), (col("b") + 1).alias("c"), col("b"))
+    # a projection of the columns passed through replaces the pruned projection
+    assert last_query(df.select(col("a"))) == 'SELECT "A" FROM (t)'
+    assert (
+        last_query(df.select((col("c") * 2).alias("d")))
+        == 'SELECT ("C" * 2 :: bigint) AS "D" FROM ( SELECT ("B" + 1 :: bigint) '
+        'AS "C" FROM (t))'
+    )
+
+
+def test_aggregate_columns_are_not_pruned(session):
+    df = session.table("t").select(
+        lit(1).alias("x"), sum_(col("a")).alias("s"), (col("b") + 1).alias("c")
+    )
+    assert last_query(df.select(col("x"))) == (
+        'SELECT "X" FROM ( SELECT 1 :: bigint AS "X", sum("A") AS "S" FROM (t))'
+    )
@@ -7,7 +7,9 @@ from copy import copy
 
 import pytest
 
-from snowflake.snowpark import Row
+from snowflake.snowpark import ResultSet, Row
+from snowflake.snowpark._internal.utils import result_set_to_iter, result_set_to_rows
+from snowflake.snowpark.row import _restore_row_from_pickle
 
 
 def test_row_with_only_values():
@@ -175,6 +177,7 @@ def test_dunder_call():
     Employee2 = Row(name="John Zee", salary=10000)
     emp2 = Employee2(name="James Zee")
     assert emp2.name == "James Zee" and emp2.salary == 10000
+    assert emp2 == Row("James Zee", 10000)
 
 
 def test_negative_dunder_call():
@@ -204,3 +207,97 @@ def test_mul_rmul(row):
 
 def test_aliases():
     assert Row.asDict == Row.as_dict
+
+
+def test_rows_share_fields():
+    meta = [type("Meta", (), {"name": name}) for name in ["A", "B", "A"]]
+    rows = result_set_to_rows([(1, 2, 3), (4, 5, 6)], meta)
+    rows += list(result_set_to_iter(iter([(7, 8, 9)]), meta))
+    assert rows == [Row(1, 2, 3), Row(4, 5, 6), Row(7, 8, 9)]
+    assert [row.A for row in rows] == [1, 4, 7]
+    assert [row["B"] for row in rows] == [2, 5, 8]
+    # the rows don't store their column names
+    assert rows[0]._fields is rows[2]._fields == ("A", "B", "A")
+    assert type(rows[0]) is type(rows[2])
+    assert all(not hasattr(row, "__dict__") for row in rows)
+    with pytest.raises(TypeError):
+        rows[0].as_dict()
+
+    row = Row(1, 2, 3)
+    row._fields = ["A", "B", "A"]
+    assert type(row) is type(rows[0])
+    assert Row(a=1)._fields is Row(a=2)._fields
+
+
+def test_row_pickle_with_duplicate_fields():
+    row = Row(1, 2, 3)
+    row._fields = ["a", "b", "a"]
+    restored = pickle.loads(pickle.dumps(row))
+    assert restored == row and restored._fields == ("a", "b", "a")
+    assert restored.a == 1
+    assert restored._named_values is None
+
+
+def test_restore_row_pickled_with_named_values():
+    # rows pickled before the column names were shared pass their values by name
+    row = _restore_row_from_pickle((1, 2), {"a": 1, "b": 2}, ("a", "b"))
+    assert row == Row(a=1, b=2) and row.b == 2
+
+
+@pytest.fixture
+def result_set() -> ResultSet:
+    return ResultSet._from_rows([(1, "a"), (2, "b"), (3, None)], ["A", "B"])
+
+
+def test_result_set_is_list_like(result_set):
+    rows = [Row(A=1, B="a"), Row(A=2, B="b"), Row(A=3, B=None)]
+    assert len(result_set) == 3
+    assert result_set == rows and rows == result_set
+    assert result_set != rows[:2] and result_set != tuple(rows)
+    assert list(result_set) == rows
+    assert result_set[0] == rows[0] and result_set[-1] == rows[-1]
+    assert result_set[0].B == "a" and result_set[2]["A"] == 3
+    assert result_set[1:] == rows[1:] and result_set[::-2] == rows[::-2]
+    assert isinstance(result_set[1:], ResultSet)
+    assert list(reversed(result_set)) == rows[::-1]
+    assert Row(A=2, B="b") in result_set
+    assert result_set.index(Row(A=3, B=None)) == 2
+    assert result_set + rows[:1] == rows + rows[:1]
+    assert rows[:1] + result_set == rows[:1] + rows
+    assert repr(result_set) == repr(rows)
+    assert bool(result_set) and not ResultSet._from_rows([], ["A"])
+    with pytest.raises(IndexError):
+        _ = result_set[3]
+    with pytest.raises(TypeError):
+        result_set[0] = Row(1, 2)
+    with pytest.raises(TypeError):
+        hash(result_set)
+
+
+def test_result_set_columns(result_set):
+    assert result_set.column("B") == ["a", "b", None]
+    assert result_set.column(0) == [1, 2, 3]
+    # a column is a copy
+    result_set.column(0).append(4)
+    assert len(result_set.column(0)) == 3
+    with pytest.raises(KeyError):
+        result_set.column("C")
+    # the rows share the column names
+    assert result_set[0]._fields is result_set[1]._fields
+
+
+def test_result_set_without_names():
+    result_set = ResultSet._from_rows(iter([(1, 2), (3, 4)]))
+    assert result_set == [Row(1, 2), Row(3, 4)]
+    with pytest.raises(KeyError):
+        result_set.column("A")
+
+
+def test_result_set_with_duplicate_names():
+    result_set = ResultSet._from_rows([(1, 2)], ["A", "A"])
+    assert result_set[0] == Row(1, 2)
+    assert result_set[0].A == 1
+
+
+def test_result_set_pickle(result_set):
+    assert pickle.loads(pickle.dumps(result_set)) == result_set
@@ -0,0 +1,112 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import pytest
+
+from snowflake.snowpark._internal.analyzer.expression import Attribute
+from snowflake.snowpark.functions import col, count, lit, max as max_
+from snowflake.snowpark.types import (
+    BooleanType,
+    DecimalType,
+    DoubleType,
+    IntegerType,
+    LongType,
+    StringType,
+    StructField,
+    StructType,
+)
+
+
+@pytest.fixture
+def table(mock_session, mock_server_connection):
+    mock_server_connection.get_result_attributes.return_value = [
+        Attribute('"A"', LongType(), nullable=False),
+        Attribute('"B"', StringType()),
+    ]
+    df = mock_session.table("test_table")
+    df.schema
+    mock_server_connection.get_result_attributes.reset_mock()
+    return df
+
+
+def test_projection(mock_session, mock_server_connection, table):
+    df = table.select(
+        col("a"),
+        col("b").alias("c"),
+        (col("a") > 1).alias("d"),
+        col("a").cast(IntegerType()).alias("e"),
+        col("a").cast(DecimalType(10, 2)).alias("f"),
+        lit(1.5).alias("g"),
+    )
+    assert df.schema == StructType(
+        [
+            StructField('"A"', LongType(), nullable=False),
+            StructField('"C"', StringType()),
+            StructField('"D"', BooleanType()),
+            StructField('"E"', LongType()),
+            StructField('"F"', DecimalType(10, 2)),
+            # describe reports a non-null literal as NOT NULL
+            StructField('"G"', DoubleType(), nullable=False),
+        ]
+    )
+    mock_server_connection.get_result_attributes.assert_not_called()
+    assert mock_session._avoided_describe_query_count == 1
+
+
+def test_filter_sort_limit(mock_server_connection, table):
+    df = table.filter(col("a") > 1).sort(col("b")).limit(10)
+    assert df.columns == ["A", "B"]
+    assert df.schema == table.schema
+    mock_server_connection.get_result_attributes.assert_not_called()
+
+
+def test_join_and_set_operations(mock_server_connection, table):
+    other = table.select(col("a").alias("x"), col("b").alias("y"))
+    df = table.join(other, col("a") == col("x"), "left")
+    assert df.schema == StructType(
+        [
+            StructField('"A"', LongType(), nullable=False),
+            StructField('"B"', StringType()),
+            StructField('"X"', LongType()),
+            StructField('"Y"', StringType()),
+        ]
+    )
+    assert table.union_all(other).columns == ["A", "B"]
+    mock_server_connection.get_result_attributes.assert_not_called()
+
+
+def test_aggregate(mock_server_connection, table):
+    df = table.group_by("b").agg([count("a").alias("n"), max_("a").alias("m")])
+    assert df.schema == StructType(
+        [
+            StructField('"B"', StringType()),
+            StructField('"N"', LongType(), nullable=False),
+            StructField('"M"', LongType()),
+        ]
+    )
+    mock_server_connection.get_result_attributes.assert_not_called()
+
+
+def test_count_star(mock_server_connection, table):
+    df = table.select(count("*").alias("n"))
+    assert df.schema == StructType([StructField('"N"', LongType(), nullable=False)])
+    mock_server_connection.get_result_attributes.assert_not_called()
+
+
+def test_fall_back_to_describe(mock_server_connection, table):
+    # the names of unaliased expressions and the types of arithmetic expressions
+    # are decided by Snowflake
+    for df in [
+        table.select(col("a") + 1),
+        table.select((col("a") + 1).alias("c")),
+        table.select(col("unknown").alias("c")),
+    ]:
+        df.schema
+    assert mock_server_connection.get_result_attributes.call_count == 3
+
+
+def test_unknown_child_schema(mock_session, mock_server_connection):
+    df = mock_session.table("test_table").filter(col("a") > 1)
+    df.schema
+    mock_server_connection.get_result_attributes.assert_called_once()
+    assert mock_session._avoided_describe_query_count == 0
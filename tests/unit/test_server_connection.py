@@ -0,0 +1,611 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import threading
+import time
+from unittest import mock
+
+import pyarrow
+import pytest
+
+import snowflake.snowpark._internal.server_connection as server_connection
+import snowflake.snowpark._internal.utils as utils
+from snowflake.connector.cursor import ResultMetadata
+from snowflake.connector.errors import NotSupportedError, ProgrammingError
+from snowflake.snowpark import QueryHistory, ResultSet, Row
+from snowflake.snowpark._internal.analyzer.expression import Attribute
+from snowflake.snowpark._internal.analyzer.snowflake_plan import (
+    BatchInsertQuery,
+    Query,
+    SnowflakePlan,
+    SnowflakePlanBuilder,
+)
+from snowflake.snowpark._internal.server_connection import ServerConnection
+from snowflake.snowpark.exceptions import SnowparkSQLException
+from snowflake.snowpark.types import LongType
+
+
+@pytest.fixture
+def conn() -> ServerConnection:
+    conn = ServerConnection({}, mock.MagicMock())
+    conn._conn.is_closed.return_value = False
+    conn._cursor.describe.return_value = [
+        ResultMetadata("A", 0, None, None, 38, 0, False)
+    ]
+    return conn
+
+
+def test_describe_cache(conn):
+    assert conn.get_result_attributes("select * from t")[0].name == '"A"'
+    assert [a.name for a in conn.get_result_attributes("  select *\n  from t ")] == [
+        a.name for a in conn.get_result_attributes("select * from t")
+    ]
+    assert conn._cursor.describe.call_count == 1
+    assert (conn._describe_cache_hits, conn._describe_cache_misses) == (2, 1)
+
+    # whitespaces in quotes are significant
+    conn.get_result_attributes("select 'a  b' from t")
+    conn.get_result_attributes("select 'a b' from t")
+    conn.get_result_attributes('select "a  b" from t')
+    assert conn._cursor.describe.call_count == 4
+
+
+def test_describe_cache_with_bind_params(conn):
+    conn.get_result_attributes("select ?", [1])
+    conn.get_result_attributes("select  ?", [2])
+    assert conn._cursor.describe.call_count == 1
+    conn._cursor.describe.assert_called_with("select ?", [1])
+
+    # the type of a bound value can change the result attributes
+    conn.get_result_attributes("select ?", ["a"])
+    conn.get_result_attributes("select ?")
+    assert conn._cursor.describe.call_count == 3
+
+
+def test_run_query_with_bind_params(conn):
+    conn.run_query("select ?", params=[1])
+    conn._cursor.execute.assert_called_with("select ?", params=[1])
+    conn.run_query("select 1")
+    conn._cursor.execute.assert_called_with("select 1")
+
+
+def test_describe_cache_eviction(conn):
+    with mock.patch.object(server_connection, "DESCRIBE_CACHE_MAX_SIZE", 2):
+        conn.get_result_attributes("select 1")
+        conn.get_result_attributes("select 2")
+        conn.get_result_attributes("select 1")
+        conn.get_result_attributes("select 3")
+        assert [key[2] for key in conn._describe_cache] == ["select 1", "select 3"]
+
+
+def test_describe_cache_per_schema(conn):
+    conn._conn.database, conn._conn.schema = "DB", "S1"
+    conn.get_result_attributes("select * from t")
+    # an unqualified name refers to another table in another schema
+    conn._conn.schema = "S2"
+    conn.get_result_attributes("select * from t")
+    assert conn._cursor.describe.call_count == 2
+    conn._conn.schema = "S1"
+    conn.get_result_attributes("select * from t")
+    assert conn._cursor.describe.call_count == 2
+
+
+def test_cached_attributes_are_copied(conn):
+    attributes = conn.get_result_attributes("select * from t")
+    attributes[0].nullable = True
+    assert conn.get_result_attributes("select * from t")[0].nullable is False
+
+
+def test_describe_during_clear_is_not_cached(conn):
+    def describe(query):
+        # a DDL statement is executed while the query is described
+        conn.run_query("alter table t add column b int")
+        return [ResultMetadata("A", 0, None, None, 38, 0, False)]
+
+    conn._cursor.describe.side_effect = describe
+    conn.get_result_attributes("select * from t")
+    assert len(conn._describe_cache) == 0
+
+
+@pytest.mark.parametrize(
+    "query, invalidated",
+    [
+        ("create or replace table t (a int)", True),
+        (" USE SCHEMA s", True),
+        ("alter session set query_tag = 'a'", True),
+        ("drop table t", True),
+        ("-- a comment\n/* another comment */ create table t (a int)", True),
+        ("(  drop table t)", True),
+        ("// a comment\nalter table t add column b int", True),
+        ("select * from t", False),
+        ("insert into t values (1)", False),
+    ],
+)
+def test_describe_cache_invalidation(conn, query, invalidated):
+    conn.get_result_attributes("select * from t")
+    conn.run_query(query)
+    assert (len(conn._describe_cache) == 0) is invalidated
+
+
+def test_describe_cache_kept_for_temp_objects(conn):
+    conn.get_result_attributes("select * from t")
+    conn.run_query("drop table if exists temp_table", is_ddl_on_temp_object=True)
+    assert len(conn._describe_cache) == 1
+
+
+def test_query_id_placeholders_are_filled(conn):
+    first, second = Query("select 1"), Query("select 2")
+    last = Query(
+        f"select * from table(result_scan('{second.query_id_place_holder}')) "
+        f"union all select * from table(result_scan('{first.query_id_place_holder}'))"
+    )
+    session = mock.MagicMock()
+    session._generate_new_action_id.return_value = session._last_canceled_id = 0
+    plan = SnowflakePlan([first, second, last], "", session=session)
+    with mock.patch.object(
+        conn,
+        "run_query",
+        side_effect=[{"sfqid": f"id{i}", "data": []} for i in range(3)],
+    ) as run_query:
+        conn.get_result_set(plan)
+    assert run_query.call_args.args[0] == (
+        "select * from table(result_scan('id1')) "
+        "union all select * from table(result_scan('id0'))"
+    )
+
+
+@pytest.fixture
+def concurrent_conn() -> ServerConnection:
+    """Returns a connection whose cursors record the queries they execute, and
+    whose batch insertions wait for each other unless ``wait_for_insertions``
+    is False, so that they only finish if they are executed concurrently."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def new_cursor():
+        cursor = mock.MagicMock()
+
+        def executemany(query, params):
+            executed.append(query)
+            if conn.wait_for_insertions:
+                barrier.wait()
+            return mock.DEFAULT
+
+        def execute(query, **kwargs):
+            executed.append(query)
+            return mock.DEFAULT
+
+        cursor.execute.side_effect = execute
+        cursor.executemany.side_effect = executemany
+        return cursor
+
+    executed = []
+    connection = mock.MagicMock()
+    connection.is_closed.return_value = False
+    connection.cursor.side_effect = new_cursor
+    conn = ServerConnection({}, connection)
+    conn.executed = executed
+    conn.wait_for_insertions = True
+    return conn
+
+
+def local_relation_join(conn: ServerConnection) -> SnowflakePlan:
+    session = mock.MagicMock()
+    session._generate_new_action_id.return_value = session._last_canceled_id = 0
+    session._concurrent_pre_queries_enabled = True
+    builder = SnowflakePlanBuilder(session)
+    output = [Attribute('"A"', LongType())]
+    left, right = [
+        builder.large_local_relation_plan(output, [Row(1)], None) for _ in range(2)
+    ]
+    return builder.build_binary(
+        lambda x, y: f"select * from ({x}), ({y})", left, right, None
+    )
+
+
+def test_independent_pre_queries_run_concurrently(concurrent_conn):
+    plan = local_relation_join(concurrent_conn)
+    concurrent_conn.get_result_set(plan)
+    executed = concurrent_conn.executed
+    # the temporary tables are dropped in one request
+    assert len(executed) == 6
+    # a table is created before rows are inserted into it, and the last query
+    # is executed after the queries it depends on
+    for create, insert in [plan.queries[0:2], plan.queries[2:4]]:
+        assert executed.index(create.sql) < executed.index(insert.sql)
+    assert executed[4] == plan.queries[-1].sql
+
+
+def test_sequential_pre_queries(concurrent_conn):
+    plan = local_relation_join(concurrent_conn)
+    plan.session._concurrent_pre_queries_enabled = False
+    concurrent_conn.wait_for_insertions = False
+    concurrent_conn.get_result_set(plan)
+    assert concurrent_conn.executed[:5] == [q.sql for q in plan.queries]
+
+
+def test_failed_pre_query(concurrent_conn):
+    plan = local_relation_join(concurrent_conn)
+    with mock.patch.object(
+        concurrent_conn, "run_batch_insert", side_effect=ProgrammingError("failed")
+    ):
+        with pytest.raises(SnowparkSQLException, match="failed"):
+            concurrent_conn.get_result_set(plan)
+    # the last query isn't executed, and the temporary tables are dropped
+    assert plan.queries[-1].sql not in concurrent_conn.executed
+    assert concurrent_conn.executed[-1] == ";\n".join(
+        q.sql.strip() for q in plan.post_actions
+    )
+
+
+def test_pre_query_dependencies():
+    first, second = Query("create", depends_on=[]), Query("insert")
+    third = Query("create", depends_on=[])
+    fourth = BatchInsertQuery("insert", depends_on=[third])
+    fifth = Query("select", depends_on=[Query("unknown")])
+    # the queries that record their dependencies also depend on the queries
+    # before them that may change the state of the session
+    assert server_connection._pre_query_dependencies(
+        [first, second, third, fourth, fifth]
+    ) == [set(), {0}, {1}, {1, 2}, {0, 1, 2, 3}]
+
+
+def test_temp_objects_created_after_session_changes(concurrent_conn):
+    plan = local_relation_join(concurrent_conn)
+    use_schema = Query("use schema s")
+    plan.queries.insert(2, use_schema)
+    concurrent_conn.wait_for_insertions = False
+    concurrent_conn.get_result_set(plan)
+    executed = concurrent_conn.executed
+    # the second temporary table is created in the new schema
+    assert executed.index("use schema s") < executed.index(plan.queries[3].sql)
+
+
+def test_tagged_batch_insertions_run_alone(concurrent_conn):
+    plan = local_relation_join(concurrent_conn)
+    concurrent_conn.wait_for_insertions = False
+    running, overlaps = [], []
+    execute_pre_query = concurrent_conn._execute_pre_query
+
+    def tracked(query, sql, **kwargs):
+        running.append(query)
+        if isinstance(query, BatchInsertQuery):
+            time.sleep(0.01)
+            overlaps.append(len(running) > 1)
+        try:
+            return execute_pre_query(query, sql, **kwargs)
+        finally:
+            running.remove(query)
+
+    with mock.patch.object(concurrent_conn, "_execute_pre_query", tracked):
+        concurrent_conn.get_result_set(plan, _statement_params={"QUERY_TAG": "tag"})
+    assert overlaps == [False, False]
+    executed = concurrent_conn.executed
+    # the query tag is set and unset around each insertion
+    for insert in (plan.queries[1], plan.queries[3]):
+        i = executed.index(insert.sql)
+        assert executed[i - 1 : i + 2] == [
+            "alter session set query_tag='tag'",
+            insert.sql,
+            "alter session unset query_tag",
+        ]
+
+
+@pytest.fixture
+def batching_conn(conn) -> ServerConnection:
+    conn._cursor.execute.return_value.multi_statement_savedIds = ["id0", "id1"]
+    return conn
+
+
+def batching_plan(queries, post_actions=None) -> SnowflakePlan:
+    session = mock.MagicMock()
+    session._generate_new_action_id.return_value = session._last_canceled_id = 0
+    return SnowflakePlan(queries, "", post_actions=post_actions, session=session)
+
+
+def read_file_join(conn: ServerConnection) -> SnowflakePlan:
+    session = mock.MagicMock()
+    session._generate_new_action_id.return_value = session._last_canceled_id = 0
+    builder = SnowflakePlanBuilder(session)
+    output = [Attribute('"A"', LongType())]
+    left, right = [
+        builder.read_file(
+            f"@s/{name}.csv", "CSV", {"ON_ERROR": "CONTINUE"}, "db.s", output
+        )
+        for name in ("x", "y")
+    ]
+    return builder.build_binary(
+        lambda x, y: f"select * from ({x}), ({y})", left, right, None
+    )
+
+
+def test_multi_statement_batches(batching_conn):
+    batching_conn._cursor.execute.return_value.multi_statement_savedIds = [
+        f"id{i}" for i in range(4)
+    ]
+    plan = read_file_join(batching_conn)
+    create_x, copy_x, create_y, copy_y = plan.queries[:4]
+    assert create_x.sql.lstrip().startswith("CREATE")
+    assert copy_x.sql.lstrip().startswith("COPY")
+    history = QueryHistory(mock.MagicMock())
+    batching_conn.add_query_listener(history)
+    batching_conn.get_result_set(plan)
+    # the temporary tables are created and filled in one request, instead of
+    # concurrently, and dropped in another one
+    calls = batching_conn._cursor.execute.call_args_list
+    assert [c.args[0] for c in calls] == [
+        ";\n".join(q.sql.strip() for q in plan.queries[:4]),
+        plan.queries[-1].sql,
+        ";\n".join(q.sql.strip() for q in plan.post_actions),
+    ]
+    assert calls[0].kwargs["num_statements"] == 4
+    # every statement is still recorded with its own query ID
+    assert [(q.query_id, q.sql_text) for q in history.queries[:4]] == [
+        (f"id{i}", q.sql) for i, q in enumerate(plan.queries[:4])
+    ]
+
+
+def test_local_relation_statements_are_not_batched(conn):
+    # the rows of a batch insertion are bound as arrays, which a multi-statement
+    # request doesn't support, so the creation of its table is executed on its own
+    plan = local_relation_join(conn)
+    assert conn._multi_statement_batches(
+        plan.queries[:-1], plan.session, plan.queries[-1:]
+    ) == [[q] for q in plan.queries[:-1]]
+
+
+def test_user_statements_are_not_batched_with_temp_objects(conn):
+    create = Query("create temp table t", is_ddl_on_temp_object=True, depends_on=[])
+    queries = [
+        Query("use schema s"),
+        create,
+        Query("copy into t", depends_on=[create]),
+        Query("create table u"),
+    ]
+    batches = conn._multi_statement_batches(queries, mock.MagicMock())
+    assert [[q.sql for q in batch] for batch in batches] == [
+        ["use schema s"],
+        ["create temp table t", "copy into t"],
+        ["create table u"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "queries, batches",
+    [
+        (lambda q: [q("a"), q("b"), q("c")], [["a", "b", "c"]]),
+        (
+            lambda q: [q("a", ddl=True), q("b"), q("c", ddl=True), q("d", ddl=True)],
+            [["a"], ["b"], ["c", "d"]],
+        ),
+        (
+            lambda q: [q("a"), q("b", params=[1]), q("c"), q("put file://x @s")],
+            [["a"], ["b"], ["c"], ["put file://x @s"]],
+        ),
+        (
+            lambda q: [q("a"), BatchInsertQuery("insert", [Row(1)]), q("c")],
+            [["a"], ["insert"], ["c"]],
+        ),
+    ],
+)
+def test_batched_statements(conn, queries, batches):
+    def query(sql, ddl=False, params=None):
+        return Query(sql, is_ddl_on_temp_object=ddl, params=params)
+
+    queries = queries(query)
+    session = mock.MagicMock()
+    result = conn._multi_statement_batches(queries, session)
+    assert [[q.sql for q in batch] for batch in result] == batches
+    session._multi_statement_batching_enabled = False
+    assert len(conn._multi_statement_batches(queries, session)) == len(queries)
+
+
+def test_referenced_query_is_not_batched(conn):
+    first, second = Query("select 1"), Query("select 2")
+    last = Query(f"select * from table(result_scan('{first.query_id_place_holder}'))")
+    batches = conn._multi_statement_batches([first, second], mock.MagicMock(), [last])
+    assert batches == [[first], [second]]
+
+
+@pytest.fixture
+def arrow_plan() -> SnowflakePlan:
+    session = mock.MagicMock()
+    session._generate_new_action_id.return_value = session._last_canceled_id = 0
+    session._multi_statement_batching_enabled = False
+    session._result_prefetch_depth = 0
+    create = Query("create temp table t", depends_on=[])
+    return SnowflakePlan([create, Query("select * from t")], "", session=session)
+
+
+def test_to_arrow(conn, arrow_plan):
+    table = pyarrow.table({"A": [1, 2]})
+    results_cursor = conn._cursor.execute.return_value
+    results_cursor.fetch_arrow_all.return_value = table
+    assert conn.execute(arrow_plan, to_arrow=True) is table
+    # the result isn't converted to Pandas
+    results_cursor.fetch_pandas_all.assert_not_called()
+    assert conn._cursor.execute.call_count == 2
+
+    results_cursor.fetch_arrow_batches.return_value = iter([table, table])
+    batches = list(conn.execute(arrow_plan, to_arrow=True, to_iter=True))
+    assert [batch.to_pydict() for batch in batches] == [{"A": [1, 2]}] * 2
+
+
+def test_to_arrow_without_arrow_result(conn, arrow_plan):
+    results_cursor = conn._cursor.execute.return_value
+    results_cursor.description = [
+        ResultMetadata("A", 0, None, None, 38, 0, False),
+        ResultMetadata("B", 2, None, None, None, None, False),
+    ]
+    results_cursor.fetch_arrow_all.side_effect = NotSupportedError
+    results_cursor.fetchall.return_value = [(1, "a"), (2, "b")]
+    table = conn.execute(arrow_plan, to_arrow=True)
+    assert table.to_pydict() == {"A": [1, 2], "B": ["a", "b"]}
+
+    # an empty result has the types of its columns
+    results_cursor.fetch_arrow_all.side_effect = None
+    results_cursor.fetch_arrow_all.return_value = None
+    table = conn.execute(arrow_plan, to_arrow=True)
+    assert table.num_rows == 0
+    assert table.schema == pyarrow.schema(
+        [("A", pyarrow.int64()), ("B", pyarrow.string())]
+    )
+
+
+def test_columnar_results(conn, arrow_plan):
+    results_cursor = conn._cursor.execute.return_value
+    results_cursor.fetchall.return_value = [(1,), (2,)]
+    conn._cursor.description = [ResultMetadata("A", 0, None, None, 38, 0, False)]
+    arrow_plan.session._columnar_results_enabled = False
+    rows = conn.execute(arrow_plan)
+    assert isinstance(rows, list)
+    arrow_plan.session._columnar_results_enabled = True
+    result_set = conn.execute(arrow_plan)
+    assert isinstance(result_set, ResultSet)
+    assert result_set == rows == [Row(A=1), Row(A=2)]
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def prefetched_rows(conn, arrow_plan):
+    produced = []
+
+    def rows():
+        for i in range(20):
+            produced.append(i)
+            yield (i,)
+
+    results_cursor = conn._cursor.execute.return_value
+    results_cursor.__iter__.return_value = rows()
+    results_cursor.description = [ResultMetadata("A", 0, None, None, 38, 0, False)]
+    arrow_plan.session._result_prefetch_depth = 2
+    with mock.patch.object(utils, "PREFETCH_CHUNK_ROWS", 2):
+        yield conn.execute(arrow_plan, to_iter=True), produced
+
+
+def test_prefetch_rows(conn, prefetched_rows):
+    rows, produced = prefetched_rows
+    assert next(rows) == Row(A=0)
+    # 2 chunks of 2 rows are retrieved ahead of the current one, and the thread
+    # waits with the next chunk until there is room for it
+    wait_until(lambda: len(produced) == 8)
+    time.sleep(0.05)
+    assert len(produced) == 8
+    assert conn._cursor not in conn._idle_cursors
+
+    # closing the iterator stops retrieving rows and releases the cursor
+    rows.close()
+    assert len(produced) == 8
+    assert conn._cursor in conn._idle_cursors
+
+
+def test_prefetch_all_rows(conn, prefetched_rows):
+    rows, produced = prefetched_rows
+    assert list(rows) == [Row(A=i) for i in range(20)]
+    assert conn._cursor in conn._idle_cursors
+
+
+def test_prefetch_arrow_batches(conn, arrow_plan):
+    tables = [pyarrow.table({"A": [i]}) for i in range(5)]
+    results_cursor = conn._cursor.execute.return_value
+    results_cursor.fetch_arrow_batches.return_value = iter(tables)
+    arrow_plan.session._result_prefetch_depth = 3
+    batches = conn.execute(arrow_plan, to_arrow=True, to_iter=True)
+    assert [batch.to_pydict() for batch in batches] == [{"A": [i]} for i in range(5)]
+
+
+def test_prefetch_error():
+    def chunks():
+        yield 1
+        yield 2
+        raise ValueError("failed to download")
+
+    prefetcher = utils.ResultPrefetcher(chunks(), 1)
+    # the retrieved chunks are consumed before the error is raised
+    assert next(prefetcher) == 1
+    assert next(prefetcher) == 2
+    with pytest.raises(ValueError, match="failed to download"):
+        next(prefetcher)
+    with pytest.raises(StopIteration):
+        next(prefetcher)
+
+
+def test_prefetch_memory():
+    retrieved = []
+
+    def chunks():
+        for size in [10, 10, 10, 100, 10]:
+            retrieved.append(size)
+            yield size
+
+    prefetcher = utils.ResultPrefetcher(chunks(), 10, size=lambda c: c, max_bytes=25)
+    # the retrieved chunks take at most 25 bytes
+    wait_until(lambda: len(retrieved) == 3)
+    assert prefetcher.buffered_bytes == 20
+    assert next(prefetcher) == 10
+    wait_until(lambda: prefetcher.buffered_bytes == 20)
+    assert next(prefetcher) == 10
+    assert next(prefetcher) == 10
+    # a chunk larger than the limit is retrieved if no other chunk is
+    wait_until(lambda: prefetcher.buffered_bytes == 100)
+    assert list(prefetcher) == [100, 10]
+    assert prefetcher.buffered_bytes == 0
+    prefetcher.close()
+
+
+def test_session_changes_run_serially(concurrent_conn):
+    plan = local_relation_join(concurrent_conn)
+    use_schema = Query("use schema s")
+    alter_session = Query("alter session set timezone = 'UTC'")
+    plan.queries[2:2] = [use_schema, alter_session]
+    plan.session._multi_statement_batching_enabled = False
+    concurrent_conn.wait_for_insertions = False
+    concurrent_conn.get_result_set(plan)
+    # every query runs after the queries before a change of the session, and
+    # before the queries after it
+    assert concurrent_conn.executed[:7] == [q.sql for q in plan.queries]
+
+
+def test_failed_post_action_batch(batching_conn):
+    post_actions = [Query(f"drop table if exists t{i}") for i in range(3)]
+    statements = "drop table if exists t0;\ndrop table if exists t1;\n" + (
+        "drop table if exists t2"
+    )
+
+    def execute(query, **kwargs):
+        if query in (statements, "drop table if exists t1"):
+            raise ProgrammingError(f"{query} failed", sfqid="qid")
+        return mock.DEFAULT
+
+    batching_conn._cursor.execute.side_effect = execute
+    history = QueryHistory(mock.MagicMock())
+    batching_conn.add_query_listener(history)
+    with pytest.raises(ProgrammingError, match="t1 failed"):
+        batching_conn.run_post_actions(post_actions, mock.MagicMock())
+    # the statements are executed again one by one, and the failed one doesn't
+    # stop the others
+    assert [c.args[0] for c in batching_conn._cursor.execute.call_args_list] == [
+        statements,
+        *[q.sql for q in post_actions],
+    ]
+    # the failed request is recorded
+    assert (history.queries[0].query_id, history.queries[0].sql_text) == (
+        "qid",
+        statements,
+    )
+
+
+def test_multi_statement_batching_requires_connector_version(mock_session):
+    with mock.patch(
+        "snowflake.snowpark.session.is_multi_statement_supported", return_value=False
+    ):
+        with pytest.raises(ValueError, match="requires snowflake-connector-python"):
+            mock_session.multi_statement_batching_enabled = True
+    assert mock_session.multi_statement_batching_enabled is False
+    mock_session.multi_statement_batching_enabled = True
+    assert mock_session.multi_statement_batching_enabled is True
@@ -2,8 +2,17 @@
 # Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
 #
 
+import pytest
+
 from snowflake.snowpark import Session
 
 
 def test_aliases():
     assert Session.createDataFrame == Session.create_dataframe
+
+
+@pytest.mark.parametrize("value", [0, -1, 1.5, True, "10"])
+def test_invalid_large_in_list_threshold(mock_session, value):
+    with pytest.raises(ValueError, match="must be a positive integer"):
+        mock_session.large_in_list_threshold = value
+    assert mock_session.large_in_list_threshold == 5000
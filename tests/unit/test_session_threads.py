@@ -0,0 +1,141 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from unittest import mock
+
+import pytest
+
+from snowflake.connector.cursor import ResultMetadata
+from snowflake.snowpark import Row, Session
+from snowflake.snowpark._internal.server_connection import (
+    MAX_IDLE_CURSORS,
+    ServerConnection,
+)
+from snowflake.snowpark.functions import col
+
+THREADS = 16
+
+
+def metadata(n: int) -> List[ResultMetadata]:
+    return [ResultMetadata(f"C{n}", 0, None, None, 38, 0, False)]
+
+
+class FakeCursor:
+    """Returns the number selected by ``select <n> as c<n>``, and yields to other
+    threads between executing a query and fetching its result, so that a cursor
+    shared by several threads would return the result of another thread."""
+
+    def __init__(self) -> None:
+        self.query = None
+        self.sfqid = None
+        self.description = None
+        self.closed = False
+        self._rows = None
+
+    def close(self) -> None:
+        self.closed = True
+
+    def _number(self, query: str) -> int:
+        return int(re.search(r"select (\d+) as c\d+", query).group(1))
+
+    def execute(self, query: str, **kwargs) -> "FakeCursor":
+        n = self._number(query)
+        self.query = query
+        self.sfqid = f"q{n}"
+        self.description = metadata(n)
+        self._rows = [(n,)]
+        time.sleep(0.001)
+        return self
+
+    def describe(self, query: str) -> List[ResultMetadata]:
+        time.sleep(0.001)
+        return metadata(self._number(query))
+
+    def fetchall(self) -> List[tuple]:
+        time.sleep(0.001)
+        return self._rows
+
+    def __iter__(self):
+        time.sleep(0.001)
+        return iter(self._rows)
+
+
+@pytest.fixture
+def session() -> Session:
+    connection = mock.MagicMock()
+    # the cursors created by the connection, to check that they're closed
+    connection.created_cursors = []
+    connection.cursor.side_effect = lambda: (
+        connection.created_cursors.append(FakeCursor())
+        or connection.created_cursors[-1]
+    )
+    connection.is_closed.return_value = False
+    conn = ServerConnection({}, connection)
+    conn._telemetry_client = mock.MagicMock()
+    with mock.patch.object(conn, "get_session_id", return_value=1):
+        return Session(conn)
+
+
+def test_results_never_cross_threads(session):
+    def action(n: int):
+        df = session.sql(f"select {n} as c{n}").filter(col(f"c{n}") >= 0)
+        if n % 2:
+            return df.collect()
+        return list(df.to_local_iterator())
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        results = list(executor.map(action, range(200)))
+    assert results == [[Row(**{f"C{n}": n})] for n in range(200)]
+
+    # every cursor is back in the pool or closed, and the pool is capped
+    conn = session._conn
+    created_cursors = conn._conn.created_cursors
+    closed = [c for c in created_cursors if c.closed]
+    assert len(conn._idle_cursors) + len(closed) == len(created_cursors)
+    assert len(conn._idle_cursors) <= MAX_IDLE_CURSORS
+    assert not any(c.closed for c in conn._idle_cursors)
+
+
+def test_concurrent_describe(session):
+    def schema(n: int) -> List[str]:
+        session._conn.clear_describe_cache()
+        return session.sql(f"select {n} as c{n}").columns
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        columns = list(executor.map(schema, range(200)))
+    assert columns == [[f"C{n}"] for n in range(200)]
+
+
+def test_analyzer_per_thread(session):
+    analyzers = []
+
+    def analyzer():
+        analyzers.append(session._analyzer)
+        assert session._analyzer is analyzers[-1]
+
+    threads = [threading.Thread(target=analyzer) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(a) for a in analyzers}) == 3
+    # the SQL of an expression is generated once for all threads
+    assert all(a.expression_sql_memo is session._expression_sql_memo for a in analyzers)
+    assert session._analyzer is session._analyzer
+
+
+def test_avoided_describe_query_count(session):
+    def schema(n: int) -> List[str]:
+        df = session.sql(f"select {n} as c{n}")
+        df.schema
+        return df.filter(col(f"c{n}") >= 0).columns
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        list(executor.map(schema, range(200)))
+    # the schema of every filter is derived from the schema of its child
+    assert session._avoided_describe_query_count == 200
@@ -0,0 +1,238 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+import re
+from unittest import mock
+
+import pytest
+
+from snowflake.snowpark._internal.analyzer.expression import Attribute
+from snowflake.snowpark.exceptions import SnowparkPlanException
+from snowflake.snowpark import Window
+from snowflake.snowpark.functions import col, lit, max as max_, row_number
+from snowflake.snowpark.types import LongType
+
+
+def nesting_depth(sql: str) -> int:
+    depth = max_depth = 0
+    for c in re.sub(r"'[^']*'", "", sql):
+        if c == "(":
+            depth += 1
+            max_depth = max(max_depth, depth)
+        elif c == ")":
+            depth -= 1
+    return max_depth
+
+
+def select_count(sql: str) -> int:
+    return len(re.findall(r"\bSELECT\b", sql, re.IGNORECASE))
+
+
+def build_pipeline(session, steps: int):
+    df = session.table("test_table")
+    for i in range(steps):
+        df = df.filter(col("a") > i).select(col("a"), col("b"))
+        df = df.sort(col("a")).limit(100)
+    return df
+
+
+def test_filters_are_merged(mock_session):
+    df = mock_session.table("test_table").filter(col("a") > 1).filter(col("b") < 2)
+    assert df.queries["queries"] == [
+        'SELECT  *  FROM (test_table) WHERE (("A" > 1 :: bigint)) AND (("B" < 2 :: bigint))'
+    ]
+
+
+def test_project_and_limit_are_merged(mock_session):
+    df = (
+        mock_session.table("test_table")
+        .filter(col("a") > 1)
+        .select(col("a"), col("b"))
+        .limit(5)
+    )
+    assert df.queries["queries"] == [
+        'SELECT "A", "B" FROM (test_table) WHERE ("A" > 1 :: bigint) LIMIT 5'
+    ]
+
+
+def test_sort_and_limit_are_merged(mock_session):
+    df = mock_session.table("test_table").sort(col("a")).limit(5)
+    assert df.queries["queries"] == [
+        'SELECT  *  FROM (test_table) ORDER BY "A" ASC NULLS FIRST LIMIT 5'
+    ]
+
+
+def test_unmergeable_clauses_are_nested(mock_session):
+    # filtering after a projection or a limit must see the output of it
+    df = mock_session.table("test_table").select(col("a").alias("b"))
+    df = df.filter(col("b") > 1).limit(5).filter(col("b") < 3)
+    assert df.queries["queries"] == [
+        'SELECT  *  FROM ( SELECT  *  FROM ( SELECT "A" AS "B" FROM (test_table)) '
+        'WHERE ("B" > 1 :: bigint) LIMIT 5) WHERE ("B" < 3 :: bigint)'
+    ]
+    # sort can't be merged into a projection because ORDER BY could refer to an alias
+    df = mock_session.table("test_table").select(col("a").alias("b")).sort(col("b"))
+    assert select_count(df.queries["queries"][0]) == 2
+    # a second limit is not merged
+    df = mock_session.table("test_table").limit(10).limit(5)
+    assert select_count(df.queries["queries"][0]) == 2
+
+
+@pytest.fixture
+def table_with_schema(mock_session, mock_server_connection):
+    mock_server_connection.get_result_attributes.return_value = [
+        Attribute('"A"', LongType()),
+        Attribute('"B"', LongType()),
+    ]
+    return mock_session.table("t")
+
+
+def test_projections_are_merged(table_with_schema):
+    df = table_with_schema
+    for i in range(3):
+        df = df.with_column(f"c{i}", col("a") > i)
+    assert df.queries["queries"] == [
+        'SELECT "A", "B", ("A" > 0 :: bigint) AS "C0", ("A" > 1 :: bigint) AS "C1", '
+        '("A" > 2 :: bigint) AS "C2" FROM (t)'
+    ]
+    # the columns that are output unchanged are copied from the projection below
+    assert df.select(col("a"), col("c2")).queries["queries"] == [
+        'SELECT "A", ("A" > 2 :: bigint) AS "C2" FROM (t)'
+    ]
+
+
+def test_clauses_on_passed_through_columns_are_merged(table_with_schema):
+    df = (
+        table_with_schema.with_column("c", col("a") > 1)
+        .filter(col("b") > 2)
+        .sort(col("a"))
+        .limit(5)
+    )
+    assert df.queries["queries"] == [
+        'SELECT "A", "B", ("A" > 1 :: bigint) AS "C" FROM (t) '
+        'WHERE ("B" > 2 :: bigint) ORDER BY "A" ASC NULLS FIRST LIMIT 5'
+    ]
+
+
+def test_clauses_on_computed_columns_are_nested(table_with_schema):
+    df = table_with_schema.with_column("c", col("a") > 1)
+    for nested in [
+        df.with_column("d", col("c") == lit(True)),
+        df.filter(col("c")),
+        df.sort(col("c")),
+        # a filter can't be evaluated before a window function
+        table_with_schema.select(
+            col("a"), row_number().over(Window.order_by("b")).alias("r")
+        ).filter(col("a") > 1),
+        # a projection without columns can't replace an aggregation
+        table_with_schema.select(max_("a").alias("m")).select(lit(1).alias("x")),
+    ]:
+        assert select_count(nested.queries["queries"][-1]) == 2
+
+
+def test_merged_schema_query(mock_session):
+    df = mock_session.table("test_table").filter(col("a") > 1).select(col("a"))
+    assert (
+        df._plan.schema_query.strip()
+        == 'SELECT "A" FROM (test_table) WHERE ("A" > 1 :: bigint)'
+    )
+
+
+def test_sql_fusion_reduces_nesting(mock_session):
+    mock_session._sql_fusion_enabled = False
+    nested_sql = build_pipeline(mock_session, 10).queries["queries"][-1]
+    mock_session._sql_fusion_enabled = True
+    merged_sql = build_pipeline(mock_session, 10).queries["queries"][-1]
+
+    # each step of filter + select + sort + limit generates 3 SELECTs without
+    # merging (limit is always merged into the sort), and 1 SELECT with merging
+    assert select_count(nested_sql) == 31
+    assert select_count(merged_sql) == 10
+    assert nesting_depth(nested_sql) == 31
+    assert nesting_depth(merged_sql) == 10
+    assert len(merged_sql) < len(nested_sql)
+
+
+def test_union_chain_is_flattened(mock_session):
+    df = mock_session.table("test_table")
+    result = df.union_all(df.filter(col("a") > 1)).union_all(df).union_all(df)
+    assert result.queries["queries"] == [
+        "( SELECT  *  FROM (test_table)) UNION ALL "
+        '( SELECT  *  FROM (test_table) WHERE ("A" > 1 :: bigint)) UNION ALL '
+        "( SELECT  *  FROM (test_table)) UNION ALL ( SELECT  *  FROM (test_table))"
+    ]
+
+    # unions of different kinds are not associative
+    result = df.union_all(df).union(df)
+    assert nesting_depth(result.queries["queries"][0]) == 3
+
+
+def test_sample_by_is_a_single_union(mock_session):
+    df = mock_session.table("test_table")
+    sql = df.stat.sample_by("a", {i: 0.5 for i in range(20)}).queries["queries"][0]
+    assert sql.count("UNION ALL") == 19
+    assert nesting_depth(sql) == 3
+
+
+def test_subquery_slots_are_filled(mock_session, mock_server_connection):
+    mock_server_connection.get_result_attributes.return_value = [
+        Attribute('"B"', LongType())
+    ]
+    df = mock_session.table("test_table")
+    subquery = mock_session.table("other_table").filter(col("b") > 1).select("b")
+    result = df.filter(col("a").in_(subquery) | col("c").in_(subquery))
+
+    subquery_sql = subquery._plan.queries[-1].sql
+    assert result.queries["queries"] == [
+        f'SELECT  *  FROM (test_table) WHERE ("A" IN (({subquery_sql})) OR '
+        f'"C" IN (({subquery_sql})))'
+    ]
+    schema_query = result._plan.schema_query
+    assert schema_query.count(subquery._plan.schema_query) == 2
+    assert "\x01" not in schema_query
+
+
+def test_bind_params_follow_the_sql(mock_session, mock_server_connection):
+    mock_server_connection._telemetry_client = mock.MagicMock()
+    mock_server_connection.get_result_attributes.return_value = [
+        Attribute('"A"', LongType()),
+        Attribute('"B"', LongType()),
+    ]
+    df1 = mock_session.sql("select * from t1 where a > ?", params=[1])
+    df2 = mock_session.sql("select * from t2 where b = ?", params=["x"])
+
+    df = df1.filter(col("a") < 5).select(col("a")).sort(col("a"))
+    assert df._plan.queries[-1].params == [1]
+    df = df1.union_all(df2).union_all(df1)
+    assert df._plan.queries[-1].params == [1, "x", 1]
+    # the repeated subplan isn't extracted, because its values are bound twice
+    assert df._execution_plan.queries == df._plan.queries
+    df = df1.join(df2, df1["a"] == df2["b"])
+    assert df._plan.queries[-1].params == [1, "x"]
+    assert mock_session.table("t").filter(col("a") > 1)._plan.queries[-1].params is None
+
+    # the schema query is described with its bound values
+    mock_server_connection.get_result_attributes.assert_any_call(
+        "select * from t1 where a > ?", [1]
+    )
+    assert "?" not in df._plan.schema_query
+
+
+def test_bind_params_in_subquery(mock_session, mock_server_connection):
+    mock_server_connection.get_result_attributes.return_value = [
+        Attribute('"A"', LongType())
+    ]
+    subquery = mock_session.sql("select a from t1 where a > ?", params=[1])
+    with pytest.raises(SnowparkPlanException) as ex_info:
+        mock_session.table("t").filter(col("a").in_(subquery)).queries
+    assert ex_info.value.error_code == "1207"
+
+
+def test_call_binds_basic_arguments(mock_session, mock_server_connection):
+    mock_server_connection._telemetry_client = mock.MagicMock()
+    mock_session.call("p", 1, "a", 1.5, [1, 2], float("nan"), None)
+    plan = mock_server_connection.execute.call_args[0][0]
+    assert plan.queries[-1].sql == (
+        "CALL p(?, ?, ?, parse_json('[1, 2]'), 'Nan' :: FLOAT, NULL)"
+    )
+    assert plan.queries[-1].params == [1, "a", 1.5]
@@ -0,0 +1,62 @@
+#
+# Copyright (c) 2012-2022 Snowflake Computing Inc. All rights reserved.
+#
+from snowflake.snowpark._internal.analyzer.analyzer_utils import (
+    filter_statement,
+    project_statement,
+    set_operator_statement,
+)
+from snowflake.snowpark._internal.analyzer.sql_rope import SqlRope, join_fragments
+from snowflake.snowpark.functions import col
+
+
+def test_concatenation():
+    rope = "a" + SqlRope.of("b") + "c"
+    assert isinstance(rope, SqlRope)
+    assert str(rope) == "abc"
+    assert len(rope) == 3
+    assert str(rope + rope) == "abcabc"
+    assert SqlRope.of(rope) is rope
+
+
+def test_statements_of_a_rope():
+    child = SqlRope.of(project_statement([], "t"))
+    sql = filter_statement("a > 1", child)
+    assert isinstance(sql, SqlRope)
+    assert str(sql) == filter_statement("a > 1", str(child))
+    union = set_operator_statement([child, str(child)], "UNION ALL")
+    assert str(union) == set_operator_statement([str(child)] * 2, "UNION ALL")
+
+
+def test_join_fragments():
+    assert join_fragments(", ", ["a", "b"]) == "a, b"
+    assert str(join_fragments(", ", ["a", SqlRope.of("b"), "c"])) == "a, b, c"
+    assert join_fragments(", ", []) == ""
+
+
+def test_head():
+    rope = SqlRope(("  ", "", " \n se", SqlRope.of("LECT"), " * FROM t"))
+    assert rope.head(6) == "seLECT"
+    assert rope.head(100) == "seLECT * FROM t"
+    assert SqlRope.of("   ").head(6) == ""
+
+
+def test_deep_rope():
+    rope = SqlRope.of("")
+    for i in range(10000):
+        rope = "(" + rope + ")"
+    assert str(rope) == "(" * 10000 + ")" * 10000
+
+
+def test_child_sql_is_not_copied(mock_session):
+    df = mock_session.table("test_table")
+    for i in range(5):
+        df = df.select(col("a"), (col("b") + i).alias("b")).filter(col("b") > i)
+    query = df._plan.queries[-1]
+    # the string is only built when the SQL is needed, and the rope is kept
+    assert query._sql is None
+    rope = query.sql_rope
+    sql = query.sql
+    assert query._sql is sql
+    assert query.sql_rope is rope
+    assert sql.count("SELECT") == 6